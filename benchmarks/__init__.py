@@ -0,0 +1,52 @@
+"""
+Benchmarks of the hot paths: `booking.utils`, `SessionForm.clean`, the calendar and dashboard views, and the news feed.
+
+Seed a load first with `python manage.py seed_load --scale 10k` (or 100k, 1m), then run the suite
+with `python manage.py run_benchmarks --output results.json`. Results are written as JSON, and can be
+compared with those of another commit with `--compare baseline.json`.
+
+Benchmarks are registered with the `benchmark` decorator, on a function that takes the `BenchmarkContext`
+and returns the operation to time (a function that takes no arguments).
+"""
+import importlib
+from dataclasses import dataclass
+from typing import Callable, Dict
+
+
+# Users seeded by the `seed_load` command have emails on this domain
+SEED_EMAIL_DOMAIN = "load.example.com"
+
+# Modules of the suite, imported by `load_benchmarks`
+BENCHMARK_MODULES = ("benchmarks.booking_utils", "benchmarks.forms", "benchmarks.views", "benchmarks.news")
+
+
+@dataclass
+class Benchmark:
+    """A registered benchmark"""
+    name: str
+    setup: Callable[..., Callable[[], object]]
+    description: str = ""
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str):
+    """
+    Create a decorator that registers the decorated setup function as a benchmark.
+
+    :param name: Unique name of the benchmark, e.g. "booking.utils.get_bookings_by_user_on_date".
+    """
+    def decorator(setup: Callable[..., Callable[[], object]]) -> Callable[..., Callable[[], object]]:
+        if name in BENCHMARKS:
+            raise ValueError(f"A benchmark named '{name}' is already registered")
+        BENCHMARKS[name] = Benchmark(name=name, setup=setup, description=(setup.__doc__ or "").strip())
+        return setup
+    return decorator
+
+
+def load_benchmarks() -> Dict[str, Benchmark]:
+    """Imports the suite's modules, registering their benchmarks, and returns all registered benchmarks"""
+    for module in BENCHMARK_MODULES:
+        importlib.import_module(module)
+    return BENCHMARKS
@@ -0,0 +1,49 @@
+"""Benchmarks of the `booking.utils` functions behind the calendar and booking validation"""
+import datetime
+
+from . import benchmark
+from booking import utils
+
+
+@benchmark("booking.utils.get_unavailable_times_on_date_for_user")
+def bench_get_unavailable_times_on_date_for_user(context):
+    """Unavailable and booked times on the date, in the user's timezone"""
+    return lambda: utils.get_unavailable_times_on_date_for_user(context.date_str, context.user)
+
+
+@benchmark("booking.utils.get_bookings_by_user_on_date")
+def bench_get_bookings_by_user_on_date(context):
+    """The user's sessions on the date, by status"""
+    return lambda: utils.get_bookings_by_user_on_date(context.date_str, context.user)
+
+
+@benchmark("booking.utils.get_calendar_data_version")
+def bench_get_calendar_data_version(context):
+    """Version of the user's calendar data on the date, used as its ETag"""
+    return lambda: utils.get_calendar_data_version(context.date_str, context.user)
+
+
+@benchmark("booking.utils.check_if_time_period_is_available")
+def bench_check_if_time_period_is_available(context):
+    """Availability check of a half-hour period on the date"""
+    start = datetime.datetime.combine(context.date, datetime.time(10, 0), tzinfo=context.user.utz)
+    end = start + datetime.timedelta(minutes=30)
+    return lambda: utils.check_if_time_period_is_available(start, end)
+
+
+@benchmark("booking.utils.check_if_time_period_is_within_business_hours")
+def bench_check_if_time_period_is_within_business_hours(context):
+    """Business hours check of a half-hour period on the date"""
+    start = datetime.datetime.combine(context.date, datetime.time(10, 0), tzinfo=context.user.utz)
+    end = start + datetime.timedelta(minutes=30)
+    return lambda: utils.check_if_time_period_is_within_business_hours(start, end)
+
+
+@benchmark("booking.availability.get_free_periods_of_any_resource")
+def bench_get_free_periods_of_any_resource(context):
+    """Free periods on the date of any bookable calendar, merged from each calendar's (seed with --resources)"""
+    from booking.availability import get_free_periods_of_any_resource
+
+    start = datetime.datetime.combine(context.date, datetime.time.min, tzinfo=context.user.utz)
+    end = start + datetime.timedelta(days=1)
+    return lambda: get_free_periods_of_any_resource(start, end)
@@ -0,0 +1,14 @@
+"""Benchmarks of booking form validation"""
+from . import benchmark
+from booking.forms import SessionForm
+
+
+@benchmark("booking.forms.SessionForm.clean")
+def bench_session_form_clean(context):
+    """Validation of a new half-hour session on the date, including business hours and availability checks"""
+    data = {
+        "title": "Benchmark session", "date": context.date_str,
+        "start_time": "10:00", "end_time": "10:30",
+        "timezone": context.user.utz, "booked_by": context.user,
+    }
+    return lambda: SessionForm(data=data).is_valid()
@@ -0,0 +1,21 @@
+"""Benchmarks of the news feed, requested with the Django test client"""
+from django.urls import reverse
+
+from . import benchmark
+from .views import _get
+from news.models import News
+from news.utils import encode_news_feed_cursor
+
+
+@benchmark("news.views.NewsFeedDataView.get")
+def bench_news_feed_first_page(context):
+    """The first page of the news feed (JSON), without a cached version (no If-None-Match)"""
+    return _get(context, reverse("news:news_feed_data"))
+
+
+@benchmark("news.views.NewsFeedDataView.get.deep")
+def bench_news_feed_deep_page(context):
+    """A page of the news feed (JSON) near the end of the archive, which should take as long as the first"""
+    published = News.objects.published().feed_order()
+    position = published[max(published.count() - 30, 0)]
+    return _get(context, reverse("news:news_feed_data"), data={"cursor": encode_news_feed_cursor(position)})
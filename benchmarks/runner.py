@@ -0,0 +1,170 @@
+import datetime
+import fnmatch
+import platform
+import subprocess
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+import django
+from django.conf import settings
+from django.db import connection, models
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django_utz.middleware import local_thread_storage
+
+from . import SEED_EMAIL_DOMAIN, load_benchmarks
+from booking.models import Resource, Session, UnavailablePeriod
+from helpers.benchmark import summarize_latencies
+from news.models import News
+from users.models import UserAccount
+
+
+# Version of the results format, for `compare_results` to refuse results it cannot compare
+RESULTS_FORMAT_VERSION = 1
+
+
+@dataclass
+class BenchmarkContext:
+    """
+    What benchmarks run against: the seeded user with the most sessions, logged in to a test client,
+    and a date on which the user has an upcoming session.
+    """
+    user: UserAccount
+    date: datetime.date
+    client: Client = field(default_factory=Client)
+
+    @property
+    def date_str(self) -> str:
+        return self.date.strftime("%Y-%m-%d")
+
+    def set_request_user(self) -> None:
+        """Makes the user the request user, as django-utz's middleware does, for code that reads it outside a request"""
+        setattr(local_thread_storage, "django_utz-request_user", self.user)
+        return None
+
+    @classmethod
+    def from_seeded_data(cls) -> Optional["BenchmarkContext"]:
+        """Returns the context for the seeded data, or None if there is no seeded data"""
+        user = (
+            UserAccount.objects.filter(email__endswith=f"@{SEED_EMAIL_DOMAIN}", is_verified=True)
+            .annotate(session_count=models.Count("session"))
+            .order_by("-session_count", "email")
+            .first()
+        )
+        if user is None:
+            return None
+        today = timezone.now().astimezone(user.utz).date()
+        upcoming = Session.objects.filter(booked_by=user, end__gt=timezone.now()).order_by("start").first()
+        date = upcoming.start.astimezone(user.utz).date() if upcoming else today + datetime.timedelta(days=1)
+        context = cls(user=user, date=date)
+        context.client.force_login(user)
+        return context
+
+
+def get_git_commit() -> Optional[str]:
+    """Returns the commit checked out in the project directory, or None if it cannot be told"""
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=10, check=True
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return output.stdout.strip() or None
+
+
+def get_dataset_stats() -> Dict[str, int]:
+    """Returns the number of rows of the models benchmarks run against, to tell whether results are comparable"""
+    return {
+        "users": UserAccount.objects.count(),
+        "sessions": Session.objects.count(),
+        "unavailable_periods": UnavailablePeriod.objects.count(),
+        "resources": Resource.objects.count(),
+        "news": News.objects.count(),
+    }
+
+
+def run_benchmarks(
+    patterns: Optional[Iterable[str]] = None,
+    iterations: int = 50,
+    warmup: int = 5,
+    context: Optional[BenchmarkContext] = None
+) -> Dict[str, Any]:
+    """
+    Runs the registered benchmarks whose names match any of the patterns (all by default).
+
+    Each benchmark's operation is called `warmup` times untimed, then `iterations` times timed.
+    The queries made by one more call are counted.
+
+    :param patterns: Shell-style patterns of the names of benchmarks to run, e.g. "booking.views.*".
+    :return: The results, as a JSON serializable dict.
+    """
+    benchmarks = load_benchmarks()
+    patterns = list(patterns or ["*"])
+    context = context or BenchmarkContext.from_seeded_data()
+    if context is None:
+        raise ValueError("No seeded data found. Run `python manage.py seed_load` first")
+
+    results = {}
+    # Slow requests are expected under load, and would otherwise be logged for each call
+    with override_settings(SLOW_REQUEST_THRESHOLD=float("inf")):
+        for name, bench in benchmarks.items():
+            if not any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+                continue
+            context.set_request_user()
+            operation = bench.setup(context)
+            for _ in range(warmup):
+                operation()
+            latencies = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                operation()
+                latencies.append(time.perf_counter() - start)
+            with CaptureQueriesContext(connection) as queries:
+                operation()
+            results[name] = {**summarize_latencies(latencies), "queries": len(queries)}
+
+    return {
+        "format": RESULTS_FORMAT_VERSION,
+        "commit": get_git_commit(),
+        "created_at": timezone.now().isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+        },
+        "dataset": get_dataset_stats(),
+        "context": {"user": context.user.email, "date": context.date_str},
+        "iterations": iterations,
+        "results": results,
+    }
+
+
+def compare_results(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.1) -> List[Dict[str, Any]]:
+    """
+    Compares the median latency and query count of each benchmark in the results with the baseline's.
+
+    :param threshold: Relative increase in median latency (0.1 is 10%) above which a benchmark has regressed.
+    Any increase in query count is a regression.
+    :return: A comparison for each benchmark in both results.
+    """
+    if baseline.get("format") != results.get("format"):
+        raise ValueError("The results and the baseline were written in different formats, and cannot be compared")
+    comparisons = []
+    for name, result in results["results"].items():
+        base = baseline["results"].get(name, None)
+        if not base or not base.get("count") or not result.get("count"):
+            continue
+        change = (result["p50_ms"] - base["p50_ms"]) / base["p50_ms"] if base["p50_ms"] else 0.0
+        comparisons.append({
+            "name": name,
+            "baseline_p50_ms": base["p50_ms"],
+            "p50_ms": result["p50_ms"],
+            "change": change,
+            "baseline_queries": base["queries"],
+            "queries": result["queries"],
+            "regressed": change > threshold or result["queries"] > base["queries"],
+        })
+    return comparisons
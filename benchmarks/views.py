@@ -0,0 +1,60 @@
+"""Benchmarks of the calendar and dashboard endpoints, requested with the Django test client"""
+import json
+
+from django.urls import reverse
+
+from . import benchmark
+
+
+def _get(context, url: str, **extra):
+    def operation():
+        response = context.client.get(url, **extra)
+        assert response.status_code == 200, response.status_code
+        return response
+    return operation
+
+
+@benchmark("booking.views.SessionCalendarView.get")
+def bench_session_calendar_page(context):
+    """The calendar page"""
+    return _get(context, reverse("booking:calendar"))
+
+
+@benchmark("booking.views.SessionCalendarView.post")
+def bench_session_calendar_post(context):
+    """The calendar data for the date (JSON)"""
+    url = reverse("booking:calendar")
+    payload = json.dumps({"date": context.date_str})
+
+    def operation():
+        response = context.client.post(url, data=payload, content_type="application/json")
+        assert response.status_code == 200, response.status_code
+        return response
+    return operation
+
+
+@benchmark("booking.views.SessionCalendarDataView.get")
+def bench_session_calendar_data(context):
+    """The calendar data for the date, in the compact format, without a cached version (no If-None-Match)"""
+    return _get(context, reverse("booking:calendar_data"), data={"date": context.date_str, "format": "compact"})
+
+
+@benchmark("dashboard.views.DashboardView.get")
+def bench_dashboard(context):
+    """The dashboard, without a cached version (no If-None-Match)"""
+    return _get(context, reverse("dashboard:dashboard"))
+
+
+@benchmark("booking.views.SessionAvailabilityView.get")
+def bench_session_availability(context):
+    """The availability on each date of the month, precomputed (after the first request)"""
+    return _get(context, reverse("booking:calendar_availability"), data={"month": context.date_str[:7]})
+
+
+@benchmark("booking.availability.refresh_day_availability")
+def bench_refresh_day_availability(context):
+    """Computing and saving the availability on each date of the month, as when it is not precomputed"""
+    from booking.availability import get_month_availability, refresh_day_availability
+
+    dates = [day.date for day in get_month_availability(*map(int, context.date_str.split("-")[:2]))]
+    return lambda: refresh_day_availability(dates)
@@ -1,30 +1,62 @@
+import io
+import os
 from typing import Any
-from django.contrib import admin
-from django.http import HttpRequest
+from django.conf import settings
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.db.models import QuerySet
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
 
-from .models import Session, UnavailablePeriod
-from .forms import SessionForm, UnavailablePeriodAdminForm
+from .models import Resource, Session, UnavailablePeriod
+from .forms import SessionForm, UnavailablePeriodAdminForm, BookingImportForm
+from .exports import stream_sessions_csv
+from .imports import BookingImporter, get_row_reader
+from helpers.admin import ChangeListPerformanceMixin
+from core.search import IndexedSearchMixin
+
+
+
+@admin.register(Resource)
+class ResourceModelAdmin(admin.ModelAdmin):
+    """Model admin for the Resource model"""
+    list_display = ["name", "is_active", "opens_at", "closes_at", "timezone"]
+    list_filter = ["is_active"]
+    search_fields = ["name"]
+    ordering = ["name"]
 
 
 
 @admin.register(Session)
-class SessionModelAdmin(admin.ModelAdmin):
+class SessionModelAdmin(IndexedSearchMixin, ChangeListPerformanceMixin, admin.ModelAdmin):
     """Model admin for the Session model"""
     form = SessionForm
     list_display = [
-        "title", "starts", "ends", "booked_by", 
+        "title", "starts", "ends", "booked_by", "resource",
         "link", "has_held", "cancelled", "booked_at",
         "rescheduled"
     ]
-    search_fields = ["title", "booked_by__email", "booked_by__name"]
+    list_select_related = ["booked_by", "link", "resource"]
+    list_filter = ["resource"]
+    user_tz_fields = ["start", "end", "created_at", "rescheduled_at"]
+    search_fields = ["title", "booked_by__email", "booked_by__name", "link__identifier"]
     readonly_fields = ["booked_by", "rescheduled_at"]
     date_hierarchy = "start"
     ordering = ["-start__date", "start__time"]
+    actions = ["export_as_csv"]
+    change_list_template = "admin/booking/session/change_list.html"
+    # Maximum number of rejected rows listed after an import
+    max_import_errors_shown = 20
 
     def save_model(self, request: Any, obj: Any, form: Any, change: Any) -> None:
         # Set the booked_by field to the request user
         if not obj.pk:
             form.instance["booked_by"] = request.user
+        # The form does not save the session's link until the session is saved
+        form.save_link()
         return super().save_model(request, obj, form, change)
 
     def has_add_permission(self, request: HttpRequest) -> bool:
@@ -33,30 +65,99 @@ class SessionModelAdmin(admin.ModelAdmin):
     
     def starts(self, obj: Session) -> Any:
         """Start time in the request user's timezone"""
-        return obj.start_user_tz
+        return self.to_user_tz(obj, "start")
     
     def ends(self, obj: Session) -> Any:
         """End time in the request user's timezone"""
-        return obj.end_user_tz
+        return self.to_user_tz(obj, "end")
     
     def booked_at(self, obj: Session) -> Any:
         """Created time in the request user's timezone"""
-        return obj.created_at_user_tz
+        return self.to_user_tz(obj, "created_at")
     
     def rescheduled(self, obj: Session) -> Any:
         """Updated time in the request user's timezone"""
-        if not obj.rescheduled_at:
-            return None
-        return obj.rescheduled_at_user_tz
+        return self.to_user_tz(obj, "rescheduled_at")
     
+    @admin.action(description="Export selected sessions as CSV")
+    def export_as_csv(self, request: HttpRequest, queryset: QuerySet[Session]) -> StreamingHttpResponse:
+        """
+        Streams the selected sessions as CSV, with datetimes in the request user's timezone.
+
+        Sessions are ordered by their indexed start, and streamed in chunks, so that
+        exporting all sessions uses constant memory.
+        """
+        response = StreamingHttpResponse(
+            stream_sessions_csv(queryset.order_by("start"), tz=request.user.utz),
+            content_type="text/csv; charset=utf-8"
+        )
+        filename = f"sessions-{timezone.now().astimezone(request.user.utz):%Y%m%d-%H%M%S}.csv"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    def get_urls(self):
+        info = self.opts.app_label, self.opts.model_name
+        return [
+            path("import/", self.admin_site.admin_view(self.import_view), name="%s_%s_import" % info),
+            *super().get_urls(),
+        ]
+
+    def has_import_permission(self, request: HttpRequest) -> bool:
+        # Sessions cannot be added one by one in the admin, so the import is gated on the model permission itself
+        return request.user.has_perm("booking.add_session")
+
+    def changelist_view(self, request: HttpRequest, extra_context: Any = None) -> HttpResponse:
+        extra_context = {**(extra_context or {}), "can_import": self.has_import_permission(request)}
+        return super().changelist_view(request, extra_context=extra_context)
+
+    def import_view(self, request: HttpRequest) -> HttpResponse:
+        """Imports sessions and unavailable periods from an uploaded CSV or iCalendar file (see `booking.imports`)"""
+        if not self.has_import_permission(request):
+            raise PermissionDenied
+        form = BookingImportForm(request.POST or None, request.FILES or None, initial={"timezone": request.user.utz})
+        if request.method == "POST" and form.is_valid():
+            data = form.cleaned_data
+            upload = data["file"]
+            importer = BookingImporter(
+                request.user,
+                batch_size=data["batch_size"] or settings.BOOKING_IMPORT_BATCH_SIZE,
+                allow_past=data["allow_past"],
+                check_business_hours=not data["ignore_business_hours"],
+                dry_run=data["dry_run"]
+            )
+            # Read the upload as a text stream, instead of reading it into memory
+            file = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+            reader = get_row_reader(os.path.splitext(upload.name)[1].lstrip(".").lower())
+            result = importer.run(reader(file, data["type"], data["timezone"]))
+
+            summary = f"{'Dry run: ' if data['dry_run'] else ''}{result}"
+            self.message_user(request, summary, messages.SUCCESS if not result.errors else messages.WARNING)
+            for line, error in result.errors[:self.max_import_errors_shown]:
+                self.message_user(request, f"Line {line}: {error}", messages.ERROR)
+            if len(result.errors) > self.max_import_errors_shown:
+                self.message_user(
+                    request, f"{len(result.errors) - self.max_import_errors_shown} more row(s) were rejected.", messages.ERROR
+                )
+            return redirect(f"admin:{self.opts.app_label}_{self.opts.model_name}_changelist")
+
+        context = {
+            **self.admin_site.each_context(request),
+            "title": "Import sessions and unavailable periods",
+            "opts": self.opts,
+            "form": form,
+        }
+        return TemplateResponse(request, "admin/booking/session/import.html", context)
     
 
 
 @admin.register(UnavailablePeriod)
-class UnavailablePeriodModelAdmin(admin.ModelAdmin):
+class UnavailablePeriodModelAdmin(IndexedSearchMixin, ChangeListPerformanceMixin, admin.ModelAdmin):
     """Model admin for the UnavailablePeriod model"""
     form = UnavailablePeriodAdminForm
-    list_display = ["starts", "until", "created", "updated"]
+    list_display = ["starts", "until", "resource", "created", "updated"]
+    list_select_related = ["resource"]
+    list_filter = ["resource"]
+    user_tz_fields = ["start", "end", "created_at", "updated_at"]
     search_fields = ["start__date", "end__date", "start__time", "end__time"]
     date_hierarchy = "start"
     ordering = ["-start"]
@@ -66,20 +167,20 @@ class UnavailablePeriodModelAdmin(admin.ModelAdmin):
 
     def starts(self, obj: Session) -> Any:
         """Start time in the request user's timezone"""
-        return obj.start_user_tz
+        return self.to_user_tz(obj, "start")
     
     starts.short_description = "From"
     
     def until(self, obj: Session) -> Any:
         """End time in the request user's timezone"""
-        return obj.end_user_tz
+        return self.to_user_tz(obj, "end")
     
     until.short_description = "To"
     
     def created(self, obj: Session) -> Any:
         """Created time in the request user's timezone"""
-        return obj.created_at_user_tz
+        return self.to_user_tz(obj, "created_at")
     
     def updated(self, obj: Session) -> Any:
         """Updated time in the request user's timezone"""
-        return obj.updated_at_user_tz
+        return self.to_user_tz(obj, "updated_at")
@@ -4,3 +4,31 @@ from django.apps import AppConfig
 class BookingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'booking'
+
+    def ready(self) -> None:
+        from django.db.models.signals import post_save, post_delete
+        from core.models import BusinessHoursSettings, BusinessHoursInterval, BusinessHoursException
+        from .summaries import connect_session_summary_signals
+        from .availability import connect_day_availability_signals
+        from .session_links import connect_session_link_signals
+        from .models import Resource
+        from .utils import invalidate_business_hours_cache
+
+        # Keep the cached session summaries up to date with session changes
+        connect_session_summary_signals()
+        # Drop the cached business hours settings in every process when they change
+        post_save.connect(invalidate_business_hours_cache, sender=BusinessHoursSettings, dispatch_uid="booking.business_hours.save")
+        post_delete.connect(invalidate_business_hours_cache, sender=BusinessHoursSettings, dispatch_uid="booking.business_hours.delete")
+        # The compiled schedules include the weekly intervals and exceptions
+        for model in (BusinessHoursInterval, BusinessHoursException):
+            label = model._meta.label_lower
+            post_save.connect(invalidate_business_hours_cache, sender=model, dispatch_uid=f"booking.business_hours.save.{label}")
+            post_delete.connect(invalidate_business_hours_cache, sender=model, dispatch_uid=f"booking.business_hours.delete.{label}")
+        # Resources' schedules are cached with the site's
+        post_save.connect(invalidate_business_hours_cache, sender=Resource, dispatch_uid="booking.business_hours.resource_save")
+        post_delete.connect(invalidate_business_hours_cache, sender=Resource, dispatch_uid="booking.business_hours.resource_delete")
+        # Keep the availability on each date up to date with session, unavailable period and business hours changes
+        connect_day_availability_signals()
+        # Keep the lifecycle of session links up to date with their sessions
+        connect_session_link_signals()
+        return None
@@ -0,0 +1,487 @@
+"""
+Per-day availability: free time within business hours on each date of each calendar (in the calendar's
+business hours' timezone), stored in the `DayAvailability` table, for the calendar to shade its month grid
+and skip fully booked dates.
+
+There is a calendar per resource (host or room), and the default calendar for sessions booked with no resource.
+Everything here is partitioned by calendar: sessions only block their own calendar, and are looked up through
+the (resource, start) indexes, so a lookup stays a range scan of one calendar as resources are added.
+Unavailable periods with no resource block every calendar.
+
+Rows are computed lazily when a month is read, for the dates that have none, with one query per model
+for the whole month. They are then kept up to date incrementally: saving or deleting a session or unavailable
+period recomputes the dates it was and is on once committed, together with the dates of the transaction's other
+changes (see `connect_day_availability_signals`), and changing the
+business hours (settings, weekly intervals or exceptions) or a resource deletes the affected rows, for them
+to be computed again with the new hours. Business hours are read from the calendar's compiled schedule
+(`core.business_hours.BusinessHoursSchedule`), as are those checked when booking.
+
+"Any resource" queries (when is any host free, which host is free) are answered by merging
+the free periods of each resource's calendar (see `get_free_periods_of_any_resource`).
+
+Objects inserted, updated or deleted without signals (e.g. with `bulk_create`) must have their dates
+invalidated with `invalidate_day_availability`.
+"""
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+import calendar
+import datetime
+import heapq
+from django.db import IntegrityError, models, transaction
+
+from core.models import BusinessHoursSettings, BusinessHoursInterval, BusinessHoursException
+from core.business_hours import BusinessHoursSchedule
+from helpers.transactions import add_to_commit_batch
+from .models import DayAvailability, Resource, Session, UnavailablePeriod
+from .utils import calendar_sessions_q, calendar_unavailable_periods_q, overlapping_q, get_business_hours_schedule
+
+
+Period = Tuple[datetime.datetime, datetime.datetime]
+
+# Sessions are booked in slots of this many minutes. A date is fully booked if it has no free period this long
+BOOKING_SLOT_MINUTES = 5
+# Attribute of a session or unavailable period that holds its `AvailabilitySpan` as last loaded or saved
+AVAILABILITY_SPAN_ATTR = "_availability_span"
+# Passed as the resource to `invalidate_day_availability`, to invalidate the dates of every calendar
+ALL_CALENDARS = "__all__"
+
+
+class AvailabilitySpan(NamedTuple):
+    """What a session or unavailable period contributes to the availability of a calendar"""
+    start: datetime.datetime
+    end: datetime.datetime
+    # Sessions that are cancelled do not block time
+    blocks: bool
+    resource_id: Optional[Any]
+
+
+def get_busy_periods(
+    start: datetime.datetime,
+    end: datetime.datetime,
+    resource_id: Optional[Any] = None,
+    exclude_sessions: Sequence[Any] = ()
+) -> List[Period]:
+    """
+    Returns the periods between the datetimes that are booked (by sessions that are not cancelled)
+    or unavailable on a calendar, sorted by start.
+
+    :param resource_id: Primary key of the calendar's resource. None for the default calendar
+    :param exclude_sessions: Primary keys of sessions that are not considered booked
+    """
+    sessions = Session.objects.filter(overlapping_q(start, end), calendar_sessions_q(resource_id), cancelled=False)
+    if exclude_sessions:
+        sessions = sessions.exclude(pk__in=exclude_sessions)
+    unavailable_periods = UnavailablePeriod.objects.filter(overlapping_q(start, end), calendar_unavailable_periods_q(resource_id))
+    return sorted([
+        *sessions.order_by().values_list("start", "end"),
+        *unavailable_periods.order_by().values_list("start", "end")
+    ])
+
+
+def subtract_periods(start: datetime.datetime, end: datetime.datetime, busy_periods: Iterable[Period]) -> List[Period]:
+    """
+    Returns the free periods between the datetimes, sorted by start.
+
+    :param busy_periods: Periods that are not free, sorted by start. Periods outside the datetimes are ignored
+    """
+    free_periods = []
+    free_from = start
+    for busy_start, busy_end in busy_periods:
+        if busy_end <= free_from or busy_start >= end:
+            continue
+        if busy_start > free_from:
+            free_periods.append((free_from, busy_start))
+        free_from = max(free_from, busy_end)
+        if free_from >= end:
+            break
+    if free_from < end:
+        free_periods.append((free_from, end))
+    return free_periods
+
+
+def merge_periods(*period_lists: Iterable[Period]) -> List[Period]:
+    """Returns the union of the lists of periods (each sorted by start), as a list of disjoint periods sorted by start"""
+    merged: List[Period] = []
+    for start, end in heapq.merge(*period_lists):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def summarize_day(
+    date: datetime.date,
+    business_periods: List[Period],
+    free_periods: List[Period],
+    resource_id: Optional[Any] = None
+) -> DayAvailability:
+    """
+    Returns the (unsaved) availability on the date, given the business hours and free periods on it
+
+    :param business_periods: Disjoint periods within business hours on the date
+    :param free_periods: Disjoint free periods within business hours on the date
+    """
+    minutes = [(end - start).total_seconds() / 60 for start, end in free_periods]
+    longest_free_minutes = max(minutes, default=0)
+    return DayAvailability(
+        resource_id=resource_id,
+        date=date,
+        business_minutes=int(sum((end - start).total_seconds() for start, end in business_periods) // 60),
+        free_minutes=int(sum(minutes)),
+        longest_free_minutes=int(longest_free_minutes),
+        fully_booked=longest_free_minutes < BOOKING_SLOT_MINUTES,
+    )
+
+
+def compute_day_availability(
+    date: datetime.date,
+    schedule: BusinessHoursSchedule,
+    busy_periods: List[Period],
+    resource_id: Optional[Any] = None
+) -> DayAvailability:
+    """
+    Computes the availability on the date of a calendar.
+
+    :param schedule: The calendar's business hours
+    :param busy_periods: Booked and unavailable periods, sorted by start. Periods outside business hours are ignored
+    :param resource_id: Primary key of the calendar's resource. None for the default calendar
+    """
+    business_periods = schedule.periods_on(date)
+    free_periods = [
+        free_period
+        for opens_at, closes_at in business_periods
+        for free_period in subtract_periods(opens_at, closes_at, busy_periods)
+    ]
+    return summarize_day(date, business_periods, free_periods, resource_id)
+
+
+def refresh_day_availability(dates: Iterable[datetime.date], resource_id: Optional[Any] = None) -> List[DayAvailability]:
+    """
+    Computes and saves the availability on the dates of a calendar, with one query per model for all of them.
+
+    :param resource_id: Primary key of the calendar's resource. None for the default calendar
+    :return: The availability on each date, in date order
+    """
+    dates = sorted(set(dates))
+    if not dates:
+        return []
+    try:
+        schedule = get_business_hours_schedule(resource_id)
+    except Resource.DoesNotExist:
+        # The resource was deleted, and its calendar with it
+        return []
+    open_dates = [date for date in dates if schedule.is_open_on(date)]
+    busy_periods = []
+    if open_dates:
+        range_start = schedule.periods_on(open_dates[0])[0][0]
+        range_end = schedule.periods_on(open_dates[-1])[-1][1]
+        busy_periods = get_busy_periods(range_start, range_end, resource_id)
+    days = [compute_day_availability(date, schedule, busy_periods, resource_id) for date in dates]
+    try:
+        with transaction.atomic():
+            DayAvailability.objects.filter(resource_id=resource_id, date__in=dates).delete()
+            DayAvailability.objects.bulk_create(days)
+    except IntegrityError:
+        # Computed and saved at the same time by another process
+        pass
+    return days
+
+
+def invalidate_day_availability(dates: Optional[Iterable[datetime.date]] = None, resource_id: Optional[Any] = ALL_CALENDARS) -> None:
+    """
+    Deletes the availability on the dates (all dates by default) of a calendar (every calendar by default),
+    for it to be computed again when next read.
+
+    :param dates: Dates in the calendars' business hours' timezones
+    :param resource_id: Primary key of the calendar's resource. None for the default calendar
+    """
+    queryset = DayAvailability.objects.all()
+    if resource_id != ALL_CALENDARS:
+        queryset = queryset.filter(resource_id=resource_id)
+    if dates is not None:
+        queryset = queryset.filter(date__in=set(dates))
+    queryset.delete()
+    return None
+
+
+def get_month_dates(year: int, month: int) -> List[datetime.date]:
+    return [datetime.date(year, month, day) for day in range(1, calendar.monthrange(year, month)[1] + 1)]
+
+
+def get_month_availability(year: int, month: int, resource_id: Optional[Any] = None) -> List[DayAvailability]:
+    """
+    Returns the availability on each date of the month of a calendar (in its business hours' timezone),
+    computing it for the dates it has not been computed for.
+
+    :param resource_id: Primary key of the calendar's resource. None for the default calendar
+    """
+    dates = get_month_dates(year, month)
+    days: Dict[datetime.date, DayAvailability] = {
+        day.date: day for day in DayAvailability.objects.filter(resource_id=resource_id, date__gte=dates[0], date__lte=dates[-1])
+    }
+    missing = [date for date in dates if date not in days]
+    if missing:
+        days.update({day.date: day for day in refresh_day_availability(missing, resource_id)})
+    return [days[date] for date in dates]
+
+
+def get_bookable_calendars() -> List[Optional[Any]]:
+    """
+    Returns the primary keys of the resources sessions can be booked with,
+    or the default calendar's (None) if there are no resources
+    """
+    return list(Resource.objects.active().values_list("pk", flat=True)) or [None]
+
+
+def get_business_periods(start: datetime.datetime, end: datetime.datetime, schedule: BusinessHoursSchedule) -> List[Period]:
+    """Returns the periods within business hours between the datetimes, sorted by start"""
+    periods = []
+    for date in sorted(get_dates_of_span(start, end, schedule.timezone)):
+        for opens_at, closes_at in schedule.periods_on(date):
+            if opens_at < end and closes_at > start:
+                periods.append((max(opens_at, start), min(closes_at, end)))
+    return periods
+
+
+def get_free_periods(
+    start: datetime.datetime,
+    end: datetime.datetime,
+    resource_id: Optional[Any] = None,
+    exclude_sessions: Sequence[Any] = ()
+) -> List[Period]:
+    """
+    Returns the periods within business hours between the datetimes that are free on a calendar, sorted by start.
+
+    :param resource_id: Primary key of the calendar's resource. None for the default calendar
+    :param exclude_sessions: Primary keys of sessions that are not considered booked
+    """
+    business_periods = get_business_periods(start, end, get_business_hours_schedule(resource_id))
+    if not business_periods:
+        return []
+    busy_periods = get_busy_periods(business_periods[0][0], business_periods[-1][1], resource_id, exclude_sessions)
+    free_periods = []
+    for opens_at, closes_at in business_periods:
+        free_periods.extend(subtract_periods(opens_at, closes_at, busy_periods))
+    return free_periods
+
+
+def get_free_periods_of_any_resource(
+    start: datetime.datetime,
+    end: datetime.datetime,
+    resource_ids: Optional[Iterable[Optional[Any]]] = None
+) -> List[Period]:
+    """
+    Returns the periods between the datetimes in which any of the resources is free, sorted by start.
+
+    :param resource_ids: Primary keys of the resources. Defaults to the bookable calendars (`get_bookable_calendars`)
+    """
+    resource_ids = get_bookable_calendars() if resource_ids is None else resource_ids
+    return merge_periods(*(get_free_periods(start, end, resource_id) for resource_id in resource_ids))
+
+
+def find_available_resource(
+    start: datetime.datetime,
+    end: datetime.datetime,
+    resource_ids: Optional[Iterable[Optional[Any]]] = None,
+    exclude_sessions: Sequence[Any] = ()
+) -> Optional[Resource]:
+    """
+    Returns the first of the resources (by name) that is free for the whole time period, or None if none is.
+
+    :param resource_ids: Primary keys of the resources. Defaults to the active resources
+    :param exclude_sessions: Primary keys of sessions that are not considered booked
+    """
+    resources = Resource.objects.active() if resource_ids is None else Resource.objects.filter(pk__in=resource_ids)
+    for resource in resources.order_by("name"):
+        # Free periods are clipped to the time period, so it is free if it is a single free period
+        if get_free_periods(start, end, resource.pk, exclude_sessions) == [(start, end)]:
+            return resource
+    return None
+
+
+def get_month_availability_of_any_resource(
+    year: int, month: int, resource_ids: Optional[Iterable[Optional[Any]]] = None
+) -> List[DayAvailability]:
+    """
+    Returns the (unsaved) availability on each date of the month (in the site's business hours' timezone)
+    of any of the resources: the time in which at least one of them is free.
+
+    Computed from the merged business hours and free periods of the resources' calendars, with one query per model
+    per resource.
+
+    :param resource_ids: Primary keys of the resources. Defaults to the bookable calendars (`get_bookable_calendars`)
+    """
+    resource_ids = get_bookable_calendars() if resource_ids is None else list(resource_ids)
+    tz = get_business_hours_schedule().timezone
+    dates = get_month_dates(year, month)
+    # The day boundaries in the site's timezone, as (UTC) datetimes
+    boundaries = [
+        datetime.datetime.combine(date, datetime.time.min, tzinfo=tz).astimezone(datetime.timezone.utc)
+        for date in [*dates, dates[-1] + datetime.timedelta(days=1)]
+    ]
+    month_start, month_end = boundaries[0], boundaries[-1]
+    business_periods = merge_periods(*(
+        get_business_periods(month_start, month_end, get_business_hours_schedule(resource_id))
+        for resource_id in resource_ids
+    ))
+    free_periods = get_free_periods_of_any_resource(month_start, month_end, resource_ids)
+
+    def clip(periods: List[Period], start: datetime.datetime, end: datetime.datetime) -> List[Period]:
+        return [(max(s, start), min(e, end)) for s, e in periods if s < end and e > start]
+    return [
+        summarize_day(date, clip(business_periods, day_start, day_end), clip(free_periods, day_start, day_end))
+        for date, day_start, day_end in zip(dates, boundaries, boundaries[1:])
+    ]
+
+
+def get_dates_of_span(start: datetime.datetime, end: datetime.datetime, tz: datetime.tzinfo) -> Set[datetime.date]:
+    """Returns the dates (in the timezone) the period is on"""
+    first = start.astimezone(tz).date()
+    last = max(end, start).astimezone(tz).date()
+    return {first + datetime.timedelta(days=offset) for offset in range((last - first).days + 1)}
+
+
+def get_dates_of_span_in_any_timezone(start: datetime.datetime, end: datetime.datetime) -> Set[datetime.date]:
+    """Returns the dates the period is on in any timezone (its UTC dates, and the dates either side)"""
+    utc = datetime.timezone.utc
+    first = start.astimezone(utc).date() - datetime.timedelta(days=1)
+    last = max(end, start).astimezone(utc).date() + datetime.timedelta(days=1)
+    return {first + datetime.timedelta(days=offset) for offset in range((last - first).days + 1)}
+
+
+def get_availability_span(instance: models.Model) -> Optional[AvailabilitySpan]:
+    """Returns what the session or unavailable period contributes to the availability of its calendar"""
+    if instance.start is None or instance.end is None:
+        return None
+    return AvailabilitySpan(instance.start, instance.end, not getattr(instance, "cancelled", False), instance.resource_id)
+
+
+def get_span_refresh(model: type[models.Model], span: AvailabilitySpan) -> Tuple[Optional[Any], Set[datetime.date]]:
+    """
+    Returns the calendar (its resource's primary key, or `ALL_CALENDARS`) and dates whose availability
+    the session or unavailable period affects
+    """
+    if model is UnavailablePeriod and span.resource_id is None:
+        # Blocks every calendar, each in its own timezone
+        return ALL_CALENDARS, get_dates_of_span_in_any_timezone(span.start, span.end)
+    try:
+        schedule = get_business_hours_schedule(span.resource_id)
+    except Resource.DoesNotExist:
+        return span.resource_id, set()
+    return span.resource_id, get_dates_of_span(span.start, span.end, schedule.timezone)
+
+
+def apply_span_refreshes(refreshes: Iterable[Tuple[Optional[Any], Optional[datetime.date]]]) -> None:
+    """
+    Recomputes the availability on the dates of each calendar, or deletes it on the dates of every calendar,
+    with one refresh per calendar and month.
+
+    :param refreshes: (calendar, date) pairs, where the calendar is a resource's primary key, None for the
+    default calendar, or `ALL_CALENDARS`. A date of None deletes the availability on all dates of every calendar.
+    """
+    invalidated_dates = set()
+    month_dates: Dict[Tuple[Optional[Any], int, int], Set[datetime.date]] = {}
+    for resource_id, date in refreshes:
+        if date is None:
+            invalidate_day_availability()
+            return None
+        if resource_id == ALL_CALENDARS:
+            invalidated_dates.add(date)
+        else:
+            month_dates.setdefault((resource_id, date.year, date.month), set()).add(date)
+    if invalidated_dates:
+        invalidate_day_availability(invalidated_dates)
+    for (resource_id, _, _), dates in month_dates.items():
+        refresh_day_availability(dates, resource_id)
+    return None
+
+
+def add_span_refreshes(refreshes: Iterable[Tuple[Optional[Any], Optional[Set[datetime.date]]]], using: Optional[str] = None) -> None:
+    """
+    Adds the refreshes of calendars' dates to those applied once the transaction is committed,
+    so that the dates changed together (e.g. by deleting a user's sessions) are refreshed together
+    """
+    add_to_commit_batch(apply_span_refreshes, [
+        (resource_id, date)
+        for resource_id, dates in refreshes
+        for date in (dates if dates is not None else [None])
+    ], using=using)
+    return None
+
+
+def remember_availability_span(sender: type[models.Model], instance: models.Model, **kwargs: Any) -> None:
+    """Stores the span of the loaded session or unavailable period, to tell which dates its change affects"""
+    if not instance.get_deferred_fields():
+        setattr(instance, AVAILABILITY_SPAN_ATTR, get_availability_span(instance))
+    return None
+
+
+def refresh_availability_on_save(sender: type[models.Model], instance: models.Model, created: bool, **kwargs: Any) -> None:
+    """Recomputes the availability on the dates the saved session or unavailable period was and is on, once committed"""
+    update_fields = kwargs.get("update_fields", None)
+    if update_fields is not None and not {"start", "end", "cancelled", "resource"} & set(update_fields):
+        # The span was not saved, so did not change
+        return None
+    old = None if created else getattr(instance, AVAILABILITY_SPAN_ATTR, None)
+    new = get_availability_span(instance)
+    setattr(instance, AVAILABILITY_SPAN_ATTR, new)
+    if old == new or (old is not None and not old.blocks and new is not None and not new.blocks):
+        # The span did not change, or it never blocked time
+        return None
+    if not created and old is None:
+        # The span before the change is unknown, so the dates it was on cannot be recomputed
+        refreshes = [(ALL_CALENDARS, None)]
+    else:
+        refreshes = [get_span_refresh(sender, span) for span in (old, new) if span is not None]
+    add_span_refreshes(refreshes, using=kwargs.get("using", None))
+    return None
+
+
+def refresh_availability_on_delete(sender: type[models.Model], instance: models.Model, **kwargs: Any) -> None:
+    """Recomputes the availability on the dates the deleted session or unavailable period was on, once committed"""
+    span = getattr(instance, AVAILABILITY_SPAN_ATTR, None) or get_availability_span(instance)
+    if span is None or not span.blocks:
+        return None
+    refreshes = [get_span_refresh(sender, span)]
+    add_span_refreshes(refreshes, using=kwargs.get("using", None))
+    return None
+
+
+def invalidate_availability_on_business_hours_change(sender: type[models.Model], **kwargs: Any) -> None:
+    """
+    Deletes the availability on all dates of every calendar when the business hours change
+    (resources default to them), once committed
+    """
+    transaction.on_commit(invalidate_day_availability, using=kwargs.get("using", None))
+    return None
+
+
+def invalidate_availability_on_resource_save(sender: type[Resource], instance: Resource, **kwargs: Any) -> None:
+    """Deletes the availability on all dates of the resource's calendar, as its business hours may have changed, once committed"""
+    transaction.on_commit(lambda: invalidate_day_availability(resource_id=instance.pk), using=kwargs.get("using", None))
+    return None
+
+
+def connect_day_availability_signals() -> None:
+    """Connects the signals that keep the availability on each date up to date"""
+    for model in (Session, UnavailablePeriod):
+        label = model._meta.label_lower
+        models.signals.post_init.connect(remember_availability_span, sender=model, dispatch_uid=f"booking.availability.remember.{label}")
+        models.signals.post_save.connect(refresh_availability_on_save, sender=model, dispatch_uid=f"booking.availability.save.{label}")
+        models.signals.post_delete.connect(refresh_availability_on_delete, sender=model, dispatch_uid=f"booking.availability.delete.{label}")
+    for model in (BusinessHoursSettings, BusinessHoursInterval, BusinessHoursException):
+        label = model._meta.label_lower
+        models.signals.post_save.connect(
+            invalidate_availability_on_business_hours_change, sender=model,
+            dispatch_uid=f"booking.availability.business_hours.save.{label}"
+        )
+        models.signals.post_delete.connect(
+            invalidate_availability_on_business_hours_change, sender=model,
+            dispatch_uid=f"booking.availability.business_hours.delete.{label}"
+        )
+    # Deleting a resource deletes its availability with it
+    models.signals.post_save.connect(
+        invalidate_availability_on_resource_save, sender=Resource, dispatch_uid="booking.availability.resource.save"
+    )
+    return None
@@ -0,0 +1,228 @@
+"""
+Streaming exports of sessions, as CSV (for admins) and as an iCalendar (`.ics`) feed (for users).
+
+Sessions are read with `.iterator(chunk_size=...)` as `values()` rows and written out a chunk at a time,
+so exports use constant memory however many sessions there are. Datetimes are converted to the export's
+timezone once per chunk, with the timezone resolved once for the whole export.
+"""
+import csv
+import datetime
+import itertools
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from django.conf import settings
+from django.core import signing
+from django.db import models
+from django.utils.crypto import salted_hmac
+
+from .models import Session
+from users.models import UserAccount
+
+
+DEFAULT_EXPORT_CHUNK_SIZE = 2000
+
+CSV_EXPORT_FIELDS = (
+    "id", "title", "start", "end", "booked_by__name", "booked_by__email", "link__identifier", "link__url",
+    "has_held", "cancelled", "created_at", "rescheduled_at", "updated_at",
+)
+CSV_EXPORT_HEADER = (
+    "ID", "Title", "Starts", "Ends", "Booked by", "Email", "Link", "Link URL",
+    "Held", "Cancelled", "Booked at", "Rescheduled at", "Updated at",
+)
+CSV_DATETIME_FIELDS = ("start", "end", "created_at", "rescheduled_at", "updated_at")
+
+ICS_EXPORT_FIELDS = ("id", "title", "start", "end", "has_held", "cancelled", "link__identifier", "updated_at")
+ICS_DATETIME_FIELDS = ("start", "end", "updated_at")
+ICS_DATETIME_FORMAT = "%Y%m%dT%H%M%SZ"
+ICS_LINE_LENGTH = 75
+
+CALENDAR_FEED_TOKEN_SALT = "booking.calendar_feed"
+
+
+def get_export_chunk_size() -> int:
+    return getattr(settings, "SESSION_EXPORT_CHUNK_SIZE", DEFAULT_EXPORT_CHUNK_SIZE)
+
+
+def iter_chunks(queryset: models.QuerySet, fields: Iterable[str], chunk_size: Optional[int] = None) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Yields the queryset's rows, as `values()` dicts of the given fields, in lists of `chunk_size` rows.
+
+    Rows are fetched with `.iterator(chunk_size=...)`, so that only one chunk is held in memory at a time.
+    """
+    chunk_size = chunk_size or get_export_chunk_size()
+    rows = queryset.values(*fields).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def localize_chunk(chunk: List[Dict[str, Any]], fields: Iterable[str], tz: datetime.tzinfo) -> List[Dict[str, Any]]:
+    """Converts the given datetime fields of each row in the chunk to the timezone, in place"""
+    for row in chunk:
+        for field in fields:
+            value = row[field]
+            if value is not None:
+                row[field] = value.astimezone(tz)
+    return chunk
+
+
+class _Echo:
+    """File-like object whose `write` returns the value written, for `csv.writer` to write lines to"""
+    def write(self, value: str) -> str:
+        return value
+
+
+def stream_sessions_csv(queryset: models.QuerySet, tz: datetime.tzinfo, chunk_size: Optional[int] = None) -> Iterator[str]:
+    """
+    Yields the queryset's sessions as CSV, a chunk of rows at a time, with datetimes in the given timezone.
+
+    :param queryset: The sessions to export.
+    :param tz: Timezone to write datetimes in.
+    :param chunk_size: Number of sessions to fetch and write at a time. Defaults to the `SESSION_EXPORT_CHUNK_SIZE` setting.
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_EXPORT_HEADER)
+    for chunk in iter_chunks(queryset, CSV_EXPORT_FIELDS, chunk_size):
+        localize_chunk(chunk, CSV_DATETIME_FIELDS, tz)
+        yield "".join(
+            writer.writerow([
+                "" if row[field] is None else (row[field].isoformat() if field in CSV_DATETIME_FIELDS else row[field])
+                for field in CSV_EXPORT_FIELDS
+            ])
+            for row in chunk
+        )
+    return None
+
+
+def escape_ics_text(value: str) -> str:
+    """Escapes the value for use as an iCalendar TEXT property value"""
+    return (
+        value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+        .replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+
+def fold_ics_line(line: str) -> str:
+    """Folds the content line into lines of at most 75 octets, as iCalendar requires"""
+    if len(line.encode()) <= ICS_LINE_LENGTH:
+        return line
+    parts = []
+    current, current_length = [], 0
+    for char in line:
+        char_length = len(char.encode())
+        # Continuation lines start with a space, which counts towards their length
+        limit = ICS_LINE_LENGTH if not parts else ICS_LINE_LENGTH - 1
+        if current_length + char_length > limit:
+            parts.append("".join(current))
+            current, current_length = [], 0
+        current.append(char)
+        current_length += char_length
+    parts.append("".join(current))
+    return "\r\n ".join(parts)
+
+
+def build_ics_event(row: Dict[str, Any], uid_domain: str, link_url: Optional[Callable[[str], str]] = None) -> str:
+    """
+    Returns the VEVENT of the session row, with datetimes in UTC.
+
+    :param row: The session's `values()` row, with the `ICS_EXPORT_FIELDS`.
+    :param uid_domain: Domain to qualify the event's UID with.
+    :param link_url: Function that returns the URL of a session link, given its identifier.
+    """
+    if row["cancelled"]:
+        status = "CANCELLED"
+    elif row["link__identifier"] or row["has_held"]:
+        status = "CONFIRMED"
+    else:
+        # Sessions are tentative until they are approved with a link
+        status = "TENTATIVE"
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{row['id']}@{uid_domain}",
+        f"DTSTAMP:{row['updated_at'].strftime(ICS_DATETIME_FORMAT)}",
+        f"LAST-MODIFIED:{row['updated_at'].strftime(ICS_DATETIME_FORMAT)}",
+        f"DTSTART:{row['start'].strftime(ICS_DATETIME_FORMAT)}",
+        f"DTEND:{row['end'].strftime(ICS_DATETIME_FORMAT)}",
+        fold_ics_line(f"SUMMARY:{escape_ics_text(row['title'])}"),
+        f"STATUS:{status}",
+    ]
+    if row["link__identifier"] and link_url is not None:
+        lines.append(fold_ics_line(f"URL:{link_url(row['link__identifier'])}"))
+    lines.append("END:VEVENT")
+    return "\r\n".join(lines) + "\r\n"
+
+
+def stream_sessions_ics(
+    queryset: models.QuerySet,
+    calendar_name: str,
+    uid_domain: str,
+    link_url: Optional[Callable[[str], str]] = None,
+    chunk_size: Optional[int] = None
+) -> Iterator[str]:
+    """
+    Yields the queryset's sessions as an iCalendar, a chunk of events at a time.
+
+    :param queryset: The sessions to export.
+    :param calendar_name: Display name of the calendar.
+    :param uid_domain: Domain to qualify event UIDs with.
+    :param link_url: Function that returns the URL of a session link, given its identifier.
+    :param chunk_size: Number of sessions to fetch and write at a time. Defaults to the `SESSION_EXPORT_CHUNK_SIZE` setting.
+    """
+    yield "\r\n".join([
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:-//{escape_ics_text(settings.SITE_NAME)}//Sessions//EN",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        fold_ics_line(f"X-WR-CALNAME:{escape_ics_text(calendar_name)}"),
+    ]) + "\r\n"
+    for chunk in iter_chunks(queryset, ICS_EXPORT_FIELDS, chunk_size):
+        localize_chunk(chunk, ICS_DATETIME_FIELDS, datetime.timezone.utc)
+        yield "".join(build_ics_event(row, uid_domain, link_url) for row in chunk)
+    yield "END:VCALENDAR\r\n"
+    return None
+
+
+def get_calendar_feed_nonce(user: UserAccount) -> str:
+    """Returns a value that changes whenever the user's password changes, revoking their feed URL"""
+    return salted_hmac(
+        CALENDAR_FEED_TOKEN_SALT,
+        f"{user.pk}{user.password}",
+        algorithm="sha256"
+    ).hexdigest()[:16]
+
+
+def create_calendar_feed_token(user: UserAccount) -> str:
+    """
+    Create a signed token identifying the user's calendar feed.
+
+    Calendar clients cannot log in, so the feed URL carries the token instead.
+    """
+    payload = {"u": user.pk.hex, "n": get_calendar_feed_nonce(user)}
+    return signing.dumps(payload, salt=CALENDAR_FEED_TOKEN_SALT)
+
+
+def get_calendar_feed_owner(token: str) -> Optional[UserAccount]:
+    """Returns the user whose calendar feed the token identifies, or None if the token is invalid or revoked"""
+    try:
+        payload = signing.loads(token, salt=CALENDAR_FEED_TOKEN_SALT)
+        user = UserAccount.objects.get(pk=payload["u"], is_active=True)
+    except (signing.BadSignature, KeyError, TypeError, ValueError, UserAccount.DoesNotExist):
+        return None
+    if payload.get("n") != get_calendar_feed_nonce(user):
+        return None
+    return user
+
+
+def get_calendar_feed_version(user: UserAccount, since: Optional[datetime.datetime] = None) -> Dict[str, Any]:
+    """
+    Returns the number of sessions in the user's feed and when they were last updated, in a single query.
+
+    Together they change whenever a session in the feed is booked, updated or deleted.
+    """
+    sessions = Session.objects.filter(booked_by=user)
+    if since is not None:
+        sessions = sessions.filter(updated_at__gte=since)
+    return sessions.aggregate(count=models.Count("id"), last_updated=models.Max("updated_at"))
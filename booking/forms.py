@@ -1,5 +1,6 @@
-from typing import Any, Dict
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from django import forms
+from django.db import transaction
 from timezone_field.forms import TimeZoneFormField
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
@@ -11,12 +12,32 @@ from . import models
 from links.models import Link
 from links.forms import LinkForm
 from .utils import check_if_time_period_is_available, check_if_time_period_is_within_business_hours
+from .availability import find_available_resource
+from helpers.instrumentation import record_validation_stage
 
 UserModel = get_user_model()
 
+# Value of the resource field that books the session with any resource that is available
+ANY_RESOURCE = "any"
+
+
+class ResourceChoiceField(forms.ModelChoiceField):
+    """Choice of resource, that also accepts `ANY_RESOURCE` (returned as is)"""
+    def to_python(self, value: Any) -> Any:
+        if value == ANY_RESOURCE:
+            return ANY_RESOURCE
+        return super().to_python(value)
+
 
 class BaseBookingModelForm(forms.ModelForm):
-    """Base model form for models in booking app"""
+    """
+    Base model form for models in booking app.
+
+    `clean` runs the validation stages (see `get_validation_stages`) in order, from the cheapest to the most
+    expensive, and stops at the first stage that finds an error, so that the business hours and availability
+    are only checked for time periods that are otherwise valid. Stages must not write to the database,
+    and are each timed with `record_validation_stage`.
+    """
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         request_user = get_request_user()
@@ -33,10 +54,48 @@ class BaseBookingModelForm(forms.ModelForm):
                 self.initial["end_time"] = self.instance.end_user_tz.strftime("%H:%M")
             except (AttributeError, TypeError):
                 pass
+        # Whether the session is to be booked with any resource that is available
+        self.any_resource = False
+
+
+    def get_validation_stages(self) -> List[Tuple[str, Callable[[], None]]]:
+        """
+        Returns the validation stages run by `clean`, in order, as (name, validator) pairs:
+
+        - "fields": checks of the cleaned fields, in memory.
+        - "business_hours": checks against the calendar's business hours schedule, which is cached.
+        - "availability": checks against the calendars' sessions and unavailable periods, in the database.
+        """
+        return [
+            ("fields", self.validate_fields),
+            ("business_hours", self.validate_business_hours),
+            ("availability", self.validate_availability),
+        ]
 
 
     def clean(self) -> Dict[str, Any]:
         cleaned_data = super().clean()
+        if cleaned_data.get("resource", None) == ANY_RESOURCE:
+            # Resolved to a resource by the availability stage. Not a resource until then,
+            # so must not be left in the cleaned data, even if the form is invalid
+            self.any_resource = True
+            cleaned_data["resource"] = None
+
+        form_name = type(self).__name__
+        for stage, validate in self.get_validation_stages():
+            if self._errors:
+                break
+            with record_validation_stage(form_name, stage):
+                try:
+                    validate()
+                except forms.ValidationError as error:
+                    self.add_error(None, error)
+        return cleaned_data
+
+
+    def validate_fields(self) -> None:
+        """Checks the time period and resource chosen, and adds the start and end datetimes to the cleaned data"""
+        cleaned_data = self.cleaned_data
         start_time = cleaned_data.get("start_time", None)
         end_time = cleaned_data.get("end_time", None)
         date = cleaned_data.get("date", None)
@@ -50,36 +109,76 @@ class BaseBookingModelForm(forms.ModelForm):
             start = datetime.datetime.combine(date=date, time=start_time, tzinfo=tz)
             end = datetime.datetime.combine(date=date, time=end_time, tzinfo=tz)
             # If the object is just being created, check if the start time is in the past
-            # If so, raise an error
-            if not self.instance.pk:
+            # If so, raise an error. Primary keys are set on creation, so they do not tell
+            if self.instance._state.adding:
                 now = timezone.now().astimezone(tz)
                 if start < now:
                     self.add_error("date", "Start time cannot be in the past")
+            # Update the cleaned data with the start and end datetime objects
+            cleaned_data["start"] = start
+            cleaned_data["end"] = end
 
-            # Check if the period booked is available, that is, the period
-            # is not already booked by another session or set as unavailable
-            # Exclude the current session if it is being updated
-            if isinstance(self.instance, models.Session) and self.instance.pk:
-                excluded_sessions = (self.instance,)
-            else:
-                excluded_sessions = None
+        resource = cleaned_data.get("resource", None)
+        if resource and not resource.is_active and "resource" in self.changed_data:
+            self.add_error("resource", "Sessions cannot be booked with this resource")
+        return None
 
-            # Check if the time period chosen is within business hours
-            time_period_is_within_business_hours = check_if_time_period_is_within_business_hours(start, end)
-            if time_period_is_within_business_hours is False:
-                raise forms.ValidationError(
-                    "The time period chosen is not within the business hours. Please choose another time period."
-                )
-            # Check if the time period chosen is available
-            time_period_is_available = check_if_time_period_is_available(start, end, excluded_sessions)
-            if time_period_is_available is False:
+
+    def validate_business_hours(self) -> None:
+        """Checks that the time period chosen is within the business hours of the resource's calendar"""
+        start = self.cleaned_data.get("start", None)
+        end = self.cleaned_data.get("end", None)
+        # Resources chosen by the availability stage are free within their business hours
+        if start is None or end is None or self.any_resource:
+            return None
+        resource = self.cleaned_data.get("resource", None)
+        if not check_if_time_period_is_within_business_hours(start, end, resource.pk if resource else None):
+            raise forms.ValidationError(
+                "The time period chosen is not within the business hours. Please choose another time period."
+            )
+        return None
+
+
+    def validate_availability(self) -> None:
+        """
+        Checks that the time period chosen is not already booked by another session or set as unavailable,
+        or chooses the first resource that is available if any resource will do
+        """
+        start = self.cleaned_data.get("start", None)
+        end = self.cleaned_data.get("end", None)
+        if start is None or end is None:
+            return None
+        # Exclude the current session if it is being updated
+        if isinstance(self.instance, models.Session) and self.instance.pk:
+            excluded_sessions = (self.instance,)
+        else:
+            excluded_sessions = None
+
+        if self.any_resource:
+            # Book with the first resource that is available, within its business hours
+            resource = find_available_resource(start, end, exclude_sessions=[session.pk for session in excluded_sessions or ()])
+            if resource is None:
                 raise forms.ValidationError(
-                    "The time period chosen is not available. Please choose another time period."
+                    "No resource is available in the time period chosen. Please choose another time period."
                 )
-            # Update the cleaned data with the start and end datetime objects
-            cleaned_data["start"] = start
-            cleaned_data["end"] = end
-        return cleaned_data
+            self.cleaned_data["resource"] = resource
+            return None
+
+        resource = self.cleaned_data.get("resource", None)
+        if isinstance(self.instance, models.UnavailablePeriod) and resource is None:
+            # Unavailable periods with no resource block every calendar
+            calendars = [None, *models.Resource.objects.values_list("pk", flat=True)]
+        else:
+            calendars = [resource.pk if resource else None]
+        time_period_is_available = all(
+            check_if_time_period_is_available(start, end, excluded_sessions, calendar)
+            for calendar in calendars
+        )
+        if time_period_is_available is False:
+            raise forms.ValidationError(
+                "The time period chosen is not available. Please choose another time period."
+            )
+        return None
     
 
     def save(self, commit: bool = True):
@@ -102,7 +201,7 @@ class SessionForm(BaseBookingModelForm):
         model = models.Session
         fields = [
             "title", "date", "start_time", 
-            "end_time", "timezone", "booked_by", 
+            "end_time", "timezone", "resource", "booked_by", 
             "link", "has_held", "cancelled",
             "rescheduled_at"
         ]
@@ -147,6 +246,13 @@ class SessionForm(BaseBookingModelForm):
         required=True, label=_("Timezone"),
         help_text=_("Your timezone"), disabled=True
     )
+    resource = ResourceChoiceField(
+        queryset=models.Resource.objects.all(), required=False, label=_("Resource"),
+        help_text=_(
+            "The host or room to book the session with. Leave empty for the default calendar, "
+            "or use \"any\" to book with any resource that is available."
+        )
+    )
     link = forms.CharField(
         required=False, label=_("Meeting Link"),
         help_text=_("The link the user will use to join the session meeting"),
@@ -164,35 +270,46 @@ class SessionForm(BaseBookingModelForm):
                 pass
 
 
-    def clean(self) -> None:
-        cleaned_data = super().clean()
-        link = cleaned_data["link"]
+    def clean_link(self) -> Optional[Link]:
+        """
+        Returns the session's link with the URL entered, or None if no URL was entered.
+
+        A new or changed link is not saved until the session is (see `save_link`).
+        """
+        url = self.cleaned_data["link"]
+        if not url:
+            return None
+        link = self.instance.link if self.instance.link_id else None
+        link_form = LinkForm(instance=link, data={"url": url})
+        if not link_form.is_valid():
+            raise forms.ValidationError("Invalid URL")
+        if link is not None and not link_form.has_changed():
+            return link
+        return link_form.save(commit=False)
+
+
+    def _get_validation_exclusions(self):
+        exclude = super()._get_validation_exclusions()
+        # The link is checked by `clean_link`, and new links cannot be looked up before they are saved
+        exclude.add("link")
+        return exclude
+
+
+    def get_validation_stages(self) -> List[Tuple[str, Callable[[], None]]]:
+        stages = super().get_validation_stages()
+        # The session checks are in memory, so run before the business hours and availability are checked
+        stages.insert(1, ("session", self.validate_session))
+        return stages
+
+
+    def validate_session(self) -> None:
+        """Checks the changes to the session's state (held or cancelled) that the request user can make"""
+        cleaned_data = self.cleaned_data
+        link = cleaned_data.get("link", None)
         has_held = cleaned_data.get("has_held", False)
         cancelled = cleaned_data.get("cancelled", False)
         tz = cleaned_data.get("timezone")
         request_user = get_request_user()
-         
-        if link:
-            if self.instance.link:
-                # If instance already has a link attached,
-                # update the link if any change has occurred
-                link_form = LinkForm(instance=self.instance.link, data={"url": link})
-                if link_form.has_changed():
-                    cleaned_data["link"] = link_form.save()
-                else:
-                    # Set the link to the instance's link
-                    cleaned_data["link"] = self.instance.link
-            else:
-                # Else, create a new Link object and attach it to the instance
-                link_form = LinkForm(data={"url": link})
-                if link_form.is_valid():
-                    cleaned_data["link"] = link_form.save()
-                else:
-                    self.add_error("link", "Invalid URL")
-        else:
-            # If the link is not set, set it to None
-            cleaned_data["link"] = None
-
 
         if request_user.is_admin:
             if has_held is True and not link:
@@ -224,13 +341,36 @@ class SessionForm(BaseBookingModelForm):
 
         # Check if the session has been marked as held before it ends
         # If so, raise an error
-        # Session edn datetime is already in the user's timezone from the parent `clean` method
+        # Session end datetime is already in the user's timezone from the fields stage
         session_end_in_tz = cleaned_data.get("end", None)
         if session_end_in_tz:
             time_now_in_tz = timezone.now().astimezone(tz)
             if has_held is True and time_now_in_tz < session_end_in_tz:
                 self.add_error("has_held", "You cannot mark a session as held before it ends.")
-        return cleaned_data
+        return None
+
+
+    def save_link(self) -> Optional[Link]:
+        """
+        Saves the session's link if it was added or changed.
+
+        Called by `save`. When the form is saved with `commit=False`, call it before saving the session.
+        """
+        link = self.cleaned_data.get("link", None)
+        if link is not None and (link._state.adding or "link" in self.changed_data):
+            link.save()
+        return link
+
+
+    def save(self, commit: bool = True) -> models.Session:
+        """Saves the session, and its link before it if the link was added or changed"""
+        instance = super().save(commit=False)
+        if commit:
+            with transaction.atomic():
+                self.save_link()
+                instance.save()
+                self._save_m2m()
+        return instance
 
 
 
@@ -240,7 +380,7 @@ class UnavailablePeriodAdminForm(BaseBookingModelForm):
         model = models.UnavailablePeriod
         fields = [
             "date", "start_time", 
-            "end_time", "timezone"
+            "end_time", "timezone", "resource"
         ]
 
     date = forms.DateField(
@@ -276,3 +416,36 @@ class UnavailablePeriodAdminForm(BaseBookingModelForm):
     )
 
     
+
+
+
+class BookingImportForm(forms.Form):
+    """Form for importing sessions and unavailable periods from a file in the admin panel"""
+    file = forms.FileField(
+        label=_("File"),
+        help_text=_(
+            "A CSV file with a header (type, title, start, end, booked_by, link, has_held, cancelled), "
+            "or an iCalendar (.ics) file."
+        )
+    )
+    type = forms.ChoiceField(
+        label=_("Import as"), choices=[("session", _("Sessions")), ("unavailable", _("Unavailable periods"))],
+        help_text=_("What to import rows (or events) with no type as")
+    )
+    timezone = TimeZoneFormField(
+        label=_("Timezone"), required=True,
+        help_text=_("Timezone of datetimes with no offset in the file.")
+    )
+    batch_size = forms.IntegerField(
+        label=_("Batch size"), min_value=1, required=False,
+        help_text=_("Number of rows to insert per transaction. Defaults to the BOOKING_IMPORT_BATCH_SIZE setting.")
+    )
+    allow_past = forms.BooleanField(label=_("Import periods that start in the past"), required=False)
+    ignore_business_hours = forms.BooleanField(label=_("Import periods outside the business hours"), required=False)
+    dry_run = forms.BooleanField(label=_("Validate only (dry run)"), required=False)
+
+    def clean_file(self):
+        file = self.cleaned_data["file"]
+        if not file.name.lower().endswith((".csv", ".ics")):
+            raise forms.ValidationError("Upload a .csv or .ics file.")
+        return file
@@ -0,0 +1,448 @@
+"""
+Bulk import of sessions and unavailable periods from CSV or iCalendar (`.ics`) files.
+
+Rows are read from the file as a stream and validated against an in-memory `IntervalIndex` of booked
+and unavailable periods, built once per import, instead of running the availability and business hours
+queries of `SessionForm` for each row. Each accepted row is added to the index, so rows that conflict
+with earlier rows of the same file are rejected too. Accepted rows are inserted with `bulk_create`,
+one transaction per batch, and indexed for the admin search with `core.search.index_objects`.
+"""
+import bisect
+import csv
+import datetime
+import time
+import zoneinfo
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Session, UnavailablePeriod
+from .utils import MAX_BOOKING_DURATION, calendar_sessions_q, calendar_unavailable_periods_q, get_business_hours_schedule
+from .summaries import invalidate_session_summaries
+from .session_links import get_link_lifecycle
+from .availability import get_dates_of_span_in_any_timezone, invalidate_day_availability
+from core.search import index_objects
+from links.models import Link
+from users.models import UserAccount
+
+
+SESSION = "session"
+UNAVAILABLE_PERIOD = "unavailable"
+ROW_TYPES = (SESSION, UNAVAILABLE_PERIOD)
+
+DEFAULT_IMPORT_BATCH_SIZE = 1000
+
+# Alternative CSV column names, such as those of the session CSV export (see `booking.exports`)
+CSV_COLUMN_ALIASES = {
+    "starts": "start",
+    "ends": "end",
+    "email": "booked_by",
+    "held": "has_held",
+    "kind": "type",
+}
+TRUE_VALUES = ("1", "true", "yes", "y")
+
+ICS_DATETIME_FORMATS = ("%Y%m%dT%H%M%SZ", "%Y%m%dT%H%M%S")
+
+
+class ImportRowError(ValueError):
+    """Raised when a row to import is invalid"""
+    pass
+
+
+@dataclass
+class ImportRow:
+    """A session or unavailable period read from an import file"""
+    line: int
+    type: str
+    start: datetime.datetime
+    end: datetime.datetime
+    title: str = ""
+    booked_by: str = ""
+    link: str = ""
+    has_held: bool = False
+    cancelled: bool = False
+
+
+@dataclass
+class ImportResult:
+    """Outcome of an import"""
+    sessions: int = 0
+    unavailable_periods: int = 0
+    rows: int = 0
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def imported(self) -> int:
+        return self.sessions + self.unavailable_periods
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"Imported {self.sessions} session(s) and {self.unavailable_periods} unavailable period(s) "
+            f"from {self.rows} row(s), rejected {len(self.errors)}, "
+            f"in {self.elapsed:.2f}s ({self.rows_per_sec:.0f} rows/sec)"
+        )
+
+
+class IntervalIndex:
+    """
+    In-memory index of time periods, for checking whether a period overlaps any indexed period.
+
+    Periods are bucketed by the (UTC) dates they span, and kept sorted by start within each bucket,
+    so that a lookup only scans the periods on the dates the looked up period spans.
+    """
+    def __init__(self) -> None:
+        self._buckets: Dict[datetime.date, List[Tuple[datetime.datetime, datetime.datetime]]] = {}
+
+    @staticmethod
+    def _dates(start: datetime.datetime, end: datetime.datetime) -> Iterator[datetime.date]:
+        date = start.astimezone(datetime.timezone.utc).date()
+        last = (end.astimezone(datetime.timezone.utc) - datetime.timedelta(microseconds=1)).date()
+        while date <= last:
+            yield date
+            date += datetime.timedelta(days=1)
+
+    def add(self, start: datetime.datetime, end: datetime.datetime) -> None:
+        for date in self._dates(start, end):
+            bisect.insort(self._buckets.setdefault(date, []), (start, end))
+        return None
+
+    def overlaps(self, start: datetime.datetime, end: datetime.datetime) -> bool:
+        """Returns True if the period overlaps (not just touches) any indexed period"""
+        for date in self._dates(start, end):
+            periods = self._buckets.get(date, ())
+            # Only periods that start before the given period ends can overlap it
+            for period_start, period_end in periods[:bisect.bisect_left(periods, (end,))]:
+                if period_end > start:
+                    return True
+        return False
+
+    def __len__(self) -> int:
+        return sum(len(periods) for periods in self._buckets.values())
+
+    @classmethod
+    def from_database(cls, ending_after: Optional[datetime.datetime] = None, chunk_size: int = 5000) -> "IntervalIndex":
+        """
+        Returns an index of the sessions (that are not cancelled) and unavailable periods of the default calendar,
+        which imported rows are booked on.
+
+        :param ending_after: If given, only periods that end after this datetime are indexed.
+        """
+        index = cls()
+        for model, calendar_q in ((Session, calendar_sessions_q()), (UnavailablePeriod, calendar_unavailable_periods_q())):
+            queryset = model.objects.filter(calendar_q).order_by()
+            if model is Session:
+                # Cancelled sessions do not book their time period
+                queryset = queryset.filter(cancelled=False)
+            if ending_after is not None:
+                queryset = queryset.filter(end__gt=ending_after)
+            for start, end in queryset.values_list("start", "end").iterator(chunk_size=chunk_size):
+                index.add(start, end)
+        return index
+
+
+def parse_bool(value: Optional[str]) -> bool:
+    return (value or "").strip().lower() in TRUE_VALUES
+
+
+def parse_import_datetime(value: str, tz: datetime.tzinfo) -> datetime.datetime:
+    """
+    Parses an ISO 8601 datetime, in the given timezone if it has no offset.
+
+    :raises ImportRowError: If the value is not a valid datetime.
+    """
+    try:
+        dt = parse_datetime((value or "").strip())
+    except ValueError:
+        dt = None
+    if dt is None:
+        raise ImportRowError(f"Invalid datetime {value!r}. Use ISO 8601, e.g. 2024-05-01T09:30:00+01:00")
+    if timezone.is_naive(dt):
+        dt = dt.replace(tzinfo=tz)
+    return dt
+
+
+def get_row_reader(format: str):
+    """Returns the function that reads the rows of files of the format ("csv" or "ics")"""
+    return {"csv": read_csv_rows, "ics": read_ics_rows}[format]
+
+
+def read_csv_rows(file: TextIO, default_type: str, tz: datetime.tzinfo) -> Iterator[Any]:
+    """
+    Yields the rows of the CSV file as `ImportRow`s, or as `(line, error)` tuples for invalid rows.
+
+    The file must have a header. Columns are `type` (session or unavailable, defaults to `default_type`),
+    `title`, `start`, `end` (ISO 8601 datetimes), `booked_by` (email), `link` (URL), `has_held` and `cancelled`.
+    The columns of the session CSV export are accepted too, with links read from its `Link URL` column.
+    """
+    reader = csv.reader(file)
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = [CSV_COLUMN_ALIASES.get(name.strip().lower(), name.strip().lower()) for name in header]
+    for values in reader:
+        if not any(values):
+            continue
+        data = dict(zip(columns, values))
+        try:
+            yield ImportRow(
+                line=reader.line_num,
+                type=(data.get("type") or default_type).strip().lower(),
+                start=parse_import_datetime(data.get("start"), tz),
+                end=parse_import_datetime(data.get("end"), tz),
+                title=(data.get("title") or "").strip(),
+                booked_by=(data.get("booked_by") or "").strip().lower(),
+                link=(data.get("link url") or data.get("link") or "").strip(),
+                has_held=parse_bool(data.get("has_held")),
+                cancelled=parse_bool(data.get("cancelled")),
+            )
+        except ImportRowError as exc:
+            yield (reader.line_num, str(exc))
+    return None
+
+
+def _unfold_ics_lines(file: TextIO) -> Iterator[Tuple[int, str]]:
+    """Yields the content lines of the iCalendar file, with folded lines joined, and their line numbers"""
+    current, current_line = None, 0
+    for number, line in enumerate(file, start=1):
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current_line, current
+        current, current_line = line, number
+    if current is not None:
+        yield current_line, current
+    return None
+
+
+def _unescape_ics_text(value: str) -> str:
+    return (
+        value.replace("\\n", "\n").replace("\\N", "\n").replace("\\,", ",")
+        .replace("\\;", ";").replace("\\\\", "\\")
+    )
+
+
+def parse_ics_datetime(value: str, params: Dict[str, str], tz: datetime.tzinfo) -> datetime.datetime:
+    """
+    Parses an iCalendar DATE-TIME, in its TZID's timezone, else in the given timezone if it is floating.
+
+    :raises ImportRowError: If the value is not a valid DATE-TIME (all-day events are not supported).
+    """
+    if "TZID" in params:
+        try:
+            tz = zoneinfo.ZoneInfo(params["TZID"])
+        except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+            raise ImportRowError(f"Unknown timezone {params['TZID']!r}")
+    for fmt in ICS_DATETIME_FORMATS:
+        try:
+            dt = datetime.datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        return dt.replace(tzinfo=datetime.timezone.utc if value.endswith("Z") else tz)
+    raise ImportRowError(f"Invalid or all-day date {value!r}. Events must have a start and end time")
+
+
+def read_ics_rows(file: TextIO, default_type: str, tz: datetime.tzinfo) -> Iterator[Any]:
+    """
+    Yields the events of the iCalendar file as `ImportRow`s, or as `(line, error)` tuples for invalid events.
+
+    SUMMARY is used as the title, the ORGANIZER's email as the booking user, URL as the link,
+    and cancelled events (STATUS:CANCELLED) are imported as cancelled sessions.
+    """
+    event: Optional[Dict[str, Tuple[str, Dict[str, str]]]] = None
+    event_line = 0
+    for number, line in _unfold_ics_lines(file):
+        if line == "BEGIN:VEVENT":
+            event, event_line = {}, number
+            continue
+        if event is None:
+            continue
+        if line == "END:VEVENT":
+            try:
+                if "DTSTART" not in event or "DTEND" not in event:
+                    raise ImportRowError("Events must have a DTSTART and a DTEND")
+                organizer = event.get("ORGANIZER", ("", {}))[0]
+                yield ImportRow(
+                    line=event_line,
+                    type=default_type,
+                    start=parse_ics_datetime(*event["DTSTART"], tz),
+                    end=parse_ics_datetime(*event["DTEND"], tz),
+                    title=_unescape_ics_text(event.get("SUMMARY", ("", {}))[0]).strip(),
+                    booked_by=organizer[7:].lower() if organizer.lower().startswith("mailto:") else "",
+                    link=event.get("URL", ("", {}))[0].strip(),
+                    cancelled=event.get("STATUS", ("", {}))[0].upper() == "CANCELLED",
+                )
+            except ImportRowError as exc:
+                yield (event_line, str(exc))
+            event = None
+            continue
+        name, _, value = line.partition(":")
+        name, *param_parts = name.split(";")
+        params = dict(part.partition("=")[::2] for part in param_parts)
+        event.setdefault(name.upper(), (value, params))
+    return None
+
+
+class BookingImporter:
+    """
+    Validates and bulk inserts sessions and unavailable periods read from an import file.
+
+    Rows are checked in file order against the business hours settings and an `IntervalIndex` of existing
+    sessions and unavailable periods (and of the rows accepted before them), with the rules of `SessionForm`
+    and `UnavailablePeriodAdminForm`. Accepted rows are inserted with `bulk_create`, in a transaction per
+    `batch_size` rows, so a failed batch does not roll back the batches committed before it.
+
+    :param user: The importing user. Creates the links of imported sessions, and books sessions with no `booked_by`.
+    :param batch_size: Number of rows to validate and insert per transaction.
+    :param allow_past: Whether to import periods that start in the past, e.g. when migrating a calendar's history.
+    Past periods are also indexed, so that imported periods are checked against them.
+    :param check_business_hours: Whether to reject periods outside the business hours.
+    :param dry_run: Validate the rows without inserting them.
+    """
+    def __init__(
+        self,
+        user: UserAccount,
+        batch_size: int = DEFAULT_IMPORT_BATCH_SIZE,
+        allow_past: bool = False,
+        check_business_hours: bool = True,
+        dry_run: bool = False
+    ) -> None:
+        self.user = user
+        self.batch_size = batch_size
+        self.allow_past = allow_past
+        self.check_business_hours = check_business_hours
+        self.dry_run = dry_run
+        self.now = timezone.now()
+        self.index = IntervalIndex.from_database(ending_after=None if allow_past else self.now)
+        self.schedule = get_business_hours_schedule() if check_business_hours else None
+        self._users: Dict[str, Optional[UserAccount]] = {user.email.lower(): user}
+        self._validate_url = URLValidator()
+
+    def run(self, rows: Iterable[Any]) -> ImportResult:
+        """
+        Validates and imports the rows, as yielded by `read_csv_rows` or `read_ics_rows`.
+
+        :return: The result of the import, with the errors of rejected rows by line number.
+        """
+        result = ImportResult()
+        start = time.perf_counter()
+        batch: List[ImportRow] = []
+        for row in rows:
+            result.rows += 1
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self._import_batch(batch, result)
+                batch = []
+        if batch:
+            self._import_batch(batch, result)
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    def _prefetch_users(self, batch: List[Any]) -> None:
+        """Fetches the booking users of the batch's rows that have not been fetched yet, in one query"""
+        emails = {
+            row.booked_by for row in batch
+            if isinstance(row, ImportRow) and row.booked_by and row.booked_by not in self._users
+        }
+        if not emails:
+            return None
+        users = {user.email.lower(): user for user in UserAccount.objects.filter(email__in=emails)}
+        for email in emails:
+            self._users[email] = users.get(email)
+        return None
+
+    def validate(self, row: ImportRow) -> None:
+        """
+        Checks the row against the import rules. Does not add it to the index.
+
+        :raises ImportRowError: If the row is invalid.
+        """
+        if row.type not in ROW_TYPES:
+            raise ImportRowError(f"Invalid type {row.type!r}. Use one of {', '.join(ROW_TYPES)}")
+        if row.start >= row.end:
+            raise ImportRowError("Start time must be less than end time")
+        if row.end - row.start >= MAX_BOOKING_DURATION:
+            raise ImportRowError("Periods must last less than a day")
+        if not self.allow_past and row.start < self.now:
+            raise ImportRowError("Start time cannot be in the past")
+        if row.type == SESSION:
+            if not row.title:
+                raise ImportRowError("Sessions must have a title")
+            if len(row.title) > Session._meta.get_field("title").max_length:
+                raise ImportRowError("Session title is too long")
+            if row.booked_by and self._users.get(row.booked_by) is None:
+                raise ImportRowError(f"No user with the email {row.booked_by!r}")
+            if row.link:
+                try:
+                    self._validate_url(row.link)
+                except ValidationError:
+                    raise ImportRowError(f"Invalid link URL {row.link!r}")
+            if row.has_held and not row.link:
+                raise ImportRowError("A session cannot be held when it does not have a link attached")
+            if row.has_held and row.cancelled:
+                raise ImportRowError("A session cannot be both held and cancelled")
+        if self.schedule is not None and not self.schedule.contains(row.start, row.end):
+            raise ImportRowError("The time period is not within the business hours")
+        if self.index.overlaps(row.start, row.end):
+            raise ImportRowError("The time period is not available. It overlaps a session or unavailable period")
+        return None
+
+    def _import_batch(self, batch: List[Any], result: ImportResult) -> None:
+        self._prefetch_users(batch)
+        links: List[Link] = []
+        sessions: List[Session] = []
+        periods: List[UnavailablePeriod] = []
+        for row in batch:
+            if not isinstance(row, ImportRow):
+                result.errors.append(row)
+                continue
+            try:
+                self.validate(row)
+            except ImportRowError as exc:
+                result.errors.append((row.line, str(exc)))
+                continue
+            if row.type == UNAVAILABLE_PERIOD or not row.cancelled:
+                self.index.add(row.start, row.end)
+
+            if row.type == UNAVAILABLE_PERIOD:
+                periods.append(UnavailablePeriod(start=row.start, end=row.end))
+                continue
+            link = None
+            if row.link:
+                # Sessions are bulk created, without the signal that sets their links' lifecycle
+                link = Link(url=row.link, created_by=self.user, **get_link_lifecycle(row.start, row.end, row.cancelled))
+                links.append(link)
+            sessions.append(Session(
+                title=row.title, start=row.start, end=row.end,
+                booked_by=self._users[row.booked_by] if row.booked_by else self.user,
+                link=link, has_held=row.has_held, cancelled=row.cancelled
+            ))
+
+        if not self.dry_run:
+            with transaction.atomic():
+                Link.objects.bulk_create(links)
+                Session.objects.bulk_create(sessions)
+                UnavailablePeriod.objects.bulk_create(periods)
+                # `bulk_create` does not send the signals that index objects for the admin search
+                for objs in (links, sessions, periods):
+                    index_objects(objs)
+                # Nor the signals that update the cached session summaries
+                transaction.on_commit(lambda: invalidate_session_summaries(session.booked_by_id for session in sessions))
+                # Nor those that keep the availability on each date up to date. Unavailable periods block every calendar
+                dates = set().union(*(get_dates_of_span_in_any_timezone(obj.start, obj.end) for obj in [*sessions, *periods]))
+                transaction.on_commit(lambda: invalidate_day_availability(dates))
+        result.sessions += len(sessions)
+        result.unavailable_periods += len(periods)
+        return None
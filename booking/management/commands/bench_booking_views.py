@@ -0,0 +1,93 @@
+import asyncio
+import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import AsyncClient, Client
+from django.urls import reverse
+from django.utils import timezone
+
+from helpers.benchmark import summarize_latencies, format_summary
+from users.models import UserAccount
+
+
+class Command(BaseCommand):
+    help = "Benchmark the sync and async session calendar JSON views against each other under concurrent clients"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=10, help="Number of concurrent clients")
+        parser.add_argument("--requests", type=int, default=200, help="Total number of requests per view")
+        parser.add_argument(
+            "--date", type=str, default=None, 
+            help="Date (YYYY-MM-DD) to request the calendar for. Defaults to today"
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        clients: int = options["clients"]
+        total: int = options["requests"]
+        date: str = options["date"] or timezone.now().strftime("%Y-%m-%d")
+        payload = json.dumps({"date": date})
+
+        user = UserAccount.objects.create_user(
+            email=f"bench-{uuid.uuid4().hex[:8]}@example.com",
+            password=uuid.uuid4().hex, name="Benchmark User",
+            is_verified=True
+        )
+        try:
+            sync_summary = self.bench_sync(user, reverse("booking:calendar"), payload, clients, total)
+            async_summary = self.bench_async(user, reverse("booking:async_calendar"), payload, clients, total)
+        finally:
+            user.delete()
+
+        self.stdout.write(format_summary("sync ", sync_summary))
+        self.stdout.write(format_summary("async", async_summary))
+
+
+    def bench_sync(self, user: UserAccount, path: str, payload: str, clients: int, total: int):
+        """Run the requests against the sync view from a pool of threads, one client per thread"""
+        def worker(count: int) -> List[float]:
+            client = Client()
+            client.force_login(user)
+            latencies = []
+            for _ in range(count):
+                start = time.perf_counter()
+                response = client.post(path, data=payload, content_type="application/json")
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.content
+            connections.close_all()
+            return latencies
+
+        counts = [total // clients + (1 if i < total % clients else 0) for i in range(clients)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            results = list(executor.map(worker, counts))
+        elapsed = time.perf_counter() - start
+        return summarize_latencies([lat for result in results for lat in result], elapsed)
+
+
+    def bench_async(self, user: UserAccount, path: str, payload: str, clients: int, total: int):
+        """Run the requests against the async view from concurrent tasks on a single event loop"""
+        client = AsyncClient()
+        client.force_login(user)
+
+        async def run() -> List[float]:
+            semaphore = asyncio.Semaphore(clients)
+
+            async def request() -> float:
+                async with semaphore:
+                    start = time.perf_counter()
+                    response = await client.post(path, data=payload, content_type="application/json")
+                    latency = time.perf_counter() - start
+                    assert response.status_code == 200, response.content
+                    return latency
+
+            return await asyncio.gather(*(request() for _ in range(total)))
+
+        start = time.perf_counter()
+        latencies = asyncio.run(run())
+        elapsed = time.perf_counter() - start
+        return summarize_latencies(list(latencies), elapsed)
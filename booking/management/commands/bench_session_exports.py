@@ -0,0 +1,79 @@
+import datetime
+import time
+import tracemalloc
+import uuid
+from typing import Any, Callable, Iterator
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from booking.exports import stream_sessions_csv, stream_sessions_ics
+from booking.models import Session
+from users.models import UserAccount
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed sessions, and measure the throughput and peak memory use of streaming them "
+        "as CSV and as an iCalendar feed. Memory use should not grow with the number of sessions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100000, help="Number of sessions to seed (e.g. 1000000)")
+        parser.add_argument("--chunk-size", type=int, default=None, help="Number of sessions to stream at a time")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Number of rows to insert per query")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        user = UserAccount.objects.create_user(
+            email=f"bench-{uuid.uuid4().hex[:8]}@example.com", password=uuid.uuid4().hex,
+            name="Benchmark User", is_verified=True, timezone="Africa/Lagos"
+        )
+        try:
+            self.stdout.write(f"Seeding {options['rows']} sessions...")
+            self.seed(user, options["rows"], options["batch_size"])
+            sessions = Session.objects.filter(booked_by=user).order_by("start")
+            chunk_size = options["chunk_size"]
+            self.bench("csv", lambda: stream_sessions_csv(sessions, tz=user.utz, chunk_size=chunk_size))
+            self.bench("ics", lambda: stream_sessions_ics(
+                sessions, calendar_name="Benchmark", uid_domain="example.com",
+                link_url=lambda identifier: f"https://example.com/{identifier}/", chunk_size=chunk_size
+            ))
+        finally:
+            self.stdout.write("Cleaning up...")
+            Session.objects.filter(booked_by=user).delete()
+            user.delete()
+        return None
+
+
+    def seed(self, user: UserAccount, rows: int, batch_size: int) -> None:
+        """Inserts `rows` sessions for the user, bypassing `Session.save`"""
+        start = timezone.now() - datetime.timedelta(days=365)
+        with transaction.atomic():
+            for offset in range(0, rows, batch_size):
+                sessions = []
+                for index in range(offset, min(offset + batch_size, rows)):
+                    session_start = start + datetime.timedelta(minutes=30 * index)
+                    sessions.append(Session(
+                        title=f"Benchmark session {index}", start=session_start,
+                        end=session_start + datetime.timedelta(minutes=30), booked_by=user
+                    ))
+                Session.objects.bulk_create(sessions)
+        return None
+
+
+    def bench(self, label: str, stream: Callable[[], Iterator[str]]) -> None:
+        """Consumes the stream, as a response would, and reports its throughput and peak memory use"""
+        tracemalloc.start()
+        start = time.perf_counter()
+        size = 0
+        for part in stream():
+            size += len(part)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.stdout.write(
+            f"{label}: {elapsed:.2f}s, {size / 1024 / 1024:.1f} MiB written, "
+            f"peak memory {peak / 1024 / 1024:.1f} MiB"
+        )
+        return None
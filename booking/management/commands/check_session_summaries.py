@@ -0,0 +1,78 @@
+from typing import Any, Dict, List
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from booking.summaries import (
+    compute_session_summary, get_session_summary, get_session_summary_cache_key
+)
+from users.models import UserAccount
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the cached per-user session summaries (see `booking.summaries`) with the database. "
+        "Each cached summary is compared with one computed from the database as of the same time. "
+        "The cache must be shared with the web processes (the default local-memory cache is not)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", nargs="*", default=None, help="Emails of the users to check. Defaults to all users")
+        parser.add_argument("--batch-size", type=int, default=500, help="Number of users whose summaries are read at a time")
+        parser.add_argument("--fix", action="store_true", help="Delete inconsistent summaries, for them to be computed again")
+        parser.add_argument("--warm", action="store_true", help="Compute and cache the summaries of users that have none")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        users = UserAccount.objects.order_by("pk")
+        if options["users"]:
+            users = users.filter(email__in=options["users"])
+
+        checked = missing = 0
+        inconsistent: List[str] = []
+        batch: List[UserAccount] = []
+        for user in users.iterator(chunk_size=options["batch_size"]):
+            batch.append(user)
+            if len(batch) < options["batch_size"]:
+                continue
+            result = self.check_batch(batch, options["fix"], options["warm"])
+            checked, missing = checked + result["checked"], missing + result["missing"]
+            inconsistent.extend(result["inconsistent"])
+            batch = []
+        if batch:
+            result = self.check_batch(batch, options["fix"], options["warm"])
+            checked, missing = checked + result["checked"], missing + result["missing"]
+            inconsistent.extend(result["inconsistent"])
+
+        self.stdout.write(f"Checked {checked} cached summaries. {missing} users had no cached summary{' (now cached)' if options['warm'] else ''}")
+        if inconsistent and not options["fix"]:
+            raise CommandError(f"{len(inconsistent)} cached summaries are inconsistent with the database. Use --fix to delete them")
+        if inconsistent:
+            self.stdout.write(self.style.WARNING(f"Deleted {len(inconsistent)} inconsistent summaries"))
+        else:
+            self.stdout.write(self.style.SUCCESS("All cached summaries are consistent with the database"))
+        return None
+
+
+    def check_batch(self, users: List[UserAccount], fix: bool, warm: bool) -> Dict[str, Any]:
+        """Compares the cached summaries of the users with the database"""
+        cache_keys = {get_session_summary_cache_key(user.pk): user for user in users}
+        summaries = cache.get_many(list(cache_keys))
+        inconsistent = []
+        for cache_key, user in cache_keys.items():
+            summary = summaries.get(cache_key, None)
+            if summary is None:
+                if warm:
+                    get_session_summary(user)
+                continue
+            expected = compute_session_summary(user, as_of=summary.as_of)
+            if summary == expected:
+                continue
+            differences = ", ".join(
+                f"{name}: cached {value!r}, expected {getattr(expected, name)!r}"
+                for name, value in summary.as_dict().items() if value != getattr(expected, name)
+            )
+            self.stdout.write(self.style.ERROR(f"{user.email}: {differences}"))
+            inconsistent.append(cache_key)
+        if fix and inconsistent:
+            cache.delete_many(inconsistent)
+        return {"checked": len(summaries), "missing": len(users) - len(summaries), "inconsistent": inconsistent}
@@ -0,0 +1,69 @@
+import os
+import zoneinfo
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from booking.imports import ROW_TYPES, BookingImporter, get_row_reader
+from users.models import UserAccount
+
+
+class Command(BaseCommand):
+    help = (
+        "Import sessions and unavailable periods from a CSV or iCalendar (.ics) file, "
+        "in batches of bulk inserts, and report the rows rejected and the rows imported per second"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", help="Path of the CSV or .ics file to import")
+        parser.add_argument(
+            "--user", required=True,
+            help="Email of the importing user, who creates the links of imported sessions and books sessions with no booking user"
+        )
+        parser.add_argument("--format", choices=("csv", "ics"), default=None, help="File format. Defaults to the file's extension")
+        parser.add_argument(
+            "--type", choices=ROW_TYPES, default=ROW_TYPES[0],
+            help="What to import rows (or events) with no type as"
+        )
+        parser.add_argument(
+            "--timezone", default=None,
+            help="Timezone of datetimes with no offset in the file. Defaults to the importing user's timezone"
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=None,
+            help="Number of rows to insert per transaction. Defaults to the `BOOKING_IMPORT_BATCH_SIZE` setting"
+        )
+        parser.add_argument("--allow-past", action="store_true", help="Import periods that start in the past")
+        parser.add_argument("--ignore-business-hours", action="store_true", help="Import periods outside the business hours")
+        parser.add_argument("--dry-run", action="store_true", help="Validate the rows without importing them")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        path: str = options["file"]
+        format = options["format"] or os.path.splitext(path)[1].lstrip(".").lower()
+        if format not in ("csv", "ics"):
+            raise CommandError("Cannot tell the file format from its extension. Use --format")
+        try:
+            user = UserAccount.objects.get(email=options["user"])
+        except UserAccount.DoesNotExist:
+            raise CommandError(f"No user with the email '{options['user']}'")
+        try:
+            tz = zoneinfo.ZoneInfo(options["timezone"]) if options["timezone"] else user.utz
+        except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+            raise CommandError(f"Unknown timezone '{options['timezone']}'")
+
+        importer = BookingImporter(
+            user,
+            batch_size=options["batch_size"] or settings.BOOKING_IMPORT_BATCH_SIZE,
+            allow_past=options["allow_past"],
+            check_business_hours=not options["ignore_business_hours"],
+            dry_run=options["dry_run"]
+        )
+        with open(path, newline="", encoding="utf-8-sig") as file:
+            result = importer.run(get_row_reader(format)(file, options["type"], tz))
+
+        for line, error in result.errors:
+            self.stderr.write(f"Line {line}: {error}")
+        summary = f"{'Dry run: ' if options['dry_run'] else ''}{result}"
+        self.stdout.write(self.style.SUCCESS(summary) if not result.errors else self.style.WARNING(summary))
+        return None
@@ -4,8 +4,10 @@ from django.db.models.manager import BaseManager
 from django.utils import timezone
 import datetime
 
+from helpers.dates import LocalDateQuerySet
 
-class SessionQuerySet(models.QuerySet):
+
+class SessionQuerySet(LocalDateQuerySet):
     """Custom queryset for the Session model"""
 
     def pending(self):
@@ -50,18 +52,17 @@ class SessionQuerySet(models.QuerySet):
 
         :param tz: Timezone to use for filtering
         """
-        today = timezone.now().astimezone(tz)
-        return self.filter(start__date=today.date())
+        return self.local_today(tz=tz)
     
 
-    def start_date_gte(self, date: datetime.date):
+    def start_date_gte(self, date: datetime.date, tz: Optional[timezone.tzinfo] = None):
         """
         Return all sessions whose start date is greater than or equal to the given date
 
         :param date: Date to filter from
         :param tz: Timezone to use for filtering
         """
-        return self.filter(start__date__gte=date)
+        return self.from_local_date(date, tz=tz)
 
 
 
@@ -114,11 +115,41 @@ class SessionManager(BaseManager.from_queryset(SessionQuerySet)):
         return self.get_queryset().today(tz=tz)
 
 
-    def start_date_gte(self, date: datetime.date) -> SessionQuerySet:
+    def start_date_gte(self, date: datetime.date, tz: Optional[timezone.tzinfo] = None) -> SessionQuerySet:
         """
         Return all sessions whose start date is greater than or equal to the given date
 
         :param date: Date to filter from
         :param tz: Timezone to use for filtering
         """
-        return self.get_queryset().start_date_gte(date=date)
+        return self.get_queryset().start_date_gte(date=date, tz=tz)
+
+
+
+class UnavailablePeriodQuerySet(LocalDateQuerySet):
+    """Custom queryset for the UnavailablePeriod model"""
+    pass
+
+
+
+class UnavailablePeriodManager(BaseManager.from_queryset(UnavailablePeriodQuerySet)):
+    """Custom manager for the UnavailablePeriod model"""
+    pass
+
+
+
+class ResourceQuerySet(models.QuerySet):
+    """Custom queryset for the Resource model"""
+
+    def active(self):
+        """Returns resources that sessions can be booked with"""
+        return self.filter(is_active=True)
+
+
+
+class ResourceManager(BaseManager.from_queryset(ResourceQuerySet)):
+    """Custom manager for the Resource model"""
+
+    def active(self) -> ResourceQuerySet:
+        """Returns resources that sessions can be booked with"""
+        return self.get_queryset().active()
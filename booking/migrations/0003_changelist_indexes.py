@@ -0,0 +1,24 @@
+# Generated by Django 5.0.4 on 2026-10-19 14:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0002_initial'),
+        ('links', '0003_changelist_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['start'], name='booking_session_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='unavailableperiod',
+            index=models.Index(fields=['start'], name='booking_unavail_start_idx'),
+        ),
+    ]
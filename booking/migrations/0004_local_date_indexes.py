@@ -0,0 +1,20 @@
+# Generated by Django 5.0.4 on 2026-10-19 14:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0003_changelist_indexes'),
+        ('links', '0003_changelist_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['booked_by', 'start'], name='booking_session_user_start_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.4 on 2026-10-19 15:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0004_local_date_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DayAvailability',
+            fields=[
+                ('date', models.DateField(help_text="The date, in the business hours' timezone", primary_key=True, serialize=False, verbose_name='Date')),
+                ('business_minutes', models.PositiveIntegerField(help_text='Minutes within business hours', verbose_name='Business minutes')),
+                ('free_minutes', models.PositiveIntegerField(help_text='Minutes within business hours that are neither booked nor unavailable', verbose_name='Free minutes')),
+                ('longest_free_minutes', models.PositiveIntegerField(help_text='Length of the longest free period, in minutes', verbose_name='Longest free minutes')),
+                ('fully_booked', models.BooleanField(help_text='Whether there is no free period long enough to book a session in', verbose_name='Fully booked')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Day Availability',
+                'verbose_name_plural': 'Day Availabilities',
+                'ordering': ['date'],
+            },
+        ),
+    ]
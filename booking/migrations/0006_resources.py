@@ -0,0 +1,79 @@
+# Generated by Django 5.0.4 on 2026-10-19 16:02
+
+import django.db.models.deletion
+import timezone_field.fields
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0005_day_availability'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Resource',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(help_text='Name of the host or room', max_length=255, unique=True, verbose_name='Name')),
+                ('description', models.TextField(blank=True, default='', verbose_name='Description')),
+                ('is_active', models.BooleanField(default=True, help_text='Can sessions be booked with this resource?', verbose_name='Active')),
+                ('opens_at', models.TimeField(blank=True, help_text='The time the resource can be booked from. Defaults to the business opening time', null=True, verbose_name='Opens at')),
+                ('closes_at', models.TimeField(blank=True, help_text='The time the resource can be booked till. Defaults to the business closing time', null=True, verbose_name='Closes at')),
+                ('timezone', timezone_field.fields.TimeZoneField(blank=True, help_text="Timezone of the opening and closing times. Defaults to the business hours' timezone", null=True, verbose_name='Timezone')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Resource',
+                'verbose_name_plural': 'Resources',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='session',
+            name='resource',
+            field=models.ForeignKey(blank=True, help_text='The host or room the session is booked with. Leave empty for the default calendar', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='sessions', to='booking.resource', verbose_name='Resource'),
+        ),
+        migrations.AddField(
+            model_name='unavailableperiod',
+            name='resource',
+            field=models.ForeignKey(blank=True, help_text='The host or room that is unavailable. Leave empty for all calendars to be unavailable', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='unavailable_periods', to='booking.resource', verbose_name='Resource'),
+        ),
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['resource', 'start'], name='booking_session_res_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='unavailableperiod',
+            index=models.Index(fields=['resource', 'start'], name='booking_unavail_res_start_idx'),
+        ),
+        # Day availabilities are computed again when read, so they are recreated (per calendar) rather than migrated
+        migrations.DeleteModel(
+            name='DayAvailability',
+        ),
+        migrations.CreateModel(
+            name='DayAvailability',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('date', models.DateField(help_text="The date, in the business hours' timezone", verbose_name='Date')),
+                ('business_minutes', models.PositiveIntegerField(help_text='Minutes within business hours', verbose_name='Business minutes')),
+                ('free_minutes', models.PositiveIntegerField(help_text='Minutes within business hours that are neither booked nor unavailable', verbose_name='Free minutes')),
+                ('longest_free_minutes', models.PositiveIntegerField(help_text='Length of the longest free period, in minutes', verbose_name='Longest free minutes')),
+                ('fully_booked', models.BooleanField(help_text='Whether there is no free period long enough to book a session in', verbose_name='Fully booked')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('resource', models.ForeignKey(blank=True, help_text='The resource whose calendar this is. Empty for the default calendar', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='day_availabilities', to='booking.resource', verbose_name='Resource')),
+            ],
+            options={
+                'verbose_name': 'Day Availability',
+                'verbose_name_plural': 'Day Availabilities',
+                'ordering': ['resource', 'date'],
+                'constraints': [
+                    models.UniqueConstraint(condition=models.Q(('resource__isnull', False)), fields=('resource', 'date'), name='booking_dayavailability_resource_date_uniq'),
+                    models.UniqueConstraint(condition=models.Q(('resource__isnull', True)), fields=('date',), name='booking_dayavailability_default_date_uniq'),
+                ],
+            },
+        ),
+    ]
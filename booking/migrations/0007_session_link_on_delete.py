@@ -0,0 +1,20 @@
+# Generated by Django 5.0.4 on 2026-10-19 15:41
+
+import booking.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0006_resources'),
+        ('links', '0004_link_lifecycle'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='session',
+            name='link',
+            field=models.ForeignKey(blank=True, help_text='The link to the session', null=True, on_delete=booking.models.set_null_and_invalidate_summaries, related_name='session', to='links.link', verbose_name='Link'),
+        ),
+    ]
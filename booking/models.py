@@ -4,12 +4,66 @@ import uuid
 from django.utils.translation import gettext_lazy as _
 from django_utz.decorators import model
 from django.utils import timezone
+from timezone_field import TimeZoneField
 from typing import Optional
 
-from .managers import SessionManager
+from .managers import SessionManager, UnavailablePeriodManager, ResourceManager
 from links.models import Link
 
 
+def set_null_and_invalidate_summaries(collector, field, sub_objs, using) -> None:
+    """
+    `on_delete` handler of the links of sessions. Sets the link of the sessions to null, like `models.SET_NULL`,
+    and invalidates the cached summaries of their users (see `booking.summaries`), as the sessions are updated
+    without being saved. The users are looked up with one query per batch of deleted links.
+    """
+    from .summaries import invalidate_summaries_of_sessions
+
+    models.SET_NULL(collector, field, sub_objs, using)
+    invalidate_summaries_of_sessions(sub_objs, using=using)
+    return None
+
+# The sessions are passed as a queryset, rather than fetched
+set_null_and_invalidate_summaries.lazy_sub_objs = True
+
+
+class Resource(models.Model):
+    """
+    Model to represent a host or room that sessions are booked with, each with its own calendar.
+
+    Sessions booked with no resource are on the default calendar, which uses the site's business hours settings.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(_("Name"), max_length=255, unique=True, help_text=_("Name of the host or room"))
+    description = models.TextField(_("Description"), blank=True, default="")
+    is_active = models.BooleanField(_("Active"), default=True, help_text=_("Can sessions be booked with this resource?"))
+    opens_at = models.TimeField(
+        _("Opens at"), null=True, blank=True,
+        help_text=_("The time the resource can be booked from. Defaults to the business opening time")
+    )
+    closes_at = models.TimeField(
+        _("Closes at"), null=True, blank=True,
+        help_text=_("The time the resource can be booked till. Defaults to the business closing time")
+    )
+    timezone = TimeZoneField(
+        _("Timezone"), null=True, blank=True,
+        help_text=_("Timezone of the opening and closing times. Defaults to the business hours' timezone")
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ResourceManager()
+
+    class Meta:
+        ordering = ["name"]
+        verbose_name = _("Resource")
+        verbose_name_plural = _("Resources")
+
+    def __str__(self) -> str:
+        return self.name
+
+
+
 @model
 class Session(models.Model):
     """Model to represent a booked meeting session"""
@@ -23,10 +77,15 @@ class Session(models.Model):
         help_text=_("Who booked this session?")
     )
     link = models.ForeignKey(
-        Link, verbose_name=_("Link"), on_delete=models.SET_NULL,
+        Link, verbose_name=_("Link"), on_delete=set_null_and_invalidate_summaries,
         help_text=_("The link to the session"), null=True,
         related_name="session", blank=True
     )
+    resource = models.ForeignKey(
+        Resource, verbose_name=_("Resource"), on_delete=models.PROTECT,
+        null=True, blank=True, related_name="sessions",
+        help_text=_("The host or room the session is booked with. Leave empty for the default calendar")
+    )
     has_held = models.BooleanField(default=False, help_text=_("Has this session been held? If so, check this."))
     cancelled = models.BooleanField(default=False, help_text=_("Check this if you want to cancel this session"))
     rescheduled_at = models.DateTimeField(
@@ -44,6 +103,14 @@ class Session(models.Model):
         ordering = ["-start__date", "start__time"]
         verbose_name = _("Session")
         verbose_name_plural = _("Sessions")
+        indexes = [
+            # For start date range filters, such as the admin's date hierarchy drill-down
+            models.Index(fields=["start"], name="booking_session_start_idx"),
+            # For a user's sessions within a date range, such as their sessions on a date
+            models.Index(fields=["booked_by", "start"], name="booking_session_user_start_idx"),
+            # For the sessions on a resource's calendar within a time period, such as when checking availability
+            models.Index(fields=["resource", "start"], name="booking_session_res_start_idx"),
+        ]
 
     class UTZMeta:
         datetime_fields = "__all__"
@@ -108,13 +175,24 @@ class UnavailablePeriod(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     start = models.DateTimeField(_("From"), help_text=_("From what date and time you will be unavailable?"))
     end = models.DateTimeField(_("To"), help_text=_("Till what date and time you will be unavailable?"))
+    resource = models.ForeignKey(
+        Resource, verbose_name=_("Resource"), on_delete=models.CASCADE,
+        null=True, blank=True, related_name="unavailable_periods",
+        help_text=_("The host or room that is unavailable. Leave empty for all calendars to be unavailable")
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = UnavailablePeriodManager()
+
     class Meta:
         ordering = ["start"]
         verbose_name = _("Unavailable Period")
         verbose_name_plural = _("Unavailable Periods")
+        indexes = [
+            models.Index(fields=["start"], name="booking_unavail_start_idx"),
+            models.Index(fields=["resource", "start"], name="booking_unavail_res_start_idx"),
+        ]
     
     class UTZMeta:
         datetime_fields = "__all__"
@@ -133,3 +211,50 @@ class UnavailablePeriod(models.Model):
         """Returns the start and end time of the unavailable period"""
         return self.start.strftime("%H:%M"), self.end.strftime("%H:%M")
     
+
+
+
+class DayAvailability(models.Model):
+    """
+    Free time within business hours on a date of a calendar (in the calendar's business hours' timezone).
+
+    Computed lazily, and kept up to date as sessions, unavailable periods, resources and business hours change
+    (see `booking.availability`). Not to be edited directly.
+    """
+    id = models.BigAutoField(primary_key=True)
+    resource = models.ForeignKey(
+        Resource, verbose_name=_("Resource"), on_delete=models.CASCADE,
+        null=True, blank=True, related_name="day_availabilities",
+        help_text=_("The resource whose calendar this is. Empty for the default calendar")
+    )
+    date = models.DateField(_("Date"), help_text=_("The date, in the business hours' timezone"))
+    business_minutes = models.PositiveIntegerField(_("Business minutes"), help_text=_("Minutes within business hours"))
+    free_minutes = models.PositiveIntegerField(
+        _("Free minutes"), help_text=_("Minutes within business hours that are neither booked nor unavailable")
+    )
+    longest_free_minutes = models.PositiveIntegerField(
+        _("Longest free minutes"), help_text=_("Length of the longest free period, in minutes")
+    )
+    fully_booked = models.BooleanField(
+        _("Fully booked"), help_text=_("Whether there is no free period long enough to book a session in")
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["resource", "date"]
+        verbose_name = _("Day Availability")
+        verbose_name_plural = _("Day Availabilities")
+        constraints = [
+            # NULLs are distinct in unique constraints, so the default calendar needs its own
+            models.UniqueConstraint(
+                fields=["resource", "date"], condition=models.Q(resource__isnull=False),
+                name="booking_dayavailability_resource_date_uniq"
+            ),
+            models.UniqueConstraint(
+                fields=["date"], condition=models.Q(resource__isnull=True),
+                name="booking_dayavailability_default_date_uniq"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.free_minutes} free minutes on {self.date}"
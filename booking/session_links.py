@@ -0,0 +1,86 @@
+"""
+Lifecycle of session links.
+
+A session's link can be used from `SESSION_LINK_GRACE_PERIOD` before the session starts until that long
+after it ends, unless the session is cancelled or deleted. Each link holds that window (`active_from` and
+`expires_at`) and an indexed `expired` flag, copied from its session whenever the session is saved
+(see `connect_session_link_signals`), so that `SessionLinkView` can check a link without loading its session.
+
+The flag is set when the session is cancelled or deleted, and for links past their expiry by
+`python manage.py gc_links`, which also deletes the links that are attached to no session.
+
+Sessions inserted or updated without signals (e.g. with `bulk_create`) must have their links' lifecycle
+set with `get_link_lifecycle`.
+"""
+from typing import Any, Dict, Iterable, Optional
+import datetime
+from django.db import models
+from django.utils import timezone
+
+from helpers.transactions import add_to_commit_batch
+from links.models import Link
+from .models import Session
+
+
+# How long before its session starts, and after it ends, a link can be used
+SESSION_LINK_GRACE_PERIOD = datetime.timedelta(minutes=5)
+
+
+def get_link_lifecycle(
+    start: datetime.datetime,
+    end: datetime.datetime,
+    cancelled: bool = False,
+    now: Optional[datetime.datetime] = None
+) -> Dict[str, Any]:
+    """
+    Returns the lifecycle fields (`active_from`, `expires_at` and `expired`) of the link of a session
+
+    :param start: When the session starts
+    :param end: When the session ends
+    :param cancelled: Whether the session is cancelled
+    """
+    expires_at = end + SESSION_LINK_GRACE_PERIOD
+    return {
+        "active_from": start - SESSION_LINK_GRACE_PERIOD,
+        "expires_at": expires_at,
+        "expired": cancelled or expires_at <= (now or timezone.now()),
+    }
+
+
+def update_link_on_session_save(sender: type[Session], instance: Session, **kwargs: Any) -> None:
+    """Copies the lifecycle of the saved session to its link"""
+    update_fields = kwargs.get("update_fields", None)
+    if update_fields is not None and not {"start", "end", "cancelled", "link"} & set(update_fields):
+        return None
+    if instance.link_id is not None:
+        Link.objects.filter(pk=instance.link_id).update(
+            **get_link_lifecycle(instance.start, instance.end, instance.cancelled)
+        )
+    return None
+
+
+def expire_links(link_ids: Iterable[Any]) -> int:
+    """
+    Marks the links as expired, with a single query.
+
+    :return: The number of links marked as expired.
+    """
+    return Link.objects.filter(pk__in=list(link_ids)).update(expired=True)
+
+
+def expire_link_on_session_delete(sender: type[Session], instance: Session, **kwargs: Any) -> None:
+    """
+    Marks the link of the deleted session as expired, once the deletion is committed. It is deleted by `gc_links` later.
+
+    Links of sessions deleted in the same transaction are marked together.
+    """
+    if instance.link_id is not None:
+        add_to_commit_batch(expire_links, [instance.link_id], using=kwargs.get("using", None))
+    return None
+
+
+def connect_session_link_signals() -> None:
+    """Connects the signals that keep the lifecycle of session links up to date"""
+    models.signals.post_save.connect(update_link_on_session_save, sender=Session, dispatch_uid="booking.session_links.save")
+    models.signals.post_delete.connect(expire_link_on_session_delete, sender=Session, dispatch_uid="booking.session_links.delete")
+    return None
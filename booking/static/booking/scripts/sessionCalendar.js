@@ -2,6 +2,7 @@ const sessionCalendarEl = document.querySelector('#session-calendar');
 const userTimezone =  document.querySelector('#user-timezone').innerText.trim();
 const businessHourStart = document.querySelector("#business-hour-start").innerText.trim();
 const businessHourEnd = document.querySelector("#business-hour-end").innerText.trim();
+const availabilityURL = document.querySelector("#availability-url").innerText.trim();
 
 const sessionBookingModal = document.getElementById('session-booking-modal');
 const sessionBookingForm = sessionBookingModal.querySelector('#session-booking-form');
@@ -23,6 +24,8 @@ const businessHours = {
     startTime: businessHourStart,
     endTime: businessHourEnd
 };
+// Availability of each date fetched, by date string ('YYYY-MM-DD'), as {free: percentage free, full: fully booked, closed: no business hours}
+const dateAvailability = {};
 
 
 // Always call this when ever a request is made on behalf of the calendar
@@ -265,6 +268,63 @@ function fetchBookingDataForDate(dateStr, successCallback){
 };
 
 
+/**
+ * Fetches the availability of each date of a month, stores it in `dateAvailability`
+ * and passes the month's dates to a callback function
+ * @param {String} monthStr A string representing the month in the format 'YYYY-MM'
+ * @param {Function} successCallback A callback function to call after the availability has been fetched successfully
+ */
+function fetchAvailabilityForMonth(monthStr, successCallback){
+    const options = {
+        method: 'GET',
+        headers: {
+            'Accept': 'application/json',
+        },
+        mode: 'same-origin',
+    }
+
+    fetch(`${availabilityURL}?month=${monthStr}`, options).then((response) => {
+        // The month grid is usable without availability, so errors are not shown
+        if (!response.ok) return;
+        response.json().then((data) => {
+            const availability = data.data;
+            const fullDays = new Set(availability.full);
+            const closedDays = new Set(availability.closed);
+            const dateStrs = availability.free.map((free, index) => {
+                const day = index + 1;
+                const dateStr = `${availability.month}-${String(day).padStart(2, '0')}`;
+                dateAvailability[dateStr] = {free: free, full: fullDays.has(day), closed: closedDays.has(day)};
+                return dateStr;
+            });
+            return successCallback(dateStrs);
+        });
+    });
+};
+
+
+/**
+ * Shades the day cells of the month grid by how much of the date's business hours is free
+ * @param {Array} dateStrs The date strings ('YYYY-MM-DD') of the cells to shade
+ */
+function shadeDaysByAvailability(dateStrs){
+    for (const dateStr of dateStrs){
+        const dayCellEl = sessionCalendarEl.querySelector(`.fc-daygrid-day[data-date="${dateStr}"]`);
+        if (!dayCellEl) continue;
+        const availability = dateAvailability[dateStr];
+        dayCellEl.classList.remove('fully-booked', 'low-availability', 'some-availability');
+        if (availability.full){
+            dayCellEl.classList.add('fully-booked');
+            dayCellEl.title = availability.closed ? 'Closed' : 'Fully booked';
+        }else if (availability.free < 50){
+            dayCellEl.classList.add(availability.free < 25 ? 'low-availability' : 'some-availability');
+            dayCellEl.title = `${availability.free}% free`;
+        }else{
+            dayCellEl.removeAttribute('title');
+        };
+    };
+};
+
+
 var sessionCalendar = new FullCalendar.Calendar(sessionCalendarEl, {
     themeSystem: 'standard',
     initialView: 'dayGridMonth',
@@ -296,7 +356,7 @@ var sessionCalendar = new FullCalendar.Calendar(sessionCalendarEl, {
             },
             // Disallows user from selecting date slots
             selectable: false,
-            dateClick: onDateClick
+            dateClick: onMonthDateClick
         },
         timeGridDay: {
             titleFormat: { 
@@ -319,6 +379,7 @@ var sessionCalendar = new FullCalendar.Calendar(sessionCalendarEl, {
         }   
     },
     timeZone: userTimezone,
+    datesSet: onDatesSet,
     longPressDelay: 250,
     navLinks: false,
     // Shows event details as user selects
@@ -372,6 +433,29 @@ if (preferredDate){
 };
 
 // CALLBACKS
+function onDatesSet(info){
+    if (info.view.type !== 'dayGridMonth') return;
+    // Shade the month's days, once its availability (which may have changed since) is fetched.
+    // Dates of the view are UTC-coerced, as the calendar uses a named time zone
+    const monthStr = info.view.currentStart.toISOString().slice(0, 7);
+    fetchAvailabilityForMonth(monthStr, shadeDaysByAvailability);
+};
+
+
+function onMonthDateClick(info){
+    const availability = dateAvailability[info.dateStr] ?? null;
+    if (availability && availability.closed){
+        pushNotification("warning", "We are closed on this day. Please pick another day");
+        return;
+    };
+    if (availability && availability.full){
+        pushNotification("warning", "This day is fully booked. Please pick another day");
+        return;
+    };
+    onDateClick(info);
+};
+
+
 function onDateClick(info){
     // move to time grid for that day
     sessionCalendar.changeView('timeGridDay', info.dateStr);
@@ -0,0 +1,324 @@
+"""
+Per-user session summaries (session counts by state, and the next session), cached in Django's cache.
+
+A summary is computed lazily, with two queries, on the first read after it is missing or out of date,
+and is then kept up to date by applying the change of each saved or deleted session to the cached summary
+(see `connect_session_summary_signals`), rather than computing it again. So reading it is a single cache get.
+
+Summaries are computed as of a time (`as_of`). Which sessions have ended changes as time passes, so a summary
+is only valid until the earliest end of the sessions that had not ended as of then (`valid_until`),
+after which it is computed again. Changes that cannot be applied to a summary without querying,
+such as deleting the next session, delete the summary instead, for the next read to compute it again.
+
+Sessions inserted or updated without signals (e.g. with `bulk_create`) must have their users' summaries
+invalidated with `invalidate_session_summaries`. Deleting the link of sessions invalidates them
+(see `booking.models.set_null_and_invalidate_summaries`). Use `python manage.py check_session_summaries`
+to compare the cached summaries with the database.
+"""
+from dataclasses import dataclass, fields, replace
+from typing import Any, Dict, Iterable, NamedTuple, Optional
+import datetime
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
+from django.utils import timezone
+
+from helpers.transactions import add_to_commit_batch
+from users.models import UserAccount
+from .models import Session
+
+
+# Bump when the fields of `SessionSummary` change, so that summaries cached by older code are not read
+SESSION_SUMMARY_CACHE_VERSION = 1
+# Attribute of a session that holds its state as last loaded or saved, to compute the change on save
+SESSION_STATE_ATTR = "_session_summary_state"
+
+# Counts of a session summary
+SESSION_SUMMARY_COUNTS = ("sessions", "pending", "approved", "cancelled", "held", "with_link", "ended", "upcoming", "missed")
+
+
+class SessionState(NamedTuple):
+    """What a session contributes to its user's summary"""
+    id: uuid.UUID
+    user_id: Any
+    start: datetime.datetime
+    end: datetime.datetime
+    has_link: bool
+    has_held: bool
+    cancelled: bool
+    updated_at: Optional[datetime.datetime]
+
+    @classmethod
+    def from_session(cls, session: Session) -> "SessionState":
+        return cls(
+            id=session.pk, user_id=session.booked_by_id, start=session.start, end=session.end,
+            has_link=session.link_id is not None, has_held=session.has_held,
+            cancelled=session.cancelled, updated_at=session.updated_at
+        )
+
+    @property
+    def pending(self) -> bool:
+        return not self.has_held and not self.cancelled
+
+    def counts(self, as_of: datetime.datetime) -> Dict[str, int]:
+        """Returns what the session adds to each count of a summary as of the given time"""
+        ended = self.end <= as_of
+        approved = self.pending and self.has_link
+        return {
+            "sessions": 1,
+            "pending": int(self.pending),
+            "approved": int(approved),
+            "cancelled": int(self.cancelled),
+            "held": int(self.has_held),
+            "with_link": int(self.has_link),
+            "ended": int(ended),
+            "upcoming": int(self.pending and not ended),
+            "missed": int(approved and ended),
+        }
+
+
+@dataclass
+class NextSession:
+    """The user's earliest pending session that has not ended"""
+    id: uuid.UUID
+    start: datetime.datetime
+    end: datetime.datetime
+
+
+@dataclass
+class SessionSummary:
+    """Summary of a user's sessions, as of a time"""
+    as_of: datetime.datetime
+    # When the summary is out of date, because a session ends. None if no session ends after `as_of`
+    valid_until: Optional[datetime.datetime] = None
+    sessions: int = 0
+    # Neither held nor cancelled
+    pending: int = 0
+    # Pending, with a link
+    approved: int = 0
+    cancelled: int = 0
+    held: int = 0
+    with_link: int = 0
+    ended: int = 0
+    # Pending, and not ended
+    upcoming: int = 0
+    # Approved, and ended
+    missed: int = 0
+    next_session: Optional[NextSession] = None
+    # When a session was last added or updated
+    last_updated: Optional[datetime.datetime] = None
+
+    def is_valid(self, now: Optional[datetime.datetime] = None) -> bool:
+        """Returns True if the summary is still up to date at the given time (now by default)"""
+        return self.valid_until is None or (now or timezone.now()) < self.valid_until
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+
+def get_session_summary_cache_key(user_id: Any) -> str:
+    return f"booking:session-summary:v{SESSION_SUMMARY_CACHE_VERSION}:{user_id}"
+
+
+def compute_session_summary(user: UserAccount, as_of: Optional[datetime.datetime] = None) -> SessionSummary:
+    """
+    Computes the summary of the user's sessions as of the given time (now by default), from the database.
+
+    :param user: The user
+    :param as_of: The time as of which to compute the summary
+    """
+    as_of = as_of or timezone.now()
+    pending = models.Q(has_held=False, cancelled=False)
+    approved = pending & models.Q(link__isnull=False)
+    ended = models.Q(end__lte=as_of)
+    user_sessions = Session.objects.filter(booked_by_id=user.pk).order_by()
+    aggregates = dict(
+        sessions=models.Count("pk"),
+        pending=models.Count("pk", filter=pending),
+        approved=models.Count("pk", filter=approved),
+        cancelled=models.Count("pk", filter=models.Q(cancelled=True)),
+        held=models.Count("pk", filter=models.Q(has_held=True)),
+        with_link=models.Count("link"),
+        ended=models.Count("pk", filter=ended),
+        upcoming=models.Count("pk", filter=pending & ~ended),
+        missed=models.Count("pk", filter=approved & ended),
+        valid_until=models.Min("end", filter=~ended),
+        last_updated=models.Max("updated_at"),
+    )
+    # Prefixed, as aggregates cannot be named after fields (e.g. `cancelled`)
+    stats = user_sessions.aggregate(**{f"summary_{name}": aggregate for name, aggregate in aggregates.items()})
+    stats = {name.removeprefix("summary_"): value for name, value in stats.items()}
+    next_session = user_sessions.filter(pending & ~ended).order_by("start", "pk").values_list("pk", "start", "end").first()
+    return SessionSummary(
+        as_of=as_of, **stats,
+        next_session=NextSession(*next_session) if next_session else None
+    )
+
+
+def get_session_summary(user: UserAccount) -> SessionSummary:
+    """
+    Returns the summary of the user's sessions, from the cache.
+
+    The summary is computed and cached if it is not cached, or is out of date.
+    """
+    cache_key = get_session_summary_cache_key(user.pk)
+    summary = cache.get(cache_key)
+    if summary is None or not summary.is_valid():
+        summary = compute_session_summary(user)
+        cache.set(cache_key, summary, timeout=settings.SESSION_SUMMARY_CACHE_TIMEOUT)
+    return summary
+
+
+def invalidate_session_summaries(user_ids: Iterable[Any]) -> None:
+    """Deletes the cached summaries of the users' sessions, for them to be computed again on the next read"""
+    cache.delete_many([get_session_summary_cache_key(user_id) for user_id in set(user_ids)])
+    return None
+
+
+def apply_session_change(
+    summary: SessionSummary, old: Optional[SessionState], new: Optional[SessionState]
+) -> Optional[SessionSummary]:
+    """
+    Returns the summary with the change of a session (of the summary's user) applied,
+    or None if the change cannot be applied without computing the summary again.
+
+    :param summary: The summary to apply the change to
+    :param old: State of the session before the change, if it was in the summary
+    :param new: State of the session after the change, if it is in the summary
+    """
+    counts = {name: getattr(summary, name) for name in SESSION_SUMMARY_COUNTS}
+    for state, sign in ((old, -1), (new, 1)):
+        if state is not None:
+            for name, count in state.counts(summary.as_of).items():
+                counts[name] += sign * count
+
+    # The end of the session was the earliest end, and it changed. The next earliest end is not known
+    if old is not None and summary.valid_until is not None and old.end == summary.valid_until:
+        if new is None or new.end != old.end:
+            return None
+    valid_until = summary.valid_until
+    if new is not None and new.end > summary.as_of:
+        valid_until = min(valid_until, new.end) if valid_until is not None else new.end
+
+    next_session = summary.next_session
+    is_next = new is not None and new.pending and new.end > summary.as_of
+    if next_session is not None and old is not None and old.id == next_session.id:
+        # The next session moved later, or is no longer next. The session after it is not known
+        if not is_next or new.start > old.start:
+            return None
+        next_session = NextSession(new.id, new.start, new.end)
+    elif is_next and (next_session is None or (new.start, new.id) < (next_session.start, next_session.id)):
+        next_session = NextSession(new.id, new.start, new.end)
+
+    last_updated = summary.last_updated
+    if new is not None and new.updated_at is not None:
+        last_updated = max(last_updated, new.updated_at) if last_updated is not None else new.updated_at
+    elif old is not None and old.updated_at == last_updated:
+        # The session last updated was deleted. The one updated before it is not known
+        return None
+
+    return replace(summary, **counts, valid_until=valid_until, next_session=next_session, last_updated=last_updated)
+
+
+def update_session_summaries(old: Optional[SessionState], new: Optional[SessionState]) -> None:
+    """
+    Applies the change of a session to the cached summaries of its user (or users, if the session changed hands).
+
+    Summaries that are not cached are left to be computed on the next read.
+
+    The cached summary is read, changed and written back, which is not atomic. A summary computed by another
+    process between the change being committed and applied, or changed by another process at the same time,
+    may be off until it is next computed, at most `SESSION_SUMMARY_CACHE_TIMEOUT` seconds later.
+    """
+    if old is not None and new is not None and old.user_id != new.user_id:
+        changes = [(old.user_id, old, None), (new.user_id, None, new)]
+    else:
+        changes = [((new or old).user_id, old, new)]
+
+    for user_id, old_state, new_state in changes:
+        cache_key = get_session_summary_cache_key(user_id)
+        summary = cache.get(cache_key)
+        if summary is None:
+            continue
+        summary = apply_session_change(summary, old_state, new_state)
+        if summary is None:
+            cache.delete(cache_key)
+        else:
+            cache.set(cache_key, summary, timeout=settings.SESSION_SUMMARY_CACHE_TIMEOUT)
+    return None
+
+
+def apply_session_deletions(deleted: Iterable[SessionState]) -> None:
+    """
+    Applies the deletion of the sessions to the cached summaries of their users,
+    reading the summaries in one cache request, as with `update_session_summaries`
+    """
+    deleted_by_user: Dict[Any, list] = {}
+    for state in deleted:
+        deleted_by_user.setdefault(state.user_id, []).append(state)
+    user_ids = {get_session_summary_cache_key(user_id): user_id for user_id in deleted_by_user}
+    updated, invalidated = {}, []
+    for cache_key, summary in cache.get_many(list(user_ids)).items():
+        for state in deleted_by_user[user_ids[cache_key]]:
+            summary = apply_session_change(summary, state, None)
+            if summary is None:
+                break
+        if summary is None:
+            invalidated.append(cache_key)
+        else:
+            updated[cache_key] = summary
+    if updated:
+        cache.set_many(updated, timeout=settings.SESSION_SUMMARY_CACHE_TIMEOUT)
+    if invalidated:
+        cache.delete_many(invalidated)
+    return None
+
+
+def remember_session_state(sender: type[Session], instance: Session, **kwargs: Any) -> None:
+    """Stores the state of the loaded session, to compute its change when it is saved"""
+    # Sessions loaded with deferred fields are not summarized, and are invalidated on save instead
+    if instance.pk is not None and not instance.get_deferred_fields():
+        setattr(instance, SESSION_STATE_ATTR, SessionState.from_session(instance))
+    return None
+
+
+def update_summaries_on_session_save(sender: type[Session], instance: Session, created: bool, **kwargs: Any) -> None:
+    """Applies the change of the saved session to the cached summaries, once the change is committed"""
+    old = None if created else getattr(instance, SESSION_STATE_ATTR, None)
+    new = SessionState.from_session(instance)
+    setattr(instance, SESSION_STATE_ATTR, new)
+    if not created and old is None:
+        transaction.on_commit(lambda: invalidate_session_summaries([new.user_id]), using=kwargs.get("using"))
+    else:
+        transaction.on_commit(lambda: update_session_summaries(old, new), using=kwargs.get("using"))
+    return None
+
+
+def update_summaries_on_session_delete(sender: type[Session], instance: Session, **kwargs: Any) -> None:
+    """
+    Applies the deletion of the session to the cached summaries, once the deletion is committed,
+    together with the deletion of the other sessions deleted in the transaction
+    """
+    old = getattr(instance, SESSION_STATE_ATTR, None) or SessionState.from_session(instance)
+    add_to_commit_batch(apply_session_deletions, [old], using=kwargs.get("using"))
+    return None
+
+
+def invalidate_summaries_of_sessions(sessions: models.QuerySet, using: Optional[str] = None) -> None:
+    """
+    Invalidates the cached summaries of the users of the sessions, once the transaction is committed.
+    Used when the sessions are updated without being saved, e.g. when their link is deleted.
+    """
+    user_ids = list(sessions.order_by().values_list("booked_by_id", flat=True).distinct())
+    if user_ids:
+        add_to_commit_batch(invalidate_session_summaries, user_ids, using=using)
+    return None
+
+
+def connect_session_summary_signals() -> None:
+    """Connects the signals that keep the cached session summaries up to date"""
+    models.signals.post_init.connect(remember_session_state, sender=Session, dispatch_uid="booking.summaries.remember")
+    models.signals.post_save.connect(update_summaries_on_session_save, sender=Session, dispatch_uid="booking.summaries.save")
+    models.signals.post_delete.connect(update_summaries_on_session_delete, sender=Session, dispatch_uid="booking.summaries.delete")
+    return None
@@ -7,7 +7,15 @@ app_name = "booking"
 
 urlpatterns = [
     path("calendar/", views.session_calendar_view, name="calendar"),
+    path("calendar/data/", views.session_calendar_data_view, name="calendar_data"),
+    path("calendar/availability/", views.session_availability_view, name="calendar_availability"),
     path("links/<str:identifier>/", views.session_link_view, name="session_link"),
     path("book-session/", views.session_booking_view, name="book_session"),
     path("update-session/", views.session_update_view, name="update_session"),
+    path("calendar/feed/<str:token>/sessions.ics", views.session_calendar_feed_view, name="calendar_feed"),
+
+    # Async variants of the JSON booking APIs
+    path("async/calendar/", views.async_session_calendar_view, name="async_calendar"),
+    path("async/book-session/", views.async_session_booking_view, name="async_book_session"),
+    path("async/update-session/", views.async_session_update_view, name="async_update_session"),
 ]
@@ -1,14 +1,27 @@
 from typing import Dict, List, Optional, Any
 from django.utils import timezone
+import asyncio
 import datetime
-from django.db import models
+from django.db import models, transaction
 
-from .models import Session, UnavailablePeriod
-from core.models import BusinessHoursSettings
+from .models import Resource, Session, UnavailablePeriod
+from core.models import BusinessHoursSettings, BusinessHoursInterval, BusinessHoursException
+from core.business_hours import BusinessHoursSchedule, compile_business_hours_schedule
 from .managers import SessionQuerySet
 from users.models import UserAccount
+from helpers.response import make_etag
+from helpers.dates import local_date_q
+from helpers.cache import TieredCache
 
 
+# Caches the business hours settings and their version, which are read by every booking and calendar request
+# but rarely change. Invalidated in every process when the settings change (see `BookingConfig.ready`)
+business_hours_cache = TieredCache("business-hours")
+
+# Sessions and unavailable periods are booked within a single date, and so last less than this.
+# Bounds overlap lookups to a range of the (resource, start) indexes
+MAX_BOOKING_DURATION = datetime.timedelta(days=1)
+
 
 def session_to_simple_dict(session: Session, tz: Optional[datetime.tzinfo] = None) -> Dict[str, Any]:
     """Parse the session object to a simple dictionary with the necessary fields"""
@@ -24,17 +37,13 @@ def session_to_simple_dict(session: Session, tz: Optional[datetime.tzinfo] = Non
 
 
 def _get_objects_where_start_date_equals_given_date_in_users_tz(qs: models.QuerySet, user: UserAccount, date: datetime.date):
-    todays_objs_pks = []
-    for obj in qs:
-        start_in_user_tz = user.to_local_timezone(obj.start)
-        if start_in_user_tz.date() == date:
-            todays_objs_pks.append(obj.id)
-    return qs.filter(pk__in=todays_objs_pks)
+    """Filters the queryset for objects that start on the given date in the user's timezone"""
+    return qs.filter(local_date_q("start", date, user.utz))
 
 
 def get_unavailable_times_on_date_for_user(date: str, user: UserAccount) -> List[str]:
     """
-    Return a list of unavailable times for the given date in the give user's timezone
+    Return a list of unavailable times on the default calendar for the given date in the give user's timezone
 
     :param date: Date in the format "YYYY-MM-DD"
     """
@@ -42,7 +51,7 @@ def get_unavailable_times_on_date_for_user(date: str, user: UserAccount) -> List
     # Get unavailable times on given date
     unavailable_times = []
     unavailable_periods_on_date_in_user_tz = _get_objects_where_start_date_equals_given_date_in_users_tz(
-        qs=UnavailablePeriod.objects.all(),
+        qs=UnavailablePeriod.objects.filter(calendar_unavailable_periods_q()),
         user=user, date=date
     )
     for unavailable_period in unavailable_periods_on_date_in_user_tz:
@@ -52,7 +61,8 @@ def get_unavailable_times_on_date_for_user(date: str, user: UserAccount) -> List
 
     # Get booked times  on given date
     booked_times = []
-    valid_sessions = Session.objects.exclude(cancelled=True)
+    # The session's link is accessed by `session_to_simple_dict`
+    valid_sessions = Session.objects.filter(calendar_sessions_q()).exclude(cancelled=True).select_related("link")
     sessions_booked_on_date_in_user_tz = _get_objects_where_start_date_equals_given_date_in_users_tz(
         qs=valid_sessions,
         user=user, date=date
@@ -68,7 +78,7 @@ def get_sessions_booked_on_date_by_user(date: str, user: UserAccount):
     Return a list of booked sessions for the given date in the given user's timezone
     """
     date = timezone.datetime.strptime(date, "%Y-%m-%d").date()
-    sessions_booked_by_user = Session.objects.filter(booked_by=user)
+    sessions_booked_by_user = Session.objects.filter(booked_by=user).select_related("link")
 
     return _get_objects_where_start_date_equals_given_date_in_users_tz(
         qs=sessions_booked_by_user,
@@ -111,6 +121,81 @@ def get_bookings_by_user_on_date(date: str, user: UserAccount) -> Dict[str, Dict
     }
 
 
+async def _aget_objects_where_start_date_equals_given_date_in_users_tz(qs: models.QuerySet, user: UserAccount, date: datetime.date) -> List[models.Model]:
+    """
+    Async variant of `_get_objects_where_start_date_equals_given_date_in_users_tz`.
+
+    Returns the matching objects instead of a queryset.
+    """
+    return [obj async for obj in _get_objects_where_start_date_equals_given_date_in_users_tz(qs, user, date)]
+
+
+async def aget_unavailable_times_on_date_for_user(date: str, user: UserAccount) -> List[str]:
+    """
+    Async variant of `get_unavailable_times_on_date_for_user`.
+
+    Unavailable periods and booked sessions are fetched concurrently.
+
+    :param date: Date in the format "YYYY-MM-DD"
+    """
+    date = datetime.datetime.strptime(date, "%Y-%m-%d").date()
+    unavailable_periods, booked_sessions = await asyncio.gather(
+        _aget_objects_where_start_date_equals_given_date_in_users_tz(
+            qs=UnavailablePeriod.objects.filter(calendar_unavailable_periods_q()),
+            user=user, date=date
+        ),
+        _aget_objects_where_start_date_equals_given_date_in_users_tz(
+            qs=Session.objects.filter(calendar_sessions_q()).exclude(cancelled=True).select_related("link"),
+            user=user, date=date
+        ),
+    )
+    unavailable_times = []
+    for unavailable_period in unavailable_periods:
+        start_in_tz = unavailable_period.start.astimezone(user.utz).strftime("%H:%M")
+        end_in_tz = unavailable_period.end.astimezone(user.utz).strftime("%H:%M")
+        unavailable_times.append([start_in_tz, end_in_tz])
+
+    booked_times = [session_to_simple_dict(session, user.utz)["time_period"] for session in booked_sessions]
+    return [*unavailable_times, *booked_times]
+
+
+async def aget_bookings_by_user_on_date(date: str, user: UserAccount) -> Dict[str, Dict[str, Any]]:
+    """
+    Async variant of `get_bookings_by_user_on_date`.
+
+    The user's sessions on the date are fetched once and sorted into 
+    categories in memory, rather than with a query per category.
+    """
+    tz = user.utz
+    date = datetime.datetime.strptime(date, "%Y-%m-%d").date()
+    todays_sessions: List[Session] = await _aget_objects_where_start_date_equals_given_date_in_users_tz(
+        qs=Session.objects.filter(booked_by=user).select_related("link"),
+        user=user, date=date
+    )
+    now = timezone.now().astimezone(tz)
+    pending = {}
+    missed = {}
+    cancelled = {}
+    held = {}
+    for session in todays_sessions:
+        session_dict = session_to_simple_dict(session, tz)
+        if session.is_pending:
+            if session.link_id and session.end <= now:
+                missed[session.pk.hex] = session_dict
+            else:
+                pending[session.pk.hex] = session_dict
+        if session.cancelled:
+            cancelled[session.pk.hex] = session_dict
+        if session.has_held:
+            held[session.pk.hex] = session_dict
+    return {
+        "pending": pending,
+        "missed": missed,
+        "cancelled": cancelled,
+        "held": held
+    }
+
+
 def remove_booked_time_periods_from_unavailable_times(
         bookings: Dict[str, Dict[str, Any]], 
         unavailable_time_periods: List[List[str]]
@@ -124,76 +209,277 @@ def remove_booked_time_periods_from_unavailable_times(
     return None
 
 
-def get_unavailable_periods_within_time_period(start: datetime.datetime, end: datetime.datetime):
+# Session statuses in the compact calendar payload are sent as indices into this list
+COMPACT_SESSION_STATUSES = ("pending", "missed", "cancelled", "held")
+
+
+def _time_str_to_minutes(time_str: str) -> int:
+    """Converts a "HH:MM" time string to the number of minutes after midnight"""
+    hours, minutes = time_str.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def _time_period_to_minute_offsets(time_period: List[str]) -> List[int]:
+    """
+    Converts a ["HH:MM", "HH:MM"] time period to minute offsets from midnight.
+
+    A period ending at or before its start (e.g. at "00:00") is taken to end on the next day.
+    """
+    start, end = map(_time_str_to_minutes, time_period)
+    if end <= start:
+        end += 24 * 60
+    return [start, end]
+
+
+def to_compact_calendar_data(date: str, unavailable_times: List[List[str]], bookings: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
     """
-    Returns all unavailable periods that fall within the given (time period) start and end datetime
+    Converts the calendar data for a date to a compact, columnar format.
+
+    Time periods are sent as minute offsets from midnight (in the user's timezone),
+    and session statuses as indices into the `statuses` list.
+
+    :param date: Date in the format "YYYY-MM-DD"
+    :param unavailable_times: Unavailable time periods as returned by `get_unavailable_times_on_date_for_user`
+    :param bookings: Bookings as returned by `get_bookings_by_user_on_date`
+    """
+    unavailable_starts, unavailable_ends = [], []
+    for time_period in unavailable_times:
+        start, end = _time_period_to_minute_offsets(time_period)
+        unavailable_starts.append(start)
+        unavailable_ends.append(end)
+
+    columns = {"id": [], "title": [], "start": [], "end": [], "status": [], "link": [], "approved": []}
+    for status_code, status in enumerate(COMPACT_SESSION_STATUSES):
+        for session_id, data in bookings.get(status, {}).items():
+            start, end = _time_period_to_minute_offsets(data["time_period"])
+            columns["id"].append(session_id)
+            columns["title"].append(data["title"])
+            columns["start"].append(start)
+            columns["end"].append(end)
+            columns["status"].append(status_code)
+            columns["link"].append(data["link"])
+            columns["approved"].append(data["is_approved"])
+    return {
+        "date": date,
+        "statuses": COMPACT_SESSION_STATUSES,
+        "unavailable": {"start": unavailable_starts, "end": unavailable_ends},
+        "bookings": columns,
+    }
+
+
+def get_calendar_data_version(date: str, user: UserAccount) -> str:
+    """
+    Returns a version string for the calendar data of the given date, as seen by the given user.
+
+    The version changes when a session or unavailable period that could fall on the date 
+    (in any timezone) is added, updated, deleted or has its link removed, when one of the user's 
+    sessions on the date ends (and so may become missed), or when the user's timezone changes.
+    It is computed with one aggregate query per model and is suitable for use as an ETag.
+
+    :param date: Date in the format "YYYY-MM-DD"
+    """
+    date = datetime.datetime.strptime(date, "%Y-%m-%d").date()
+    # Objects that start on the date in any timezone, start within a day either side of the date in UTC
+    window_start = datetime.datetime.combine(date - datetime.timedelta(days=1), datetime.time.min, tzinfo=datetime.timezone.utc)
+    window_end = window_start + datetime.timedelta(days=3)
+    in_window = models.Q(start__gte=window_start, start__lt=window_end)
+    session_stats = Session.objects.filter(in_window).aggregate(
+        count=models.Count("pk"),
+        with_link=models.Count("link"),
+        last_updated=models.Max("updated_at"),
+        ended_for_user=models.Count("pk", filter=models.Q(booked_by=user, end__lte=timezone.now())),
+    )
+    unavailable_period_stats = UnavailablePeriod.objects.filter(in_window).aggregate(
+        count=models.Count("pk"),
+        last_updated=models.Max("updated_at"),
+    )
+    return make_etag(
+        user.pk, user.utz, date,
+        *session_stats.values(), *unavailable_period_stats.values()
+    )
+
+
+def get_business_hours_settings_version() -> str:
+    """
+    Returns a version string for the business hours settings, that changes when any business hours settings,
+    or their weekly intervals or exceptions, are added, updated or deleted.
+
+    Cached in `business_hours_cache`.
+    """
+    def compute_version() -> str:
+        stats = [
+            model.objects.aggregate(
+                count=models.Count("pk"),
+                latest=models.Max("pk"),
+                last_updated=models.Max("updated_at"),
+            )
+            for model in (BusinessHoursSettings, BusinessHoursInterval, BusinessHoursException)
+        ]
+        return make_etag(*(value for model_stats in stats for value in model_stats.values()))
+    return business_hours_cache.get_or_set("version", compute_version)
+
+
+def get_bookings_last_updated() -> Optional[datetime.datetime]:
+    """Returns when a session or unavailable period was last added or updated"""
+    session_last_updated = Session.objects.aggregate(last_updated=models.Max("updated_at"))["last_updated"]
+    unavailable_period_last_updated = UnavailablePeriod.objects.aggregate(last_updated=models.Max("updated_at"))["last_updated"]
+    return max(filter(None, (session_last_updated, unavailable_period_last_updated)), default=None)
+
+
+def calendar_sessions_q(resource_id: Optional[Any] = None) -> models.Q:
+    """
+    Returns a filter for the sessions on a calendar
+
+    :param resource_id: Primary key of the calendar's resource. None for the default calendar
+    """
+    return models.Q(resource_id=resource_id)
+
+
+def calendar_unavailable_periods_q(resource_id: Optional[Any] = None) -> models.Q:
+    """
+    Returns a filter for the unavailable periods that block a calendar.
+    Unavailable periods with no resource block every calendar.
+
+    :param resource_id: Primary key of the calendar's resource. None for the default calendar
+    """
+    if resource_id is None:
+        return models.Q(resource_id=None)
+    return models.Q(resource_id=None) | models.Q(resource_id=resource_id)
+
+
+def overlapping_q(start: datetime.datetime, end: datetime.datetime) -> models.Q:
+    """
+    Returns a filter for periods that overlap (not just touch) the given time period.
+
+    The start is bounded on both sides, so that the filter is a range lookup on (resource, start) indexes
+    """
+    return models.Q(start__gte=start - MAX_BOOKING_DURATION, start__lt=end, end__gt=start)
+
+
+def get_unavailable_periods_within_time_period(
+    start: datetime.datetime, end: datetime.datetime, resource_id: Optional[Any] = None
+):
+    """
+    Returns all unavailable periods that overlap the given (time period) start and end datetime,
+    and block the calendar
 
     :param start: Start datetime of the time period
     :param end: End datetime of the time period
+    :param resource_id: Primary key of the calendar's resource. None for the default calendar
     """
-    q = models.Q(start__gt=start, start__lt=end) | models.Q(end__gt=start, end__lt=end)
-    return UnavailablePeriod.objects.filter(q)
+    return UnavailablePeriod.objects.filter(overlapping_q(start, end), calendar_unavailable_periods_q(resource_id))
 
 
-def get_sessions_booked_within_time_period(start: datetime.datetime, end: datetime.datetime):
+def get_sessions_booked_within_time_period(
+    start: datetime.datetime, end: datetime.datetime, resource_id: Optional[Any] = None
+):
     """
-    Return the session booked by the user within the given time period
+    Return the sessions on the calendar that overlap the given time period. Cancelled sessions
+    do not book the time period, as with `booking.availability.get_busy_periods`, and are not returned.
 
     :param start: Start datetime of the time period
     :param end: End datetime of the time period
+    :param resource_id: Primary key of the calendar's resource. None for the default calendar
     """
-    q = models.Q(start__gt=start, start__lt=end) | models.Q(end__gt=start, end__lt=end)
-    return Session.objects.filter(q)
+    return Session.objects.filter(overlapping_q(start, end), calendar_sessions_q(resource_id), cancelled=False)
 
 
 def get_overlapping_unavailable_periods(instance: UnavailablePeriod):
     """
     Returns all existing unavailable periods with start and end datetime overlap with the 
-    start and end datetime of the given instance
+    start and end datetime of the given instance, on the instance's calendar
 
     :param instance: UnavailablePeriod instance
     """
     time_period = (instance.start, instance.end)
-    unavailable_periods_within_time_period = get_unavailable_periods_within_time_period(*time_period)
+    unavailable_periods_within_time_period = get_unavailable_periods_within_time_period(*time_period, instance.resource_id)
     return unavailable_periods_within_time_period.exclude(pk=instance.pk)
 
 
-def check_if_time_period_is_available(start: datetime.datetime, end: datetime.datetime, exclude_sessions: Optional[List[Session]] = None) -> bool:
+def check_if_time_period_is_available(
+    start: datetime.datetime,
+    end: datetime.datetime,
+    exclude_sessions: Optional[List[Session]] = None,
+    resource_id: Optional[Any] = None
+) -> bool:
     """
-    Check if the time period is available for booking. That is,
-    if there are no sessions booked within the time period 
-    and no unavailable period overlaps with it.
+    Check if the time period is available for booking on a calendar. That is,
+    if there are no sessions (that are not cancelled) booked on the calendar within the time period 
+    and no unavailable period that blocks the calendar overlaps with it.
 
     :param start: Start datetime of the time period
     :param end: End datetime of the time period
     :param exclude_sessions: These sessions will not be considered when checking for availability
     of the time period.
+    :param resource_id: Primary key of the calendar's resource. None for the default calendar
     :returns: True if the time period is available for booking, False otherwise
     """
     exclude_sessions = exclude_sessions or []
-    booked = get_sessions_booked_within_time_period(start, end).exclude(
+    booked = get_sessions_booked_within_time_period(start, end, resource_id).exclude(
         pk__in=[session.pk for session in exclude_sessions]
     ).exists()
-    unavailable = get_unavailable_periods_within_time_period(start, end).exists()
+    unavailable = get_unavailable_periods_within_time_period(start, end, resource_id).exists()
     return not booked and not unavailable
 
 
 def get_business_hours_settings() -> BusinessHoursSettings:
-    """Returns the latest business hours settings. Creates one if none exists"""
+    """
+    Returns the latest business hours settings. Creates one if none exists.
+
+    Cached in `business_hours_cache`. The returned settings are shared, and must not be modified.
+    """
+    bh_settings = business_hours_cache.get("settings", None)
+    if bh_settings is not None:
+        return bh_settings
     try:
         bh_settings = BusinessHoursSettings.objects.latest("created_at")
     except BusinessHoursSettings.DoesNotExist:
         bh_settings = BusinessHoursSettings.objects.create()
+    business_hours_cache.set("settings", bh_settings)
     return bh_settings
 
 
-def check_if_time_period_is_within_business_hours(start: datetime.datetime, end: datetime.datetime) -> bool:
+def get_business_hours_schedule(resource_id: Optional[Any] = None) -> BusinessHoursSchedule:
+    """
+    Returns the compiled business hours of a calendar. The default calendar follows the site's weekly schedule.
+    A resource with its own opening or closing time is open at those times every day, in its timezone
+    (the site's by default), and otherwise follows the site's weekly schedule. The site's exceptions apply to all calendars.
+
+    Compiled once per version of the settings, and cached in `business_hours_cache`.
+
+    :param resource_id: Primary key of the calendar's resource. None for the default calendar
+    :raises Resource.DoesNotExist: If there is no such resource
+    """
+    def compile_schedule() -> BusinessHoursSchedule:
+        bh_settings = get_business_hours_settings()
+        if resource_id is None:
+            return compile_business_hours_schedule(bh_settings)
+        resource = Resource.objects.get(pk=resource_id)
+        hours = None
+        if resource.opens_at is not None or resource.closes_at is not None:
+            hours = (resource.opens_at or bh_settings.opens_at, resource.closes_at or bh_settings.closes_at)
+        return compile_business_hours_schedule(bh_settings, hours=hours, timezone=resource.timezone)
+    return business_hours_cache.get_or_set(f"schedule:{resource_id}", compile_schedule)
+
+
+def invalidate_business_hours_cache(sender: Any = None, **kwargs: Any) -> None:
+    """
+    Invalidates the cached business hours settings and schedules (of the site and resources) in every process,
+    once the change to them is committed
+    """
+    transaction.on_commit(business_hours_cache.invalidate, using=kwargs.get("using", None))
+    return None
+
+
+def check_if_time_period_is_within_business_hours(
+    start: datetime.datetime, end: datetime.datetime, resource_id: Optional[Any] = None
+) -> bool:
     """
-    Check if the given time period is within the business hours of the site.
+    Check if the given time period is within the business hours of a calendar.
 
     :param start: Start datetime of the time period
     :param end: End datetime of the time period
+    :param resource_id: Primary key of the calendar's resource. None for the default calendar
     :returns: True if the time period is within business hours, False otherwise
     """
-    bh_settings = get_business_hours_settings()
-    return bh_settings.datetime_is_within_business_hours(start) and bh_settings.datetime_is_within_business_hours(end)
+    return get_business_hours_schedule(resource_id).contains(start, end)
@@ -1,20 +1,39 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.utils import timezone
 from django.views import generic
-from typing import Any, Dict
+from typing import Any, Dict, Optional
+import asyncio
+import datetime
 import json
-from django.http import HttpRequest, HttpResponse, Http404, JsonResponse
+import uuid
+from urllib.parse import urlsplit
+from asgiref.sync import sync_to_async
+from django.http import HttpRequest, HttpResponse, Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import redirect
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from django.views.decorators.cache import cache_control
 
 from links.models import Link
-from .models import Session
-from .forms import SessionForm
-from helpers.response import response_message
+from links.managers import LinkQuerySet
+from .models import Resource, Session
+from .forms import SessionForm, ANY_RESOURCE
+from helpers.response import response_message, wants_compact_json, CompactJsonResponse, make_etag
 from .utils import (
     get_unavailable_times_on_date_for_user, get_bookings_by_user_on_date,
-    remove_booked_time_periods_from_unavailable_times, get_business_hours_settings
+    remove_booked_time_periods_from_unavailable_times, get_business_hours_settings,
+    aget_unavailable_times_on_date_for_user, aget_bookings_by_user_on_date,
+    to_compact_calendar_data, get_calendar_data_version,
+    get_business_hours_settings_version, get_bookings_last_updated, get_business_hours_schedule
 )
-from users.decorators import requires_account_verification, to_JsonResponse
+from .availability import get_month_availability, get_month_availability_of_any_resource, BOOKING_SLOT_MINUTES
+from .exports import stream_sessions_ics, get_calendar_feed_owner, get_calendar_feed_version
+from users.decorators import requires_account_verification, to_JsonResponse, async_login_required
 from helpers.logging import log_exception
 
 
@@ -22,11 +41,17 @@ from helpers.logging import log_exception
 class SessionLinkView(LoginRequiredMixin, generic.DetailView):
     """
     Performs necessary checks before redirecting to the internal (session) link's URL.
+
+    The checks are made on the link's lifecycle fields (see `booking.session_links`), without loading its session.
     """
     model = Link
     http_method_names = ["get"]
     slug_field = "identifier"
     slug_url_kwarg = "identifier"
+
+    def get_queryset(self) -> LinkQuerySet:
+        # Links that cannot be associated with a session are invalid
+        return Link.objects.bound().only("id", "identifier", "url", "active_from", "expires_at", "expired")
     
     def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
         try:
@@ -39,64 +64,60 @@ class SessionLinkView(LoginRequiredMixin, generic.DetailView):
                 status=404
             )
         
-        # Check if the link can be associated with a session
-        try:
-            session = Session.objects.get(link=link)
-        except Session.DoesNotExist:
+        # Check if the session has been cancelled or has ended. If so, the link should not be accessible
+        # Link becomes inactive 5 minutes after the session ends (when it is marked as expired by `gc_links`)
+        now = timezone.now()
+        if link.expired or (link.expires_at is not None and now > link.expires_at):
             return response_message(
                 request,
-                title="Session Not Found",
-                content="No session can be associated with this link.",
-                status=404
+                title="Link Expired",
+                content="This link is no longer valid. The session has ended or was cancelled.",
+                status=400
             )
         
-        else:
-            # Check if the session is cancelled or missed
-            if session.cancelled:
-                return response_message(
-                    request,
-                    title="Session Cancelled",
-                    content="This session has been cancelled.",
-                    status=400
-                )
-            if session.was_missed(tz=request.user.utz):
-                return response_message(
-                    request,
-                    title="Session Missed",
-                    content="This session was missed. Please reschedule and try again.",
-                    status=400
-                )
-            
-            # Check if the session has not ended. If it has, it should not be accessible
-            # Link becomes inactive 5 minutes after the session ends
-            now = timezone.now().astimezone(request.user.utz)
-            end_plus_5mins = session.end + timezone.timedelta(minutes=5)
-            if now > end_plus_5mins:
-                return response_message(
-                    request,
-                    title="Session Ended",
-                    content="This link is no longer valid. The session has ended.",
-                    status=400
-                )
-            
-            # Check if the session has not started. If it has, it should not be accessible
-            # Link becomes active 5 minutes before the session starts
-            start_minus_5mins = session.start - timezone.timedelta(minutes=5)
-            if now < start_minus_5mins:
-                return response_message(
-                    request,
-                    title="Session Not Started",
-                    content="This link is not yet active. The session has not started.",
-                    status=400
-                )
+        # Check if the session has not started. If it has, it should not be accessible
+        # Link becomes active 5 minutes before the session starts
+        if link.active_from is not None and now < link.active_from:
+            return response_message(
+                request,
+                title="Session Not Started",
+                content="This link is not yet active. The session has not started.",
+                status=400
+            )
         return redirect(link.url)
 
 
 
+def session_calendar_page_etag(request: HttpRequest, *args: Any, **kwargs: Any) -> Optional[str]:
+    """
+    Returns the ETag for the session calendar page.
+
+    The page changes with the request user's details, the business hours settings,
+    the date (business hours are displayed for today) and the CSRF token the forms use.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return None
+    return make_etag(
+        user.pk, user.utz, user.updated_at,
+        timezone.now().astimezone(user.utz).date(),
+        request.META.get("CSRF_COOKIE"),
+        get_business_hours_settings_version(),
+        get_bookings_last_updated(),
+    )
+
+
+
 class SessionCalendarView(LoginRequiredMixin, generic.TemplateView):
     template_name = 'booking/session_calendar.html'
     http_method_names = ["get", "post"]
 
+    # Browsers may keep the page but must revalidate it (using the ETag) before reuse
+    @method_decorator(cache_control(private=True, no_cache=True))
+    @method_decorator(condition(etag_func=session_calendar_page_etag))
+    def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        return super().get(request, *args, **kwargs)
+
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
         context = super().get_context_data(**kwargs)
         bh_settings = get_business_hours_settings()
@@ -107,6 +128,288 @@ class SessionCalendarView(LoginRequiredMixin, generic.TemplateView):
     def post(self, request: HttpRequest, *args: Any, **kwargs: Any) -> JsonResponse:
         data: Dict = json.loads(request.body)
         date: str = data.get('date', None)
+        return get_calendar_data_response(request, date)
+
+
+
+def get_calendar_data_response(request: HttpRequest, date: Optional[str]) -> JsonResponse:
+    """
+    Returns a response containing the unavailable times and the request user's bookings on the given date.
+
+    The compact calendar data format is used if the client requested it.
+
+    :param date: Date in the format "YYYY-MM-DD"
+    """
+    if not date:
+        return JsonResponse(
+            data={
+                "status": "error",
+                "detail": "Date is required."
+            },
+            status=400
+        )
+    try:
+        unavailable_times = get_unavailable_times_on_date_for_user(date, request.user)
+        bookings = get_bookings_by_user_on_date(date, user=request.user)
+        remove_booked_time_periods_from_unavailable_times(bookings, unavailable_times)
+    except Exception as exc:
+        log_exception(exc)
+        return JsonResponse(
+            data={
+                "status": "error",
+                "detail": "An error occurred. Please try again."
+            },
+            status=500
+        )
+    
+    if wants_compact_json(request):
+        return CompactJsonResponse(
+            data={
+                "status": "success",
+                "data": to_compact_calendar_data(date, unavailable_times, bookings)
+            },
+            status=200
+        )
+    return JsonResponse(
+        data={
+            "status": "success",
+            "detail": "Unavailable times for the given date fetched successfully.",
+            "data": {
+                "unavailable_times": unavailable_times,
+                "bookings": bookings
+            }
+        },
+        status=200
+    )
+
+
+def calendar_data_etag(request: HttpRequest, *args: Any, **kwargs: Any) -> Optional[str]:
+    """Returns the ETag for the calendar data requested, keyed on the calendar data version"""
+    date = request.GET.get("date", None)
+    if not date or not request.user.is_authenticated:
+        return None
+    try:
+        version = get_calendar_data_version(date, request.user)
+    except ValueError:
+        return None
+    return f"{version}-{'compact' if wants_compact_json(request) else 'full'}"
+
+
+
+class SessionCalendarDataView(LoginRequiredMixin, generic.View):
+    """
+    Cacheable (GET) variant of `SessionCalendarView.post`. The date is passed as the `date` query parameter.
+
+    Responds with 304 Not Modified if the calendar data for the date has not changed
+    since the version the client has, as identified by the `If-None-Match` header.
+    """
+    http_method_names = ["get"]
+
+    @method_decorator(condition(etag_func=calendar_data_etag))
+    def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> JsonResponse:
+        response = get_calendar_data_response(request, request.GET.get("date", None))
+        # The response depends on the requested format and must always be revalidated
+        response["Vary"] = "Accept, Cookie"
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+
+
+class SessionAvailabilityView(LoginRequiredMixin, generic.View):
+    """
+    Availability on each date of a month of a calendar, for the calendar to shade its month grid
+    and skip fully booked dates. The month is passed as the `month` query parameter ("YYYY-MM"), and
+    the calendar as the `resource` query parameter: a resource's ID, "any" for the time in which any
+    bookable resource is free, or nothing for the default calendar.
+
+    Months more than `AVAILABILITY_MAX_YEARS` years before or after the current month are rejected.
+
+    Dates are in the calendar's business hours' timezone (the site's, for "any"). `free` holds the percentage
+    of business hours that is free on each date of the month (in order), and `full` the days of the month
+    that are fully booked.
+
+    Supports conditional requests (`If-None-Match`).
+    """
+    http_method_names = ["get"]
+
+    def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        try:
+            month = datetime.datetime.strptime(request.GET.get("month", ""), "%Y-%m").date()
+        except ValueError:
+            return JsonResponse(
+                data={
+                    "status": "error",
+                    "detail": "A valid month (YYYY-MM) is required."
+                },
+                status=400
+            )
+        today = timezone.now().date()
+        if abs((month.year - today.year) * 12 + month.month - today.month) > settings.AVAILABILITY_MAX_YEARS * 12:
+            # The availability of each month requested is stored
+            return JsonResponse(
+                data={
+                    "status": "error",
+                    "detail": f"Only months up to {settings.AVAILABILITY_MAX_YEARS} year(s) before or after the current month can be requested."
+                },
+                status=400
+            )
+        resource_id = request.GET.get("resource", None) or None
+        if resource_id == ANY_RESOURCE:
+            days = get_month_availability_of_any_resource(month.year, month.month)
+            schedule = get_business_hours_schedule()
+        else:
+            try:
+                resource_id = uuid.UUID(resource_id) if resource_id else None
+                schedule = get_business_hours_schedule(resource_id)
+            except (ValueError, Resource.DoesNotExist):
+                return JsonResponse(
+                    data={
+                        "status": "error",
+                        "detail": "Resource not found."
+                    },
+                    status=404
+                )
+            days = get_month_availability(month.year, month.month, resource_id)
+
+        data = {
+            "month": month.strftime("%Y-%m"),
+            "resource": str(resource_id) if resource_id else None,
+            "timezone": str(schedule.timezone),
+            "slot": BOOKING_SLOT_MINUTES,
+            "free": [
+                round(100 * day.free_minutes / day.business_minutes) if day.business_minutes else 0
+                for day in days
+            ],
+            "full": [day.date.day for day in days if day.fully_booked],
+            "closed": [day.date.day for day in days if not day.business_minutes],
+        }
+        etag = f'"{make_etag(*data.values())}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = JsonResponse(data={"status": "success", "data": data}, status=200)
+        response["ETag"] = etag
+        # Bookings by others change the availability, so it must always be revalidated
+        response["Vary"] = "Cookie"
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+
+
+class SessionBookingView(generic.View):
+    model = Session
+    form_class = SessionForm
+    http_method_names = ["post"]
+
+    @to_JsonResponse
+    @requires_account_verification
+    def post(self, request: HttpRequest, *args: Any, **kwargs: Any) -> JsonResponse:
+        data: Dict = json.loads(request.body)
+        data["booked_by"] = request.user
+        data["timezone"] = request.user.utz
+        session_form = self.form_class(data=data)
+
+        if session_form.is_valid():
+            session = session_form.save()
+            return JsonResponse(
+                data={
+                    "status": "success",
+                    "detail": "Session booked successfully.",
+                    "data": {
+                        "session_id": session.id
+                    }
+                },
+                status=201
+            )
+        return JsonResponse(
+            data={
+                "status": "error",
+                "detail": "An error occurred. Please try again.",
+                "errors": session_form.errors
+            },
+            status=400
+        )
+
+
+
+class SessionUpdateView(generic.UpdateView):
+    model = Session
+    form_class = SessionForm
+    http_method_names = ["post"]
+
+    @to_JsonResponse
+    @requires_account_verification
+    def post(self, request: HttpRequest, *args: Any, **kwargs: Any) -> JsonResponse:
+        data: Dict = json.loads(request.body)
+        session_id = data.pop('session-id', None)
+
+        if not session_id:
+            return JsonResponse(
+                data={
+                    "status": "error",
+                    "detail": "Session ID is required."
+                },
+                status=400
+            )
+        try:
+            session = Session.objects.get(id=session_id)
+        except Session.DoesNotExist:
+            return JsonResponse(
+                data={
+                    "status": "error",
+                    "detail": "Session not found."
+                },
+                status=404
+            )
+        if session.booked_by_id != request.user.pk:
+            return JsonResponse(
+                data={
+                    "status": "error",
+                    "detail": "You are not authorized to perform this action."
+                },
+                status=403
+            )
+        
+        data["booked_by"] = request.user
+        # Sessions stay with their resource unless another is chosen
+        data.setdefault("resource", session.resource_id)
+        session_form = self.form_class(data=data, instance=session)
+
+        if session_form.is_valid():
+            session: Session = session_form.save()
+            return JsonResponse(
+                data={
+                    "status": "success",
+                    "detail": "Session updated successfully.",
+                    "data": {
+                        "session_id": session.id
+                    }
+                },
+                status=200
+            )
+        return JsonResponse(
+            data={
+                "status": "error",
+                "detail": "An error occurred. Please try again.",
+                "errors": session_form.errors
+            },
+            status=400
+        )
+
+
+
+class AsyncSessionCalendarView(generic.View):
+    """
+    Async variant of `SessionCalendarView.post`.
+
+    Best served through the ASGI application (`meeting_calendar.asgi`),
+    where it does not need to be adapted to run in a sync thread.
+    """
+    http_method_names = ["post"]
+
+    @async_login_required
+    async def post(self, request: HttpRequest, *args: Any, **kwargs: Any) -> JsonResponse:
+        data: Dict = json.loads(request.body)
+        date: str = data.get('date', None)
 
         if not date:
             return JsonResponse(
@@ -116,9 +419,12 @@ class SessionCalendarView(LoginRequiredMixin, generic.TemplateView):
                 },
                 status=400
             )
+        user = await request.auser()
         try:
-            unavailable_times = get_unavailable_times_on_date_for_user(date, request.user)
-            bookings = get_bookings_by_user_on_date(date, user=request.user)
+            unavailable_times, bookings = await asyncio.gather(
+                aget_unavailable_times_on_date_for_user(date, user),
+                aget_bookings_by_user_on_date(date, user=user)
+            )
             remove_booked_time_periods_from_unavailable_times(bookings, unavailable_times)
         except Exception as exc:
             log_exception(exc)
@@ -129,6 +435,15 @@ class SessionCalendarView(LoginRequiredMixin, generic.TemplateView):
                 },
                 status=500
             )
+        
+        if wants_compact_json(request):
+            return CompactJsonResponse(
+                data={
+                    "status": "success",
+                    "data": to_compact_calendar_data(date, unavailable_times, bookings)
+                },
+                status=200
+            )
         return JsonResponse(
             data={
                 "status": "success",
@@ -143,22 +458,28 @@ class SessionCalendarView(LoginRequiredMixin, generic.TemplateView):
 
 
 
-class SessionBookingView(generic.View):
+class AsyncSessionBookingView(generic.View):
+    """Async variant of `SessionBookingView`"""
     model = Session
     form_class = SessionForm
     http_method_names = ["post"]
 
     @to_JsonResponse
+    @async_login_required
     @requires_account_verification
-    def post(self, request: HttpRequest, *args: Any, **kwargs: Any) -> JsonResponse:
+    async def post(self, request: HttpRequest, *args: Any, **kwargs: Any) -> JsonResponse:
         data: Dict = json.loads(request.body)
-        data["booked_by"] = request.user
-        data["timezone"] = request.user.utz
-        session_form = self.form_class(data=data)
+        user = await request.auser()
+        data["booked_by"] = user
+        data["timezone"] = user.utz
+        # The form reads the request user from django-utz's thread local storage
+        # and runs business hours and availability queries through the sync ORM
+        # on validation, so it has to be created and validated in a sync thread
+        session_form = await sync_to_async(self.form_class)(data=data)
 
-        if session_form.is_valid():
-            session = session_form.save(commit=False)
-            session.save()
+        if await sync_to_async(session_form.is_valid)():
+            # Saved with its link, if it was added or changed
+            session = await sync_to_async(session_form.save)()
             return JsonResponse(
                 data={
                     "status": "success",
@@ -180,14 +501,16 @@ class SessionBookingView(generic.View):
 
 
 
-class SessionUpdateView(generic.UpdateView):
+class AsyncSessionUpdateView(generic.View):
+    """Async variant of `SessionUpdateView`"""
     model = Session
     form_class = SessionForm
     http_method_names = ["post"]
 
     @to_JsonResponse
+    @async_login_required
     @requires_account_verification
-    def post(self, request: HttpRequest, *args: Any, **kwargs: Any) -> JsonResponse:
+    async def post(self, request: HttpRequest, *args: Any, **kwargs: Any) -> JsonResponse:
         data: Dict = json.loads(request.body)
         session_id = data.pop('session-id', None)
 
@@ -199,8 +522,9 @@ class SessionUpdateView(generic.UpdateView):
                 },
                 status=400
             )
+        user = await request.auser()
         try:
-            session = Session.objects.get(id=session_id)
+            session = await Session.objects.select_related("link").aget(id=session_id)
         except Session.DoesNotExist:
             return JsonResponse(
                 data={
@@ -209,7 +533,7 @@ class SessionUpdateView(generic.UpdateView):
                 },
                 status=404
             )
-        if session.booked_by != request.user:
+        if session.booked_by_id != user.pk:
             return JsonResponse(
                 data={
                     "status": "error",
@@ -218,12 +542,14 @@ class SessionUpdateView(generic.UpdateView):
                 status=403
             )
         
-        data["booked_by"] = request.user
-        session_form = self.form_class(data=data, instance=session)
+        data["booked_by"] = user
+        # Sessions stay with their resource unless another is chosen
+        data.setdefault("resource", session.resource_id)
+        session_form = await sync_to_async(self.form_class)(data=data, instance=session)
 
-        if session_form.is_valid():
-            session: Session = session_form.save(commit=False)
-            session.save()
+        if await sync_to_async(session_form.is_valid)():
+            # Saved with its link, if it was added or changed
+            session: Session = await sync_to_async(session_form.save)()
             return JsonResponse(
                 data={
                     "status": "success",
@@ -245,8 +571,69 @@ class SessionUpdateView(generic.UpdateView):
 
 
 
+class SessionCalendarFeedView(generic.View):
+    """
+    iCalendar (`.ics`) feed of a user's sessions, for calendar clients to subscribe to.
+
+    The user is identified by the signed token in the URL, as calendar clients cannot log in.
+    The feed is streamed, and supports conditional requests (`If-None-Match`, `If-Modified-Since`).
+    Clients can fetch only the sessions booked or updated since a given datetime with the `since`
+    query parameter (ISO 8601, UTC if no offset is given), e.g. the feed's last `Last-Modified` value.
+    Deleted sessions are not included in incremental fetches; cancelled sessions are, as cancelled events.
+    """
+    http_method_names = ["get", "head"]
+
+    def get(self, request: HttpRequest, token: str, *args: Any, **kwargs: Any) -> HttpResponse:
+        user = get_calendar_feed_owner(token)
+        if user is None:
+            raise Http404("Calendar feed not found.")
+        
+        since = request.GET.get("since", None)
+        if since:
+            since = parse_datetime(since.replace(" ", "+"))
+            if since is None:
+                return HttpResponse("Invalid `since` datetime. Use ISO 8601.", status=400, content_type="text/plain")
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since, datetime.timezone.utc)
+
+        version = get_calendar_feed_version(user, since=since)
+        etag = f'"{make_etag(user.pk, version["count"], version["last_updated"], since)}"'
+        last_modified = int(version["last_updated"].timestamp()) if version["last_updated"] else None
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            sessions = Session.objects.filter(booked_by=user).order_by("start")
+            if since is not None:
+                sessions = sessions.filter(updated_at__gte=since)
+            # Resolve the link URL prefix once, instead of reversing the URL for each session
+            link_url_prefix = request.build_absolute_uri(
+                reverse("booking:session_link", kwargs={"identifier": "IDENTIFIER"})
+            ).removesuffix("IDENTIFIER/")
+            response = StreamingHttpResponse(
+                stream_sessions_ics(
+                    sessions,
+                    calendar_name=f"{settings.SITE_NAME} sessions",
+                    uid_domain=urlsplit(settings.SITE_URL).hostname or request.get_host(),
+                    link_url=lambda identifier: f"{link_url_prefix}{identifier}/"
+                ),
+                content_type="text/calendar; charset=utf-8"
+            )
+            response["Content-Disposition"] = 'inline; filename="sessions.ics"'
+        
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+
+
 session_link_view = SessionLinkView.as_view()
 session_calendar_view = SessionCalendarView.as_view()
+session_calendar_data_view = SessionCalendarDataView.as_view()
+session_availability_view = SessionAvailabilityView.as_view()
 session_booking_view = SessionBookingView.as_view()
 session_update_view = SessionUpdateView.as_view()
-
+async_session_calendar_view = AsyncSessionCalendarView.as_view()
+async_session_booking_view = AsyncSessionBookingView.as_view()
+async_session_update_view = AsyncSessionUpdateView.as_view()
+session_calendar_feed_view = SessionCalendarFeedView.as_view()
@@ -5,7 +5,7 @@ import datetime
 from django.http import HttpRequest
 from typing import Optional
 
-from .models import BusinessHoursSettings
+from .models import BusinessHoursSettings, BusinessHoursInterval, BusinessHoursException
 from .forms import BusinessHoursSettingsForm
 
 
@@ -13,9 +13,24 @@ admin.site.unregister(APIKey)
 admin.site.unregister(Group)
 
 
+class BusinessHoursIntervalInline(admin.TabularInline):
+    """Weekly schedule. Weekdays with no intervals are closed, unless there are none at all"""
+    model = BusinessHoursInterval
+    fields = ["weekday", "opens_at", "closes_at"]
+    extra = 0
+
+
+class BusinessHoursExceptionInline(admin.TabularInline):
+    """Dates whose business hours are not those of their weekday, such as holidays"""
+    model = BusinessHoursException
+    fields = ["date", "opens_at", "closes_at", "reason"]
+    extra = 0
+
+
 @admin.register(BusinessHoursSettings)
 class BusinessHoursSettingsModelAdmin(admin.ModelAdmin):
     form = BusinessHoursSettingsForm
+    inlines = [BusinessHoursIntervalInline, BusinessHoursExceptionInline]
     readonly_fields = ["created_at", "updated_at"]
     list_display = ["opens_at", "closes_at", "timezone", "created", "updated"]
 
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self) -> None:
+        from .search import connect_search_index_signals
+        # Keep the admin search index in sync with the indexed models
+        connect_search_index_signals()
+        return None
@@ -0,0 +1,189 @@
+"""
+Utilities for bundling and minifying the frontend scripts used by each page.
+
+Bundles are defined in the `SCRIPT_BUNDLES` setting as a mapping of bundle names to
+an ordered list of static script paths. The `bundle_scripts` management command builds
+each bundle into a single content-hashed file in `SCRIPT_BUNDLES_ROOT`, which is served
+as a static file, and records the built file names in a manifest.
+"""
+import functools
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+
+
+MANIFEST_NAME = "manifest.json"
+# Static URL prefix the bundles directory is served under
+BUNDLES_STATIC_PREFIX = "bundles"
+
+
+def get_script_bundles() -> Dict[str, List[str]]:
+    """Returns the script bundles defined in settings"""
+    return getattr(settings, "SCRIPT_BUNDLES", {})
+
+
+def get_bundle_sources(name: str) -> List[str]:
+    """
+    Returns the static paths of the scripts in the given bundle.
+
+    :raises KeyError: If no bundle with the given name is defined.
+    """
+    return get_script_bundles()[name]
+
+
+def find_static_file(path: str) -> str:
+    """
+    Returns the absolute file path of a static file.
+
+    :raises FileNotFoundError: If the static file cannot be found by any of the staticfiles finders.
+    """
+    absolute_path = finders.find(path)
+    if not absolute_path:
+        raise FileNotFoundError(f"Static file '{path}' could not be found")
+    return absolute_path
+
+
+def minify_js(source: str) -> str:
+    """
+    Conservatively minifies JavaScript source.
+
+    Comments, indentation and blank lines are removed. Line breaks are kept so that
+    automatic semicolon insertion behaves exactly as it does in the original source, and
+    the contents of string, template and regular expression literals are left untouched.
+    """
+    output = []
+    # Whether each output line started inside a template literal, in which case its whitespace is significant
+    line_starts_in_template = [False]
+    i = 0
+    length = len(source)
+    last_significant = ""
+
+    while i < length:
+        char = source[i]
+        next_char = source[i + 1] if i + 1 < length else ""
+
+        if char == "/" and next_char == "/":
+            # Line comment. Skip to the end of the line
+            end = source.find("\n", i)
+            i = length if end == -1 else end
+            continue
+
+        if char == "/" and next_char == "*":
+            # Block comment. Keep a line break if the comment spanned one
+            end = source.find("*/", i + 2)
+            end = length if end == -1 else end + 2
+            if "\n" in source[i:end]:
+                output.append("\n")
+                line_starts_in_template.append(False)
+            i = end
+            continue
+
+        if char in ("'", '"', "`") or (char == "/" and (not last_significant or last_significant in "(,=:[!&|?{};+-*%<>~^")):
+            # String, template or regular expression literal. Copy it verbatim
+            j = i + 1
+            in_class = False
+            while j < length:
+                c = source[j]
+                if c == "\\":
+                    j += 2
+                    continue
+                if char == "/":
+                    if c == "[":
+                        in_class = True
+                    elif c == "]":
+                        in_class = False
+                    elif c == "/" and not in_class:
+                        break
+                    elif c == "\n":
+                        break
+                elif c == char:
+                    break
+                elif c == "\n" and char == "`":
+                    line_starts_in_template.append(True)
+                j += 1
+            output.append(source[i:j + 1])
+            last_significant = char
+            i = j + 1
+            continue
+
+        if char == "\n":
+            line_starts_in_template.append(False)
+        elif not char.isspace():
+            last_significant = char
+        output.append(char)
+        i += 1
+
+    lines = "".join(output).split("\n")
+    minified_lines = []
+    for line, starts_in_template in zip(lines, line_starts_in_template):
+        if starts_in_template:
+            minified_lines.append(line.rstrip() if line.strip() else line)
+            continue
+        line = line.strip()
+        if line:
+            minified_lines.append(line)
+    return "\n".join(minified_lines) + "\n"
+
+
+def build_bundle(name: str, output_dir: Path, minify: bool = True) -> str:
+    """
+    Builds the given bundle into a single content-hashed file in the output directory.
+
+    :param name: The name of the bundle.
+    :param output_dir: The directory to write the bundle to.
+    :param minify: Whether to minify the bundled scripts.
+    :return: The file name of the built bundle.
+    """
+    parts = []
+    for source_path in get_bundle_sources(name):
+        with open(find_static_file(source_path), encoding="utf-8") as file:
+            source = file.read()
+        if minify:
+            source = minify_js(source)
+        # Terminate each script so that scripts relying on automatic
+        # semicolon insertion at the end of the file are not joined together
+        parts.append(f"{source.rstrip()}\n;\n")
+
+    content = "".join(parts).encode("utf-8")
+    content_hash = hashlib.md5(content, usedforsecurity=False).hexdigest()[:12]
+    file_name = f"{name}.{content_hash}.js"
+    with open(output_dir / file_name, "wb") as file:
+        file.write(content)
+    return file_name
+
+
+def write_manifest(output_dir: Path, bundles: Dict[str, str]) -> None:
+    """Writes the manifest of built bundle file names to the output directory"""
+    with open(output_dir / MANIFEST_NAME, "w", encoding="utf-8") as file:
+        json.dump({"bundles": bundles}, file, indent=4)
+    load_manifest.cache_clear()
+    return None
+
+
+@functools.lru_cache(maxsize=1)
+def load_manifest() -> Dict[str, str]:
+    """Returns the built bundle file names by bundle name. Empty if no bundles have been built"""
+    manifest_path = os.path.join(settings.SCRIPT_BUNDLES_ROOT, MANIFEST_NAME)
+    try:
+        with open(manifest_path, encoding="utf-8") as file:
+            return json.load(file).get("bundles", {})
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def get_bundle_static_path(name: str) -> Optional[str]:
+    """
+    Returns the static path of the built bundle with the given name,
+    or None if bundling is disabled or the bundle has not been built.
+    """
+    if not getattr(settings, "SCRIPT_BUNDLES_ENABLED", False):
+        return None
+    file_name = load_manifest().get(name, None)
+    if not file_name:
+        return None
+    return f"{BUNDLES_STATIC_PREFIX}/{file_name}"
@@ -0,0 +1,158 @@
+"""
+Business hours compiled into a schedule (`BusinessHoursSchedule`) that answers, without creating datetimes,
+whether a time period is within business hours, and which periods of a date are.
+
+A schedule holds the open periods of each weekday and of each date with exceptions, as sorted, disjoint
+(opens, closes) pairs of seconds since midnight in the business hours' timezone. Datetimes are converted to
+(date, seconds since midnight) in that timezone with integer arithmetic on their timestamp, and a cached lookup
+of the timezone's UTC offset (`get_utc_offset`).
+
+Schedules are compiled from the business hours settings with `compile_business_hours_schedule`,
+once per version of the settings (see `booking.utils.get_business_hours_schedule`), as compiling them queries
+the settings' intervals and exceptions.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+import bisect
+import datetime
+import functools
+
+from .models import BusinessHoursSettings
+
+
+# Open periods of a day, as sorted, disjoint (opens, closes) pairs of seconds since midnight
+DayIntervals = Tuple[Tuple[int, int], ...]
+
+SECONDS_PER_DAY = 24 * 60 * 60
+# UTC offsets are looked up per this many seconds. Timezones only change offset on the quarter hour
+UTC_OFFSET_RESOLUTION = 15 * 60
+# Ordinal of the Unix epoch's date, to convert days since the epoch to dates
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+@functools.lru_cache(maxsize=16384)
+def get_utc_offset(tz: datetime.tzinfo, step: int) -> int:
+    """
+    Returns the UTC offset of the timezone, in seconds, at the given step since the Unix epoch.
+
+    :param step: Number of `UTC_OFFSET_RESOLUTION` seconds since the Unix epoch
+    """
+    utcoffset = datetime.datetime.fromtimestamp(step * UTC_OFFSET_RESOLUTION, tz).utcoffset()
+    return int(utcoffset.total_seconds()) if utcoffset is not None else 0
+
+
+def time_to_seconds(time: datetime.time) -> int:
+    return time.hour * 3600 + time.minute * 60 + time.second
+
+
+def merge_intervals(intervals: Iterable[Tuple[int, int]]) -> DayIntervals:
+    """Returns the union of the intervals, as sorted, disjoint intervals. Empty intervals are dropped"""
+    merged: List[Tuple[int, int]] = []
+    for opens, closes in sorted(intervals):
+        if closes <= opens:
+            continue
+        if merged and opens <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], closes))
+        else:
+            merged.append((opens, closes))
+    return tuple(merged)
+
+
+class BusinessHoursSchedule:
+    """
+    Business hours compiled for lookups.
+
+    :param timezone: Timezone of the business hours
+    :param weekly: Open periods of each weekday (Monday first)
+    :param exceptions: Open periods of the dates (by ordinal) whose business hours are not those of their weekday
+    """
+    __slots__ = ("timezone", "weekly", "exceptions")
+
+    def __init__(self, timezone: datetime.tzinfo, weekly: Tuple[DayIntervals, ...], exceptions: Dict[int, DayIntervals]) -> None:
+        self.timezone = timezone
+        self.weekly = weekly
+        self.exceptions = exceptions
+
+    def __repr__(self) -> str:
+        return f"<BusinessHoursSchedule {self.timezone} weekly={self.weekly} exceptions={len(self.exceptions)}>"
+
+    def to_local(self, dt: datetime.datetime) -> Tuple[int, float]:
+        """Returns the ordinal of the date, and the seconds since midnight, of the (aware) datetime in the schedule's timezone"""
+        timestamp = dt.timestamp()
+        local = timestamp + get_utc_offset(self.timezone, int(timestamp // UTC_OFFSET_RESOLUTION))
+        days, seconds = divmod(local, SECONDS_PER_DAY)
+        return EPOCH_ORDINAL + int(days), seconds
+
+    def intervals_on_ordinal(self, ordinal: int) -> DayIntervals:
+        """Returns the open periods of the date with the given ordinal"""
+        intervals = self.exceptions.get(ordinal, None)
+        if intervals is None:
+            # Ordinal 1 (0001-01-01) is a Monday
+            intervals = self.weekly[(ordinal - 1) % 7]
+        return intervals
+
+    def intervals_on(self, date: datetime.date) -> DayIntervals:
+        """Returns the open periods of the date, as (opens, closes) seconds since midnight in the schedule's timezone"""
+        return self.intervals_on_ordinal(date.toordinal())
+
+    def contains(self, start: datetime.datetime, end: datetime.datetime) -> bool:
+        """Returns True if the time period is within a single open period. Opening and closing times are included"""
+        start_ordinal, start_seconds = self.to_local(start)
+        end_ordinal, end_seconds = self.to_local(end)
+        if end_ordinal != start_ordinal:
+            return False
+        intervals = self.intervals_on_ordinal(start_ordinal)
+        # The last period that opens at or before the start
+        index = bisect.bisect_right(intervals, (start_seconds, SECONDS_PER_DAY)) - 1
+        return index >= 0 and end_seconds <= intervals[index][1] and start_seconds <= end_seconds
+
+    def is_open_on(self, date: datetime.date) -> bool:
+        return bool(self.intervals_on(date))
+
+    def periods_on(self, date: datetime.date) -> List[Tuple[datetime.datetime, datetime.datetime]]:
+        """Returns the open periods of the date (in the schedule's timezone), as (UTC) datetimes"""
+        midnight = datetime.datetime.combine(date, datetime.time.min, tzinfo=self.timezone)
+        periods = []
+        for opens, closes in self.intervals_on(date):
+            # Added as wall time, then converted, so that periods on dates with DST changes open at their wall time
+            periods.append((
+                (midnight + datetime.timedelta(seconds=opens)).astimezone(datetime.timezone.utc),
+                (midnight + datetime.timedelta(seconds=closes)).astimezone(datetime.timezone.utc),
+            ))
+        return periods
+
+
+def compile_business_hours_schedule(
+    bh_settings: BusinessHoursSettings,
+    hours: Optional[Tuple[datetime.time, datetime.time]] = None,
+    timezone: Optional[datetime.tzinfo] = None
+) -> BusinessHoursSchedule:
+    """
+    Compiles the business hours settings, with their weekly intervals and exceptions, into a schedule.
+
+    :param bh_settings: The (saved) business hours settings
+    :param hours: Opening and closing times every day, instead of the settings' weekly schedule. Exceptions still apply
+    :param timezone: Timezone of the schedule, instead of the settings'
+    """
+    if hours is not None:
+        weekly = (merge_intervals([(time_to_seconds(hours[0]), time_to_seconds(hours[1]))]),) * 7
+    else:
+        weekly_intervals: List[List[Tuple[int, int]]] = [[] for _ in range(7)]
+        intervals = list(bh_settings.intervals.values_list("weekday", "opens_at", "closes_at")) if bh_settings.pk else []
+        for weekday, opens_at, closes_at in intervals:
+            weekly_intervals[weekday].append((time_to_seconds(opens_at), time_to_seconds(closes_at)))
+        if not intervals:
+            daily = [(time_to_seconds(bh_settings.opens_at), time_to_seconds(bh_settings.closes_at))]
+            weekly_intervals = [daily] * 7
+        weekly = tuple(merge_intervals(day_intervals) for day_intervals in weekly_intervals)
+
+    exception_intervals: Dict[int, List[Tuple[int, int]]] = {}
+    exceptions = bh_settings.exceptions.values_list("date", "opens_at", "closes_at") if bh_settings.pk else []
+    for date, opens_at, closes_at in exceptions:
+        day_intervals = exception_intervals.setdefault(date.toordinal(), [])
+        if opens_at is not None and closes_at is not None:
+            day_intervals.append((time_to_seconds(opens_at), time_to_seconds(closes_at)))
+    return BusinessHoursSchedule(
+        timezone=timezone or bh_settings.timezone,
+        weekly=weekly,
+        exceptions={ordinal: merge_intervals(day_intervals) for ordinal, day_intervals in exception_intervals.items()},
+    )
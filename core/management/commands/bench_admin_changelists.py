@@ -0,0 +1,119 @@
+import datetime
+import time
+import uuid
+from typing import Any, List
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from booking.models import Session, UnavailablePeriod
+from helpers.benchmark import summarize_latencies, format_summary
+from links.models import Link
+from news.models import News
+from users.models import UserAccount
+
+
+CHANGELISTS = (
+    "admin:booking_session_changelist",
+    "admin:booking_unavailableperiod_changelist",
+    "admin:links_link_changelist",
+    "admin:news_news_changelist",
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed sessions, unavailable periods, links and news, and benchmark the render time "
+        "of their admin changelists, with estimated and exact counts"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100000, help="Number of sessions to seed (e.g. 1000000)")
+        parser.add_argument("--iterations", type=int, default=5, help="Number of renders to time per changelist")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Number of rows to insert per query")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        run_id = uuid.uuid4().hex[:8]
+        admin_user = UserAccount.objects.create_superuser(
+            email=f"bench-{run_id}@example.com", password=uuid.uuid4().hex, name="Benchmark Admin",
+            is_verified=True, timezone="Africa/Lagos"
+        )
+        self.unavailable_period_ids: List[uuid.UUID] = []
+        try:
+            self.stdout.write(f"Seeding {options['rows']} sessions...")
+            self.seed(admin_user, run_id, options["rows"], options["batch_size"])
+            client = Client()
+            client.force_login(admin_user)
+            for url_name in CHANGELISTS:
+                url = reverse(url_name)
+                exact = self.bench_changelist(client, url, options["iterations"], estimated=False)
+                estimated = self.bench_changelist(client, url, options["iterations"], estimated=True)
+                for label, summary in (("exact count    ", exact), ("estimated count", estimated)):
+                    self.stdout.write(f"{format_summary(f'{url_name} ({label})', summary)} queries={summary['queries']}")
+        finally:
+            self.stdout.write("Cleaning up...")
+            Session.objects.filter(booked_by=admin_user).delete()
+            News.objects.filter(author=admin_user).delete()
+            UnavailablePeriod.objects.filter(pk__in=self.unavailable_period_ids).delete()
+            admin_user.delete()
+        return None
+
+
+    def seed(self, user: UserAccount, run_id: str, rows: int, batch_size: int) -> None:
+        """
+        Inserts `rows` sessions (every other one with a link), and a tenth as many unavailable periods and news,
+        bypassing model `save` methods
+        """
+        start = timezone.now() - datetime.timedelta(days=365)
+        with transaction.atomic():
+            for offset in range(0, rows, batch_size):
+                indices = range(offset, min(offset + batch_size, rows))
+                links = Link.objects.bulk_create([
+                    Link(identifier=f"{run_id[:2]}{index:08d}", url=f"https://example.com/{index}", created_by=user)
+                    for index in indices if index % 2
+                ])
+                links_iter = iter(links)
+                sessions = []
+                for index in indices:
+                    session_start = start + datetime.timedelta(minutes=30 * index)
+                    sessions.append(Session(
+                        title=f"Benchmark session {index}", start=session_start,
+                        end=session_start + datetime.timedelta(minutes=30), booked_by=user,
+                        link=next(links_iter) if index % 2 else None
+                    ))
+                Session.objects.bulk_create(sessions)
+
+                periods = [
+                    UnavailablePeriod(
+                        start=start + datetime.timedelta(hours=index),
+                        end=start + datetime.timedelta(hours=index, minutes=30)
+                    )
+                    for index in indices if index % 10 == 0
+                ]
+                UnavailablePeriod.objects.bulk_create(periods)
+                self.unavailable_period_ids.extend(period.pk for period in periods)
+                News.objects.bulk_create([
+                    News(headline=f"Benchmark news {index}", content="Benchmark", author=user)
+                    for index in indices if index % 10 == 0
+                ])
+        return None
+
+
+    def bench_changelist(self, client: Client, url: str, iterations: int, estimated: bool):
+        """Times rendering the changelist, with estimated counts enabled or disabled"""
+        threshold = 0 if estimated else None
+        latencies = []
+        with override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=threshold):
+            for _ in range(iterations):
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    response = client.get(url)
+                    latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.status_code
+        summary = summarize_latencies(latencies)
+        summary["queries"] = len(queries)
+        return summary
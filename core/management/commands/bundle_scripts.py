@@ -0,0 +1,131 @@
+import os
+import re
+from typing import Any, Dict, List, Set, Tuple
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.template import engines
+from django.template.loaders.app_directories import get_app_template_dirs
+
+from core.bundling import (
+    build_bundle, write_manifest, get_script_bundles, get_bundle_sources,
+    find_static_file, load_manifest
+)
+
+
+EXTENDS_OR_INCLUDE_PATTERN = re.compile(r"""{%\s*(?:extends|include)\s+["']([^"']+)["']""")
+STATIC_ASSET_PATTERN = re.compile(r"""<(?:script|link)[^>]+{%\s*static\s+["']([^"']+)["']\s*%}""")
+SCRIPT_BUNDLE_PATTERN = re.compile(r"""{%\s*script_bundle\s+["']([^"']+)["']\s*%}""")
+EXTERNAL_ASSET_PATTERN = re.compile(r"""<(?:script|link)[^>]+(?:src|href)=["']https?://""")
+COMMENT_PATTERN = re.compile(r"{%\s*comment\s*%}.*?{%\s*endcomment\s*%}|<!--.*?-->", re.DOTALL)
+
+
+class Command(BaseCommand):
+    help = (
+        "Bundle and minify the scripts of each page into content-hashed files, as defined in the `SCRIPT_BUNDLES` setting. "
+        "Run before `collectstatic`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--no-minify", action="store_true", help="Concatenate the scripts without minifying them")
+        parser.add_argument(
+            "--report", action="store_true",
+            help="Report the static asset request count and weight of each page template, unbundled and bundled"
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        output_dir = settings.SCRIPT_BUNDLES_ROOT
+        os.makedirs(output_dir, exist_ok=True)
+        # Remove previously built bundles so stale files are not collected
+        for file_name in os.listdir(output_dir):
+            if file_name.endswith(".js"):
+                os.remove(output_dir / file_name)
+
+        built = {}
+        for name in get_script_bundles():
+            try:
+                built[name] = build_bundle(name, output_dir, minify=not options["no_minify"])
+            except FileNotFoundError as exc:
+                raise CommandError(f"Could not build bundle '{name}': {exc}")
+            self.stdout.write(f"Built bundle '{name}' -> {built[name]}")
+        write_manifest(output_dir, built)
+        self.stdout.write(self.style.SUCCESS(f"{len(built)} bundle(s) written to {output_dir}"))
+
+        if options["report"]:
+            self.report()
+        return None
+
+
+    def report(self) -> None:
+        """Writes the static asset request count and weight of each page template"""
+        self.stdout.write("\ntemplate: local requests / bytes (unbundled -> bundled), external requests")
+        for template_name in sorted(self.get_page_templates()):
+            unbundled, bundled, external = self.get_template_assets(template_name)
+            if not unbundled and not external:
+                continue
+            self.stdout.write(
+                f"{template_name}: {len(unbundled)} / {self.get_weight(unbundled)} -> "
+                f"{len(bundled)} / {self.get_weight(bundled)}, {external} external"
+            )
+        return None
+
+
+    def get_page_templates(self) -> List[str]:
+        """Returns the names of the templates of the project's apps, excluding emails"""
+        template_names = []
+        for template_dir in get_app_template_dirs("templates"):
+            if not str(template_dir).startswith(str(settings.BASE_DIR)):
+                continue
+            for root, _, files in os.walk(template_dir):
+                for file_name in files:
+                    name = os.path.relpath(os.path.join(root, file_name), template_dir).replace(os.sep, "/")
+                    if file_name.endswith(".html") and not name.startswith("emails/"):
+                        template_names.append(name)
+        return template_names
+
+
+    def get_template_assets(self, template_name: str, seen: Set[str] = None) -> Tuple[List[str], List[str], int]:
+        """
+        Returns the static paths of the local assets the template (and the templates it extends or includes)
+        loads unbundled and bundled, and the number of external assets it loads.
+        """
+        seen = seen if seen is not None else set()
+        if template_name in seen:
+            return [], [], 0
+        seen.add(template_name)
+
+        template = engines["django"].engine.get_template(template_name)
+        with open(template.origin.name, encoding="utf-8") as file:
+            source = COMMENT_PATTERN.sub("", file.read())
+
+        unbundled: List[str] = []
+        bundled: List[str] = []
+        external = len(EXTERNAL_ASSET_PATTERN.findall(source))
+        for related_template in EXTENDS_OR_INCLUDE_PATTERN.findall(source):
+            related_unbundled, related_bundled, related_external = self.get_template_assets(related_template, seen)
+            unbundled.extend(related_unbundled)
+            bundled.extend(related_bundled)
+            external += related_external
+
+        static_assets = STATIC_ASSET_PATTERN.findall(source)
+        unbundled.extend(static_assets)
+        bundled.extend(static_assets)
+        manifest = load_manifest()
+        for bundle_name in SCRIPT_BUNDLE_PATTERN.findall(source):
+            unbundled.extend(get_bundle_sources(bundle_name))
+            if bundle_name in manifest:
+                bundled.append(f"bundles/{manifest[bundle_name]}")
+            else:
+                bundled.extend(get_bundle_sources(bundle_name))
+        return unbundled, bundled, external
+
+
+    def get_weight(self, static_paths: List[str]) -> int:
+        """Returns the total size in bytes of the given static files"""
+        weight = 0
+        for path in static_paths:
+            if path.startswith("bundles/"):
+                weight += os.path.getsize(settings.SCRIPT_BUNDLES_ROOT / path.removeprefix("bundles/"))
+            else:
+                weight += os.path.getsize(find_static_file(path.replace("//", "/")))
+        return weight
@@ -0,0 +1,252 @@
+import datetime
+import json
+import uuid
+from importlib import import_module
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from booking.exports import create_calendar_feed_token
+from booking.models import Resource, Session, UnavailablePeriod
+from booking.utils import check_if_time_period_is_available, get_business_hours_schedule
+from helpers.query_budget import QueryBudget
+from links.models import Link
+from users.email_verification import create_email_verification_token
+from users.models import UserAccount
+
+
+# Apps whose views are checked
+CHECKED_APPS = ("booking", "dashboard", "users")
+
+
+class Case(NamedTuple):
+    """A request to make to a view within a query budget"""
+    view_name: str
+    method: str = "get"
+    kwargs: Optional[Dict[str, str]] = None
+    query: Optional[Dict[str, str]] = None
+    data: Optional[Dict[str, Any]] = None
+    authenticated: bool = True
+
+
+class Command(BaseCommand):
+    help = (
+        "Request every view in the booking, dashboard and users apps, with seeded data, within a query budget, "
+        "and fail if any view makes more queries than allowed or repeats the same query (likely an N+1 query). "
+        "All changes made are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sessions", type=int, default=20, help="Number of sessions to seed for the checked user")
+        parser.add_argument("--max-queries", type=int, default=None, help="Maximum number of queries per request")
+        parser.add_argument(
+            "--max-repeats", type=int, default=None,
+            help="Maximum number of times the same query may be made per request. Defaults to the `QUERY_BUDGET_MAX_REPEATS` setting"
+        )
+        parser.add_argument("--report", action="store_true", help="Report the queries made by each view, by origin")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        failures = []
+        email_backend = "django.core.mail.backends.locmem.EmailBackend"
+        with override_settings(EMAIL_BACKEND=email_backend, THROTTLE_RATES={}), transaction.atomic():
+            # Changes are never committed, as they are rolled back, so the commit callbacks of the seeded data
+            # are run here, as if committed, instead of being left pending for the first request
+            with TestCase.captureOnCommitCallbacks(execute=True):
+                fixtures = self.seed(options["sessions"])
+            cases = self.get_cases(fixtures)
+            self.warn_unchecked_views(cases)
+            for case in cases:
+                budget = QueryBudget(
+                    max_queries=options["max_queries"],
+                    max_repeats=options["max_repeats"],
+                    raise_exception=False
+                )
+                status_code = self.run_case(case, fixtures["user"], budget)
+                label = f"{case.method.upper()} {case.view_name}"
+                if case.query:
+                    # Tells apart the cases of a view
+                    label = f"{label} ?{'&'.join(f'{key}={value}' for key, value in case.query.items())}"
+                if budget.violations:
+                    failures.append(label)
+                    self.stdout.write(self.style.ERROR(f"{label} [{status_code}]: {len(budget.queries)} queries"))
+                    for violation in budget.violations:
+                        self.stdout.write(f"  {violation}")
+                else:
+                    self.stdout.write(f"{label} [{status_code}]: {len(budget.queries)} queries")
+                if options["report"]:
+                    budget.report(self.stdout)
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(f"{len(failures)} view(s) exceeded their query budget: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS(f"All {len(cases)} requests were within budget"))
+        return None
+
+
+    def seed(self, session_count: int) -> Dict[str, Any]:
+        """
+        Creates a verified user with sessions (some with links) and unavailable periods on the same date,
+        a resource with sessions of the user on that date, and a session of the user that is on now
+        """
+        user = UserAccount.objects.create_user(
+            email=f"budget-{uuid.uuid4().hex[:8]}@example.com",
+            password=uuid.uuid4().hex, name="Query Budget User", is_verified=True
+        )
+        date = timezone.now().date() + datetime.timedelta(days=1)
+        day_start = datetime.datetime.combine(date, datetime.time(0, 0), tzinfo=datetime.timezone.utc)
+        sessions = []
+        for index in range(session_count):
+            start = day_start + datetime.timedelta(minutes=30 * index)
+            link = Link.objects.create(url=f"https://example.com/{index}", created_by=user) if index % 2 else None
+            sessions.append(Session.objects.create(
+                title=f"Session {index}", start=start, end=start + datetime.timedelta(minutes=30),
+                booked_by=user, link=link
+            ))
+        for index in range(3):
+            start = day_start + datetime.timedelta(hours=20 + index)
+            UnavailablePeriod.objects.create(start=start, end=start + datetime.timedelta(minutes=30))
+        resource = Resource.objects.create(name=f"Query Budget Room {uuid.uuid4().hex[:8]}")
+        for index in range(3):
+            start = day_start + datetime.timedelta(hours=9 + index)
+            Session.objects.create(
+                title=f"Room session {index}", start=start, end=start + datetime.timedelta(minutes=30),
+                booked_by=user, resource=resource
+            )
+
+        # A session that is on now, whose link can be followed
+        now = timezone.now()
+        current_session = Session.objects.create(
+            title="Current session", start=now - datetime.timedelta(minutes=10), end=now + datetime.timedelta(minutes=20),
+            booked_by=user, link=Link.objects.create(url="https://example.com/current", created_by=user)
+        )
+
+        link = next((session.link for session in sessions if session.link), None)
+        return {
+            "user": user,
+            "date": date.strftime("%Y-%m-%d"),
+            "resource": resource,
+            "session": sessions[0] if sessions else None,
+            "link": link,
+            "current_link": current_session.link,
+            # To book a session in, and to move a session to, with the sync and async views
+            "free_slots": self.find_free_slots(user, date, 4),
+        }
+
+
+    def find_free_slots(self, user: UserAccount, date: datetime.date, count: int) -> List[Dict[str, str]]:
+        """
+        Returns up to `count` free 30 minute time periods within the business hours of the default calendar,
+        on the date or the two weeks after it, as the `date`, `start_time` and `end_time` of the booking form
+        (in the user's timezone)
+        """
+        slot = datetime.timedelta(minutes=30)
+        schedule = get_business_hours_schedule()
+        now = timezone.now()
+        slots = []
+        for day in range(15):
+            for opens_at, closes_at in reversed(schedule.periods_on(date + datetime.timedelta(days=day))):
+                end = closes_at
+                while end - slot >= opens_at and len(slots) < count:
+                    start, end = end - slot, end
+                    local_start, local_end = start.astimezone(user.utz), end.astimezone(user.utz)
+                    if (
+                        start > now and local_start.date() == local_end.date()
+                        and check_if_time_period_is_available(start, end)
+                    ):
+                        slots.append({
+                            "date": local_start.strftime("%Y-%m-%d"),
+                            "start_time": local_start.strftime("%H:%M"),
+                            "end_time": local_end.strftime("%H:%M"),
+                        })
+                    end = start
+            if len(slots) >= count:
+                break
+        return slots
+
+
+    def get_cases(self, fixtures: Dict[str, Any]) -> List[Case]:
+        """Returns the requests to make. Requests that log the user out or delete them are made last"""
+        user: UserAccount = fixtures["user"]
+        date = fixtures["date"]
+        cases = [
+            Case("dashboard:dashboard"),
+            Case("booking:calendar"),
+            Case("booking:calendar", method="post", data={"date": date}),
+            Case("booking:async_calendar", method="post", data={"date": date}),
+            Case("booking:calendar_data", query={"date": date}),
+            Case("booking:calendar_availability", query={"month": date[:7]}),
+            Case("booking:calendar_availability", query={"month": date[:7], "resource": str(fixtures["resource"].pk)}),
+            Case("booking:calendar_availability", query={"month": date[:7], "resource": "any"}),
+            Case("booking:calendar_feed", kwargs={"token": create_calendar_feed_token(user)}, authenticated=False),
+            Case("booking:book_session", method="post", data={
+                "title": "Budget check", "date": date, "start_time": "22:30", "end_time": "23:00"
+            }),
+            Case("users:signup", authenticated=False),
+            Case("users:signin", authenticated=False),
+            Case("users:signin", method="post", data={"email": user.email, "password": "wrong"}, authenticated=False),
+            Case("users:forgot_password", authenticated=False),
+            Case("users:reset_password", authenticated=False),
+            Case("users:email_verification", kwargs={"token": create_email_verification_token(user)}),
+            Case("users:resend_verification_mail", method="post"),
+            Case("users:account_detail", kwargs={"slug": user.slug}),
+            Case("users:account_update", method="post", kwargs={"slug": user.slug}, data={"name": user.name, "email": user.email}),
+            Case("users:password_change", method="post", kwargs={"slug": user.slug}, data={}),
+        ]
+        free_slots = fixtures["free_slots"]
+        for view_name, slot in zip(("booking:book_session", "booking:async_book_session"), free_slots[0::2]):
+            cases.append(Case(view_name, method="post", data={"title": "Budget check", **slot}))
+        if fixtures["session"] is not None:
+            session_id = str(fixtures["session"].pk)
+            cases.append(Case("booking:update_session", method="post", data={
+                "session-id": session_id, "title": "Budget check (updated)",
+                "date": date, "start_time": "00:00", "end_time": "00:30"
+            }))
+            for view_name, slot in zip(("booking:update_session", "booking:async_update_session"), free_slots[1::2]):
+                cases.append(Case(view_name, method="post", data={
+                    "session-id": session_id, "title": "Budget check (moved)", **slot
+                }))
+        if fixtures["link"] is not None:
+            cases.append(Case("booking:session_link", kwargs={"identifier": fixtures["link"].identifier}))
+        cases.append(Case("booking:session_link", kwargs={"identifier": fixtures["current_link"].identifier}))
+        cases.extend([
+            Case("users:signout"),
+            Case("users:account_delete", kwargs={"slug": user.slug}),
+        ])
+        return cases
+
+
+    def warn_unchecked_views(self, cases: List[Case]) -> None:
+        """Warns about views in the checked apps that no case requests"""
+        checked = {case.view_name for case in cases}
+        for app_label in CHECKED_APPS:
+            for pattern in import_module(f"{app_label}.urls").urlpatterns:
+                view_name = f"{app_label}:{pattern.name}"
+                if view_name not in checked:
+                    self.stdout.write(self.style.WARNING(f"{view_name} is not checked"))
+        return None
+
+
+    def run_case(self, case: Case, user: UserAccount, budget: QueryBudget) -> int:
+        """Makes the case's request within the budget, and returns the response status code"""
+        client = Client()
+        if case.authenticated:
+            client.force_login(user)
+        url = reverse(case.view_name, kwargs=case.kwargs)
+        if case.query:
+            url = f"{url}?{'&'.join(f'{key}={value}' for key, value in case.query.items())}"
+
+        # Changes are never committed, as they are rolled back, so the commit callbacks of the request
+        # (e.g. its batched side effects) are run as it ends, within its budget
+        with budget, TestCase.captureOnCommitCallbacks(execute=True):
+            if case.method == "post":
+                response = client.post(url, data=json.dumps(case.data or {}), content_type="application/json")
+            else:
+                response = client.get(url)
+            if response.streaming:
+                # Streamed responses make their queries as they are read
+                b"".join(response.streaming_content)
+        return response.status_code
@@ -0,0 +1,30 @@
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.search import DOCUMENT_BUILDERS, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the admin search index, for all indexed models or the given ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "models", nargs="*", 
+            help=f"Labels of the models to re-index. Any of {', '.join(DOCUMENT_BUILDERS)}. Defaults to all"
+        )
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Number of objects to index per query")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        model_labels = [label.lower() for label in options["models"]]
+        for label in model_labels:
+            if label not in DOCUMENT_BUILDERS:
+                raise CommandError(f"'{label}' is not an indexed model. Choose from {', '.join(DOCUMENT_BUILDERS)}")
+
+        start = time.perf_counter()
+        counts = rebuild_search_index(model_labels or None, chunk_size=options["chunk_size"])
+        for label, count in counts.items():
+            self.stdout.write(f"{label}: {count} object(s) indexed")
+        self.stdout.write(self.style.SUCCESS(f"Search index rebuilt in {time.perf_counter() - start:.2f}s"))
+        return None
@@ -0,0 +1,79 @@
+import json
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks import load_benchmarks
+from benchmarks.runner import run_benchmarks, compare_results
+from helpers.benchmark import format_summary
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the benchmarks of the booking hot paths (see `benchmarks/`) against seeded data (see `seed_load`), "
+        "write the results as JSON, and compare them with the results of another commit"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "patterns", nargs="*",
+            help="Shell-style patterns of the names of benchmarks to run, e.g. 'booking.views.*'. Defaults to all"
+        )
+        parser.add_argument("--iterations", type=int, default=50, help="Number of timed calls per benchmark")
+        parser.add_argument("--warmup", type=int, default=5, help="Number of untimed calls per benchmark, before the timed calls")
+        parser.add_argument("--output", default=None, help="Path of the file to write the results (JSON) to")
+        parser.add_argument("--compare", default=None, help="Path of the results (JSON) to compare with, e.g. of the main branch")
+        parser.add_argument(
+            "--threshold", type=float, default=10.0,
+            help="Increase in median latency, in percent, above which a benchmark has regressed"
+        )
+        parser.add_argument("--list", action="store_true", help="List the benchmarks, and exit")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["list"]:
+            for name, bench in load_benchmarks().items():
+                self.stdout.write(f"{name}: {bench.description}")
+            return None
+
+        baseline = None
+        if options["compare"]:
+            try:
+                with open(options["compare"]) as file:
+                    baseline = json.load(file)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read the results to compare with: {exc}")
+
+        try:
+            results = run_benchmarks(options["patterns"], iterations=options["iterations"], warmup=options["warmup"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if not results["results"]:
+            raise CommandError("No benchmarks match the given patterns. Use --list to see them")
+
+        self.stdout.write(f"Dataset: {', '.join(f'{count} {name}' for name, count in results['dataset'].items())}")
+        for name, summary in results["results"].items():
+            self.stdout.write(f"{format_summary(name, summary)} queries={summary['queries']}")
+
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(results, file, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if baseline is not None:
+            try:
+                comparisons = compare_results(results, baseline, threshold=options["threshold"] / 100)
+            except ValueError as exc:
+                raise CommandError(str(exc))
+            if baseline.get("dataset") != results["dataset"]:
+                self.stdout.write(self.style.WARNING("The baseline was run against a different dataset"))
+            self.stdout.write(f"Compared with {baseline.get('commit') or options['compare']}:")
+            for comparison in comparisons:
+                line = (
+                    f"{comparison['name']}: p50 {comparison['baseline_p50_ms']:.2f}ms -> {comparison['p50_ms']:.2f}ms "
+                    f"({comparison['change']:+.1%}), queries {comparison['baseline_queries']} -> {comparison['queries']}"
+                )
+                self.stdout.write(self.style.ERROR(line) if comparison["regressed"] else line)
+            regressions = [comparison["name"] for comparison in comparisons if comparison["regressed"]]
+            if regressions:
+                raise CommandError(f"{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+        return None
@@ -0,0 +1,267 @@
+import datetime
+import random
+import time
+import uuid
+import zoneinfo
+from typing import Any, Dict, List
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from benchmarks import SEED_EMAIL_DOMAIN
+from booking.models import Resource, Session, UnavailablePeriod
+from booking.summaries import invalidate_session_summaries
+from booking.availability import invalidate_day_availability
+from booking.session_links import get_link_lifecycle
+from core.search import get_object_id, index_objects, remove_objects
+from links.models import Link
+from news.models import News
+from users.models import UserAccount
+
+
+# Seeded unavailable periods (which have no owner) have IDs derived from this namespace and their index
+SEED_NAMESPACE = uuid.UUID("5d1c63a2-6b1e-4d39-9c0e-4f7a2b6f0c11")
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+SEED_PASSWORD = "load-password"
+# Seeded resources are named with this prefix and their index
+SEED_RESOURCE_PREFIX = "Load resource "
+
+
+def get_seeded_unavailable_period_id(index: int) -> uuid.UUID:
+    return uuid.uuid5(SEED_NAMESPACE, f"unavailable-period-{index}")
+
+
+def parse_scale(value: str) -> int:
+    value = value.lower()
+    if value in SCALES:
+        return SCALES[value]
+    try:
+        return int(value)
+    except ValueError:
+        raise CommandError(f"Invalid scale '{value}'. Use one of {', '.join(SCALES)} or a number of sessions")
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a realistic, reproducible load of users (across many timezones), sessions (held, cancelled, "
+        "missed and pending, some with links), unavailable periods and news, for benchmarks (see `benchmarks/`). "
+        "Seeded users have @load.example.com emails and the password 'load-password'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale", default="10k",
+            help=f"Number of sessions to seed. One of {', '.join(SCALES)}, or a number. "
+            "There is one user per 20 sessions, one unavailable period per 50 sessions and one news per 10 sessions"
+        )
+        parser.add_argument("--seed", type=int, default=42, help="Random seed. The same seed and scale seed the same data")
+        parser.add_argument("--days", type=int, default=365, help="Number of days, centred on today, to spread sessions over")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Number of rows to insert per query")
+        parser.add_argument("--clear", action="store_true", help="Delete previously seeded data first")
+        parser.add_argument(
+            "--skip-search-index", action="store_true",
+            help="Do not index seeded objects for the admin search (faster at large scales)"
+        )
+        parser.add_argument(
+            "--resources", type=int, default=0,
+            help="Number of resources (hosts or rooms) to seed, and spread sessions over. "
+            "Sessions are on the default calendar by default"
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["clear"]:
+            self.clear(options["batch_size"])
+        elif UserAccount.objects.filter(email__endswith=f"@{SEED_EMAIL_DOMAIN}").exists():
+            raise CommandError("Seeded data already exists. Use --clear to replace it")
+
+        sessions = parse_scale(options["scale"])
+        self.rng = random.Random(options["seed"])
+        self.now = timezone.now().replace(second=0, microsecond=0)
+        self.days = max(options["days"], 2)
+        self.batch_size = options["batch_size"]
+        self.index = not options["skip_search_index"]
+
+        start = time.perf_counter()
+        users = self.seed_users(max(sessions // 20, 10))
+        self.resources = self.seed_resources(options["resources"])
+        counts = self.seed_sessions(users, sessions)
+        counts["unavailable periods"] = self.seed_unavailable_periods(max(sessions // 50, 1))
+        counts["news"] = self.seed_news(users, max(sessions // 10, self.days))
+        # Sessions and unavailable periods were inserted without the signals that keep the availability up to date
+        invalidate_day_availability()
+        counts = {"users": len(users), "resources": len(self.resources), **counts}
+        summary = ", ".join(f"{count} {label}" for label, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Seeded {summary} in {time.perf_counter() - start:.2f}s"))
+        return None
+
+
+    def clear(self, batch_size: int) -> None:
+        """
+        Deletes seeded data, in batches.
+
+        Sessions, links and unavailable periods are deleted without loading them or sending signals,
+        as deleting objects one by one is too slow at large scales. Their search documents are removed in bulk.
+        """
+        start = time.perf_counter()
+        seeded_users = UserAccount.objects.filter(email__endswith=f"@{SEED_EMAIL_DOMAIN}")
+        querysets = [
+            Session.objects.filter(booked_by__in=seeded_users),
+            Link.objects.filter(created_by__in=seeded_users),
+            News.objects.filter(author__in=seeded_users),
+        ]
+        for queryset in querysets:
+            while True:
+                pks = list(queryset.order_by().values_list("pk", flat=True)[:batch_size])
+                if not pks:
+                    break
+                with transaction.atomic():
+                    remove_objects(queryset.model, [get_object_id(queryset.model(pk=pk)) for pk in pks])
+                    queryset.model.objects.filter(pk__in=pks)._raw_delete(queryset.db)
+
+        index = 0
+        while True:
+            pks = [get_seeded_unavailable_period_id(i) for i in range(index, index + batch_size)]
+            with transaction.atomic():
+                remove_objects(UnavailablePeriod, [get_object_id(UnavailablePeriod(pk=pk)) for pk in pks])
+                deleted = UnavailablePeriod.objects.filter(pk__in=pks)._raw_delete(UnavailablePeriod.objects.db)
+            if not deleted:
+                break
+            index += batch_size
+
+        # Sessions were deleted without the signals that update the cached session summaries
+        invalidate_session_summaries(seeded_users.values_list("pk", flat=True))
+        invalidate_day_availability()
+        Resource.objects.filter(name__startswith=SEED_RESOURCE_PREFIX).delete()
+        seeded_users.delete()
+        self.stdout.write(f"Cleared seeded data in {time.perf_counter() - start:.2f}s")
+        return None
+
+
+    def bulk_create(self, objs: List[Any]) -> None:
+        """Inserts the objects, and indexes them for the admin search unless indexing is skipped"""
+        if not objs:
+            return None
+        objs[0].__class__.objects.bulk_create(objs, batch_size=self.batch_size)
+        if self.index:
+            index_objects(objs, batch_size=self.batch_size)
+        return None
+
+
+    def random_slot(self, day_offset: int) -> datetime.datetime:
+        """Returns a random half-hour slot within the default business hours (08:00 to 20:00 UTC) of the day"""
+        date = (self.now + datetime.timedelta(days=day_offset)).date()
+        minutes = self.rng.randrange(8 * 60, 19 * 60, 30)
+        return datetime.datetime.combine(date, datetime.time(0, 0), tzinfo=datetime.timezone.utc) + datetime.timedelta(minutes=minutes)
+
+
+    def seed_users(self, count: int) -> List[UserAccount]:
+        """Creates verified (mostly) users, each in one of 50 timezones from all parts of the world"""
+        self.stdout.write(f"Seeding {count} users...")
+        timezones = self.rng.sample(sorted(zoneinfo.available_timezones() - {"localtime", "Factory"}), 50)
+        password = make_password(SEED_PASSWORD)
+        users = [
+            UserAccount(
+                name=f"Load User {index}", email=f"user-{index:07d}@{SEED_EMAIL_DOMAIN}",
+                slug=f"load-user-{index:07d}", password=password,
+                timezone=self.rng.choice(timezones), is_verified=self.rng.random() < 0.95
+            )
+            for index in range(count)
+        ]
+        with transaction.atomic():
+            for offset in range(0, count, self.batch_size):
+                self.bulk_create(users[offset:offset + self.batch_size])
+        return users
+
+
+    def seed_resources(self, count: int) -> List[Resource]:
+        """Creates resources with the business hours settings' hours"""
+        if not count:
+            return []
+        self.stdout.write(f"Seeding {count} resources...")
+        return Resource.objects.bulk_create([Resource(name=f"{SEED_RESOURCE_PREFIX}{index}") for index in range(count)])
+
+
+    def seed_sessions(self, users: List[UserAccount], count: int) -> Dict[str, int]:
+        """
+        Creates sessions, spread over the days around today (and the seeded resources, if any).
+        A fifth of the users book 80% of the sessions.
+
+        Past sessions are held (60%), cancelled (10%) or missed (30%). Future sessions are pending with a link (50%),
+        pending without a link (40%) or cancelled (10%). Sessions may overlap, as at large scales there are more
+        sessions than free slots.
+        """
+        self.stdout.write(f"Seeding {count} sessions...")
+        heavy_users = users[:max(len(users) // 5, 1)]
+        counts = {"held": 0, "cancelled": 0, "missed": 0, "pending": 0}
+        sessions_with_links = 0
+        for offset in range(0, count, self.batch_size):
+            links, sessions = [], []
+            for index in range(offset, min(offset + self.batch_size, count)):
+                user = self.rng.choice(heavy_users) if self.rng.random() < 0.8 else self.rng.choice(users)
+                start = self.random_slot(self.rng.randint(-self.days // 2, self.days // 2))
+                end = start + datetime.timedelta(minutes=self.rng.choice((30, 30, 60)))
+                roll = self.rng.random()
+                if end <= self.now:
+                    state = "held" if roll < 0.6 else "cancelled" if roll < 0.7 else "missed"
+                    has_link = state != "cancelled" or self.rng.random() < 0.5
+                else:
+                    state = "pending" if roll < 0.9 else "cancelled"
+                    has_link = roll < 0.5
+                counts[state] += 1
+
+                link = None
+                if has_link:
+                    link = Link(
+                        identifier=f"ld{index:08d}", url=f"https://meet.example.com/load-{index}",
+                        created_by=user, **get_link_lifecycle(start, end, state == "cancelled", now=self.now)
+                    )
+                    links.append(link)
+                sessions.append(Session(
+                    title=f"Load session {index}", start=start, end=end, booked_by=user, link=link,
+                    resource=self.rng.choice(self.resources) if self.resources else None,
+                    has_held=state == "held", cancelled=state == "cancelled",
+                    rescheduled_at=self.now if self.rng.random() < 0.05 else None
+                ))
+            with transaction.atomic():
+                self.bulk_create(links)
+                self.bulk_create(sessions)
+            sessions_with_links += len(links)
+        return {"sessions": count, **{f"{state} sessions": n for state, n in counts.items()}, "links": sessions_with_links}
+
+
+    def seed_unavailable_periods(self, count: int) -> int:
+        """Creates unavailable periods of one to three hours, spread over the days around today"""
+        self.stdout.write(f"Seeding {count} unavailable periods...")
+        periods = []
+        for index in range(count):
+            start = self.random_slot(self.rng.randint(-self.days // 2, self.days // 2))
+            periods.append(UnavailablePeriod(
+                id=get_seeded_unavailable_period_id(index), start=start,
+                end=start + datetime.timedelta(hours=self.rng.randint(1, 3))
+            ))
+        with transaction.atomic():
+            for offset in range(0, count, self.batch_size):
+                self.bulk_create(periods[offset:offset + self.batch_size])
+        return count
+
+
+    def seed_news(self, users: List[UserAccount], count: int) -> int:
+        """
+        Creates news displayed from random times in the past days (and a few upcoming days),
+        a tenth of which stop displaying a week after
+        """
+        self.stdout.write(f"Seeding {count} news...")
+        news = []
+        for index in range(count):
+            display_at = self.random_slot(self.rng.randint(-self.days, 7))
+            news.append(News(
+                headline=f"Load news {index}", content="Seeded for benchmarks.", author=users[0],
+                display_at=display_at,
+                display_until=display_at + datetime.timedelta(days=7) if self.rng.random() < 0.1 else None
+            ))
+        with transaction.atomic():
+            for offset in range(0, count, self.batch_size):
+                self.bulk_create(news[offset:offset + self.batch_size])
+        return count
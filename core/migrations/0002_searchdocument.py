@@ -0,0 +1,113 @@
+from django.db import migrations, models
+
+
+def create_full_text_index(apps, schema_editor):
+    """Creates the FTS5 index of search documents, and the triggers that keep it in sync, on SQLite"""
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    statements = [
+        """
+        CREATE VIRTUAL TABLE core_search_index USING fts5(
+            content, content='core_searchdocument', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+        """,
+        """
+        CREATE TRIGGER core_searchdocument_ai AFTER INSERT ON core_searchdocument BEGIN
+            INSERT INTO core_search_index(rowid, content) VALUES (new.id, new.content);
+        END
+        """,
+        """
+        CREATE TRIGGER core_searchdocument_ad AFTER DELETE ON core_searchdocument BEGIN
+            INSERT INTO core_search_index(core_search_index, rowid, content) VALUES ('delete', old.id, old.content);
+        END
+        """,
+        """
+        CREATE TRIGGER core_searchdocument_au AFTER UPDATE ON core_searchdocument BEGIN
+            INSERT INTO core_search_index(core_search_index, rowid, content) VALUES ('delete', old.id, old.content);
+            INSERT INTO core_search_index(rowid, content) VALUES (new.id, new.content);
+        END
+        """,
+    ]
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_full_text_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for trigger in ("core_searchdocument_ai", "core_searchdocument_ad", "core_searchdocument_au"):
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    schema_editor.execute("DROP TABLE IF EXISTS core_search_index")
+
+
+# The searchable text of each indexed model's objects, and the related objects to select to build it,
+# as of this migration. Frozen here, as `core.search` changes with the models, which this migration must not
+def _user_text(user):
+    return [user.name, user.email] if user is not None else []
+
+
+def _datetime_text(value):
+    return value.strftime("%Y-%m-%d %H:%M") if value else ""
+
+
+DOCUMENT_BUILDERS = {
+    "users.useraccount": (lambda user: _user_text(user), ()),
+    "booking.session": (lambda session: [
+        session.title, *_user_text(session.booked_by),
+        session.link.identifier if session.link_id else ""
+    ], ("booked_by", "link")),
+    "booking.unavailableperiod": (lambda period: [_datetime_text(period.start), _datetime_text(period.end)], ()),
+    "links.link": (lambda link: [link.identifier, link.url, *_user_text(link.created_by)], ("created_by",)),
+    "news.news": (lambda news: [news.headline, *_user_text(news.author)], ("author",)),
+    "tokens.passwordresettoken": (lambda token: [token.name, *_user_text(token.user)], ("user",)),
+}
+
+
+def populate_search_documents(apps, schema_editor):
+    using = schema_editor.connection.alias
+    connection = schema_editor.connection
+    SearchDocument = apps.get_model("core", "SearchDocument")
+    for label, (builder, relations) in DOCUMENT_BUILDERS.items():
+        model = apps.get_model(label)
+        queryset = model._base_manager.using(using).select_related(*relations).order_by()
+        documents = [
+            SearchDocument(
+                model=label,
+                object_id=str(model._meta.pk.get_db_prep_value(obj.pk, connection)),
+                content=" ".join(part for part in builder(obj) if part)
+            )
+            for obj in queryset.iterator(chunk_size=2000)
+        ]
+        SearchDocument.objects.using(using).bulk_create(documents, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('booking', '0003_changelist_indexes'),
+        ('links', '0003_changelist_indexes'),
+        ('news', '0003_changelist_indexes'),
+        ('tokens', '0002_initial'),
+        ('users', '0003_useraccount_verification_sent_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('model', models.CharField(help_text="Label of the object's model", max_length=100)),
+                ('object_id', models.CharField(help_text='Primary key of the object, as stored in the database', max_length=64)),
+                ('content', models.TextField(blank=True, help_text='Searchable text of the object')),
+            ],
+            options={
+                'verbose_name': 'Search Document',
+                'verbose_name_plural': 'Search Documents',
+                'constraints': [models.UniqueConstraint(fields=('model', 'object_id'), name='core_searchdocument_unique_object')],
+            },
+        ),
+        migrations.RunPython(create_full_text_index, drop_full_text_index),
+        migrations.RunPython(populate_search_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.0.4 on 2026-10-19 18:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_searchdocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BusinessHoursInterval',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')], verbose_name='Weekday')),
+                ('opens_at', models.TimeField(verbose_name='Opens at')),
+                ('closes_at', models.TimeField(verbose_name='Closes at')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('settings', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='intervals', to='core.businesshourssettings', verbose_name='Settings')),
+            ],
+            options={
+                'verbose_name': 'Business Hours Interval',
+                'verbose_name_plural': 'Business Hours Intervals',
+                'ordering': ['weekday', 'opens_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BusinessHoursException',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('date', models.DateField(verbose_name='Date')),
+                ('opens_at', models.TimeField(blank=True, help_text='Leave empty if closed all day', null=True, verbose_name='Opens at')),
+                ('closes_at', models.TimeField(blank=True, help_text='Leave empty if closed all day', null=True, verbose_name='Closes at')),
+                ('reason', models.CharField(blank=True, default='', help_text='E.g. a public holiday', max_length=255, verbose_name='Reason')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('settings', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exceptions', to='core.businesshourssettings', verbose_name='Settings')),
+            ],
+            options={
+                'verbose_name': 'Business Hours Exception',
+                'verbose_name_plural': 'Business Hours Exceptions',
+                'ordering': ['date', 'opens_at'],
+            },
+        ),
+    ]
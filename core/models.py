@@ -1,4 +1,5 @@
 from django.db import models
+from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 from django_utz.decorators import model
 import datetime
@@ -66,3 +67,110 @@ class BusinessHoursSettings(models.Model):
         closes_at_on_date = datetime.datetime.combine(date_from_dt, self.closes_at, tzinfo=self.timezone)
         return opens_at_on_date <= dt.astimezone(self.timezone) <= closes_at_on_date
 
+
+
+class BusinessHoursInterval(models.Model):
+    """
+    A period of a weekday in which the business is open, in the business hours' timezone.
+
+    Business hours settings with intervals follow this weekly schedule, and are closed on weekdays with none.
+    Settings with no intervals are open from `opens_at` to `closes_at` every day.
+    """
+    class Weekday(models.IntegerChoices):
+        MONDAY = 0, _("Monday")
+        TUESDAY = 1, _("Tuesday")
+        WEDNESDAY = 2, _("Wednesday")
+        THURSDAY = 3, _("Thursday")
+        FRIDAY = 4, _("Friday")
+        SATURDAY = 5, _("Saturday")
+        SUNDAY = 6, _("Sunday")
+
+    id = models.BigAutoField(primary_key=True)
+    settings = models.ForeignKey(
+        BusinessHoursSettings, on_delete=models.CASCADE, related_name="intervals", verbose_name=_("Settings")
+    )
+    weekday = models.PositiveSmallIntegerField(_("Weekday"), choices=Weekday.choices)
+    opens_at = models.TimeField(_("Opens at"))
+    closes_at = models.TimeField(_("Closes at"))
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("Business Hours Interval")
+        verbose_name_plural = _("Business Hours Intervals")
+        ordering = ["weekday", "opens_at"]
+
+    def __str__(self) -> str:
+        return f"{self.get_weekday_display()}: {self.opens_at} - {self.closes_at}"
+
+    def clean(self) -> None:
+        if self.opens_at is not None and self.closes_at is not None and self.opens_at >= self.closes_at:
+            raise ValidationError({"closes_at": _("Closing time must be after the opening time")})
+        return None
+
+
+
+class BusinessHoursException(models.Model):
+    """
+    The business hours on a date (in the business hours' timezone), which replace those of its weekday.
+
+    A date with an exception with no times is closed. A date with several exceptions is open in each of their periods.
+    """
+    id = models.BigAutoField(primary_key=True)
+    settings = models.ForeignKey(
+        BusinessHoursSettings, on_delete=models.CASCADE, related_name="exceptions", verbose_name=_("Settings")
+    )
+    date = models.DateField(_("Date"))
+    opens_at = models.TimeField(_("Opens at"), null=True, blank=True, help_text=_("Leave empty if closed all day"))
+    closes_at = models.TimeField(_("Closes at"), null=True, blank=True, help_text=_("Leave empty if closed all day"))
+    reason = models.CharField(_("Reason"), max_length=255, blank=True, default="", help_text=_("E.g. a public holiday"))
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("Business Hours Exception")
+        verbose_name_plural = _("Business Hours Exceptions")
+        ordering = ["date", "opens_at"]
+
+    def __str__(self) -> str:
+        if self.is_closed:
+            return f"{self.date}: closed"
+        return f"{self.date}: {self.opens_at} - {self.closes_at}"
+
+    @property
+    def is_closed(self) -> bool:
+        """Whether the business is closed all day"""
+        return self.opens_at is None and self.closes_at is None
+
+    def clean(self) -> None:
+        if (self.opens_at is None) != (self.closes_at is None):
+            raise ValidationError(_("Set both the opening and closing times, or neither if closed all day"))
+        if not self.is_closed and self.opens_at >= self.closes_at:
+            raise ValidationError({"closes_at": _("Closing time must be after the opening time")})
+        return None
+
+
+
+
+class SearchDocument(models.Model):
+    """
+    The searchable text of an object, used by the admin search (see `core.search`).
+
+    On SQLite, documents are also indexed in an FTS5 full-text index kept in sync by triggers.
+    """
+    id = models.BigAutoField(primary_key=True)
+    model = models.CharField(max_length=100, help_text=_("Label of the object's model"))
+    object_id = models.CharField(max_length=64, help_text=_("Primary key of the object, as stored in the database"))
+    content = models.TextField(blank=True, help_text=_("Searchable text of the object"))
+
+    class Meta:
+        verbose_name = _("Search Document")
+        verbose_name_plural = _("Search Documents")
+        constraints = [
+            models.UniqueConstraint(fields=["model", "object_id"], name="core_searchdocument_unique_object"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.model} {self.object_id}"
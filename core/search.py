@@ -0,0 +1,266 @@
+"""
+Search index for the admin.
+
+The searchable text of each indexed object (e.g. a session's title, its user's name and email and its link's
+identifier) is kept in a `SearchDocument` row, updated by signals when the object, or a user it includes, is saved.
+On SQLite, documents are indexed in an FTS5 full-text index, so that searches are index lookups instead of
+LIKE scans across joined tables. On other databases, documents are matched with a single-table lookup.
+
+Objects created or updated in bulk (`bulk_create`, `QuerySet.update`) do not send signals, and should be
+indexed with `index_objects`. Run the `rebuild_search_index` command to rebuild the whole index.
+"""
+import functools
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.apps import apps
+from django.db import connections, models
+from django.db.models.expressions import RawSQL
+from django.http import HttpRequest
+
+from helpers.transactions import add_to_commit_batch
+
+
+SEARCH_INDEX_TABLE = "core_search_index"
+SEARCH_DOCUMENTS_TABLE = "core_searchdocument"
+
+
+def _user_text(user: Optional[models.Model]) -> List[str]:
+    return [user.name, user.email] if user is not None else []
+
+
+def _datetime_text(value: Any) -> str:
+    return value.strftime("%Y-%m-%d %H:%M") if value else ""
+
+
+# Functions that return the searchable text of objects of each indexed model
+DOCUMENT_BUILDERS: Dict[str, Callable[[models.Model], List[str]]] = {
+    "users.useraccount": lambda user: _user_text(user),
+    "booking.session": lambda session: [
+        session.title, *_user_text(session.booked_by),
+        session.link.identifier if session.link_id else ""
+    ],
+    "booking.unavailableperiod": lambda period: [_datetime_text(period.start), _datetime_text(period.end)],
+    "links.link": lambda link: [link.identifier, link.url, *_user_text(link.created_by)],
+    "news.news": lambda news: [news.headline, *_user_text(news.author)],
+    "tokens.passwordresettoken": lambda token: [token.name, *_user_text(token.user)],
+}
+
+# Related objects to select when indexing objects of each model
+DOCUMENT_RELATIONS: Dict[str, Tuple[str, ...]] = {
+    "booking.session": ("booked_by", "link"),
+    "links.link": ("created_by",),
+    "news.news": ("author",),
+    "tokens.passwordresettoken": ("user",),
+}
+
+# Foreign keys to the user model through which documents include a user's name and
+# email. These documents are re-indexed when the user's name or email may have changed
+USER_RELATIONS: Dict[str, str] = {
+    "booking.session": "booked_by",
+    "links.link": "created_by",
+    "news.news": "author",
+    "tokens.passwordresettoken": "user",
+}
+
+
+def get_model_label(model: type[models.Model]) -> str:
+    return model._meta.label_lower
+
+
+def get_object_id(obj: models.Model, using: str = "default") -> str:
+    """Returns the object's primary key as stored in the database"""
+    connection = connections[using]
+    return str(obj._meta.pk.get_db_prep_value(obj.pk, connection))
+
+
+def build_document(obj: models.Model) -> str:
+    """Returns the searchable text of the object"""
+    builder = DOCUMENT_BUILDERS[get_model_label(obj.__class__)]
+    return " ".join(part for part in builder(obj) if part)
+
+
+@functools.lru_cache(maxsize=None)
+def is_full_text_index_available(using: str = "default") -> bool:
+    """Returns True if the FTS5 full-text index exists on the database"""
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return False
+    return SEARCH_INDEX_TABLE in connection.introspection.table_names()
+
+
+def index_objects(objs: Iterable[models.Model], using: str = "default", batch_size: int = 1000) -> int:
+    """
+    Adds or updates the search documents of the given objects, which must all be of the same model.
+
+    :return: The number of objects indexed.
+    """
+    SearchDocument = apps.get_model("core", "SearchDocument")
+    count = 0
+    documents = []
+    for obj in objs:
+        documents.append(SearchDocument(
+            model=get_model_label(obj.__class__),
+            object_id=get_object_id(obj, using),
+            content=build_document(obj)
+        ))
+        if len(documents) >= batch_size:
+            count += _upsert_documents(SearchDocument, documents, using)
+            documents = []
+    if documents:
+        count += _upsert_documents(SearchDocument, documents, using)
+    return count
+
+
+def _upsert_documents(document_model: type[models.Model], documents: List[models.Model], using: str) -> int:
+    document_model.objects.using(using).bulk_create(
+        documents, update_conflicts=True,
+        unique_fields=["model", "object_id"], update_fields=["content"]
+    )
+    return len(documents)
+
+
+def remove_objects(model: type[models.Model], object_ids: Iterable[str], using: str = "default") -> int:
+    """
+    Removes the search documents of the objects of the given model, by object ID (as stored in the database).
+
+    :return: The number of documents removed.
+    """
+    SearchDocument = apps.get_model("core", "SearchDocument")
+    deleted, _ = SearchDocument.objects.using(using).filter(
+        model=get_model_label(model), object_id__in=list(object_ids)
+    ).delete()
+    return deleted
+
+
+def get_indexed_queryset(model: type[models.Model]) -> models.QuerySet:
+    """Returns a queryset of the model's objects, with the related objects needed to index them"""
+    queryset = model._default_manager.all()
+    relations = DOCUMENT_RELATIONS.get(get_model_label(model), ())
+    return queryset.select_related(*relations) if relations else queryset
+
+
+def rebuild_search_index(model_labels: Optional[Iterable[str]] = None, using: str = "default", chunk_size: int = 2000) -> Dict[str, int]:
+    """
+    Rebuilds the search documents of all objects of the given models (all indexed models by default),
+    removing documents of objects that no longer exist.
+
+    :return: The number of objects indexed, by model label.
+    """
+    SearchDocument = apps.get_model("core", "SearchDocument")
+    counts = {}
+    for label in model_labels or DOCUMENT_BUILDERS:
+        model = apps.get_model(label)
+        SearchDocument.objects.using(using).filter(model=label).delete()
+        queryset = get_indexed_queryset(model).using(using).order_by()
+        counts[label] = index_objects(queryset.iterator(chunk_size=chunk_size), using=using, batch_size=chunk_size)
+    return counts
+
+
+def build_match_query(search_term: str) -> Optional[str]:
+    """
+    Returns an FTS5 query matching documents that contain a word
+    starting with each word of the search term, or None if the term has no words.
+    """
+    words = re.findall(r"\w+", search_term.lower())
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def search_object_ids(model: type[models.Model], search_term: str, using: str = "default") -> Optional[models.QuerySet | RawSQL]:
+    """
+    Returns a subquery of the IDs of the model's objects whose documents match the search term,
+    to filter the model's queryset with (`pk__in`). Returns None if the search term has no words.
+    """
+    words = re.findall(r"\w+", search_term.lower())
+    if not words:
+        return None
+    label = get_model_label(model)
+    if is_full_text_index_available(using):
+        return RawSQL(
+            f"SELECT object_id FROM {SEARCH_DOCUMENTS_TABLE} WHERE model = %s AND id IN "
+            f"(SELECT rowid FROM {SEARCH_INDEX_TABLE} WHERE {SEARCH_INDEX_TABLE} MATCH %s)",
+            (label, build_match_query(search_term))
+        )
+
+    SearchDocument = apps.get_model("core", "SearchDocument")
+    documents = SearchDocument.objects.using(using).filter(model=label)
+    for word in words:
+        documents = documents.filter(content__icontains=word)
+    return documents.values("object_id")
+
+
+class IndexedSearchMixin:
+    """
+    Model admin mixin that searches the changelist using the search index, instead of `search_fields`.
+
+    `search_fields` should still be set, as the admin only shows the search box for model admins that have them.
+    """
+    def get_search_results(self, request: HttpRequest, queryset: models.QuerySet, search_term: str) -> Tuple[models.QuerySet, bool]:
+        if get_model_label(queryset.model) not in DOCUMENT_BUILDERS or not search_term.strip():
+            return super().get_search_results(request, queryset, search_term)
+        object_ids = search_object_ids(queryset.model, search_term, using=queryset.db)
+        if object_ids is None:
+            return queryset, False
+        return queryset.filter(pk__in=object_ids), False
+
+
+def update_search_document(sender: type[models.Model], instance: models.Model, raw: bool = False, using: str = "default", update_fields=None, **kwargs: Any) -> None:
+    """Updates the search document of the saved object"""
+    if raw:
+        return None
+    label = get_model_label(sender)
+    if label == get_model_label(apps.get_model("users", "UserAccount")):
+        # Only the user's name and email are indexed
+        if update_fields is not None and not {"name", "email"} & set(update_fields):
+            return None
+        index_objects([instance], using=using)
+        # Re-index the documents that include the user's name and email
+        for related_label, user_field in USER_RELATIONS.items():
+            related_model = apps.get_model(related_label)
+            index_objects(
+                get_indexed_queryset(related_model).using(using).filter(**{user_field: instance}).iterator(),
+                using=using
+            )
+        return None
+    index_objects([get_indexed_queryset(sender).using(using).get(pk=instance.pk)], using=using)
+    return None
+
+
+def remove_documents(documents: Iterable[Tuple[str, str, str]]) -> int:
+    """
+    Removes the given search documents, with one query per database and model.
+
+    :param documents: (database alias, model label, object ID) of each document
+    :return: The number of documents removed.
+    """
+    SearchDocument = apps.get_model("core", "SearchDocument")
+    object_ids: Dict[Tuple[str, str], List[str]] = {}
+    for using, label, object_id in documents:
+        object_ids.setdefault((using, label), []).append(object_id)
+    deleted = 0
+    for (using, label), ids in object_ids.items():
+        count, _ = SearchDocument.objects.using(using).filter(model=label, object_id__in=ids).delete()
+        deleted += count
+    return deleted
+
+
+def remove_search_document(sender: type[models.Model], instance: models.Model, using: str = "default", **kwargs: Any) -> None:
+    """
+    Removes the search document of the deleted object, once the deletion is committed.
+
+    Documents of objects deleted in the same transaction (e.g. by a cascading delete)
+    are removed together, with one query per model.
+    """
+    add_to_commit_batch(remove_documents, [(using, get_model_label(sender), get_object_id(instance, using))], using=using)
+    return None
+
+
+def connect_search_index_signals() -> None:
+    """Connects the signals that keep search documents in sync with the indexed models"""
+    for label in DOCUMENT_BUILDERS:
+        model = apps.get_model(label)
+        models.signals.post_save.connect(update_search_document, sender=model, dispatch_uid=f"core.search.update.{label}")
+        models.signals.post_delete.connect(remove_search_document, sender=model, dispatch_uid=f"core.search.remove.{label}")
+    return None
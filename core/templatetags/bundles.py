@@ -0,0 +1,25 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+from core.bundling import get_bundle_sources, get_bundle_static_path
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def script_bundle(name: str) -> str:
+    """
+    Renders the script tag(s) for the given script bundle.
+
+    Renders a single script tag for the built bundle if bundling is enabled and
+    the bundle has been built, else a script tag for each script in the bundle.
+
+    Usage:
+        {% load bundles %}
+        {% script_bundle "session_calendar" %}
+    """
+    bundle_path = get_bundle_static_path(name)
+    paths = [bundle_path] if bundle_path else get_bundle_sources(name)
+    return format_html_join("\n", '<script src="{}"></script>', ((static(path),) for path in paths))
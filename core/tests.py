@@ -0,0 +1,176 @@
+import datetime
+from io import StringIO
+from pathlib import Path
+import tempfile
+import zoneinfo
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from booking.models import Session, UnavailablePeriod
+from booking.utils import business_hours_cache
+from core.bundling import load_manifest
+from core.management.commands.check_query_budgets import Command
+from helpers.dates import get_utc_range_for_local_date
+from helpers.query_budget import QueryBudget
+from news.models import News
+from users.models import UserAccount
+
+
+# An in-process cache, so that the number of queries does not depend on what the database cache holds,
+# or on when tiered caches check their version in it
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tests"}}
+
+
+@override_settings(THROTTLE_RATES={}, CACHES=LOCMEM_CACHES)
+class QueryBudgetTests(TestCase):
+    """Requests every view checked by `python manage.py check_query_budgets` within its query budget"""
+
+    # Most queries allowed for the requests that succeed, by view name and status code
+    MAX_QUERIES = {
+        ("booking:book_session", 201): 20,
+        ("booking:update_session", 200): 20,
+        ("booking:async_calendar", 200): 8,
+        ("booking:async_book_session", 201): 22,
+        ("booking:async_update_session", 200): 22,
+        ("booking:session_link", 302): 3,
+        ("users:account_delete", 302): 35,
+    }
+
+    def setUp(self) -> None:
+        cache.clear()
+        # Values cached by other tests refer to rows that were rolled back
+        business_hours_cache.invalidate()
+        self.command = Command(stdout=StringIO())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.fixtures = self.command.seed(session_count=20)
+
+    def test_views_are_within_budget(self) -> None:
+        statuses = set()
+        for case in self.command.get_cases(self.fixtures):
+            budget = QueryBudget(raise_exception=False)
+            status_code = self.command.run_case(case, self.fixtures["user"], budget)
+            statuses.add((case.view_name, status_code))
+            with self.subTest(view=case.view_name, method=case.method, status=status_code):
+                self.assertLess(status_code, 500)
+                self.assertEqual(budget.violations, [])
+                max_queries = self.MAX_QUERIES.get((case.view_name, status_code), None)
+                if max_queries is not None:
+                    self.assertLessEqual(len(budget.queries), max_queries)
+        # The successful booking, update and link paths (sync and async) are checked, not just their errors
+        self.assertLessEqual(set(self.MAX_QUERIES), statuses)
+
+    def test_command_passes(self) -> None:
+        stdout = StringIO()
+        call_command("check_query_budgets", stdout=stdout)
+        self.assertIn("within budget", stdout.getvalue())
+
+
+class BundleScriptsTests(TestCase):
+    """Runs `python manage.py bundle_scripts`, with bundles written to a temporary directory"""
+
+    def setUp(self) -> None:
+        self.output_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.output_dir.cleanup)
+        settings_override = override_settings(SCRIPT_BUNDLES_ROOT=Path(self.output_dir.name))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(load_manifest.cache_clear)
+
+    def test_report(self) -> None:
+        stdout = StringIO()
+        call_command("bundle_scripts", "--report", stdout=stdout)
+        output = stdout.getvalue()
+        self.assertIn("bundle(s) written to", output)
+        self.assertIn("base.html: ", output)
+
+
+ONE_MICROSECOND = datetime.timedelta(microseconds=1)
+TIMEZONES = sorted(zoneinfo.available_timezones() - {"Factory", "localtime"})
+
+
+class LocalDateFilterTests(TestCase):
+    """
+    Local date filters (see `helpers.dates`) select exactly the instants on the local date, in every timezone
+    (covering every UTC offset, including half and three-quarter hour offsets, and daylight saving time transitions).
+    """
+
+    def test_utc_range_of_every_day_in_every_timezone(self) -> None:
+        """
+        The UTC range of each day of the year starts at the day's first instant in the timezone, and ends after its last.
+        Days skipped by the timezone (e.g. when it moves across the date line) are empty.
+        """
+        year = timezone.now().year
+        offsets = set()
+        for name in TIMEZONES:
+            tz = zoneinfo.ZoneInfo(name)
+            failures = []
+            date = datetime.date(year, 1, 1)
+            while date.year == year:
+                start, end = get_utc_range_for_local_date(date, tz)
+                if (
+                    start > end
+                    or (start - ONE_MICROSECOND).astimezone(tz).date() >= date
+                    or end.astimezone(tz).date() <= date
+                    or (start < end and not start.astimezone(tz).date() == (end - ONE_MICROSECOND).astimezone(tz).date() == date)
+                ):
+                    failures.append(date)
+                offsets.add(datetime.datetime.combine(date, datetime.time(12), tzinfo=tz).utcoffset())
+                date += datetime.timedelta(days=1)
+            with self.subTest(timezone=name):
+                self.assertEqual(failures, [])
+
+        fractional_offsets = {offset for offset in offsets if offset.total_seconds() % 3600}
+        self.assertLessEqual(
+            {datetime.timedelta(hours=-3, minutes=-30), datetime.timedelta(hours=5, minutes=30), datetime.timedelta(hours=5, minutes=45)},
+            fractional_offsets
+        )
+
+    def test_querysets_in_every_utc_offset(self) -> None:
+        """
+        Of the sessions, unavailable periods and news just before, at the start of, at the end of and just after
+        today's date in a timezone for each UTC offset, the date filters return exactly those on the date.
+        """
+        user = UserAccount.objects.create_user(
+            email="local-dates@example.com", password="local-dates", name="Local Date User", is_verified=True
+        )
+        now = timezone.now()
+        zones_by_offset = {}
+        for name in TIMEZONES:
+            zones_by_offset.setdefault(now.astimezone(zoneinfo.ZoneInfo(name)).utcoffset(), name)
+
+        for offset, name in sorted(zones_by_offset.items()):
+            tz = zoneinfo.ZoneInfo(name)
+            today = now.astimezone(tz).date()
+            start, end = get_utc_range_for_local_date(today, tz)
+            instants = {
+                "before": start - datetime.timedelta(seconds=1),
+                "first": start,
+                "last": end - datetime.timedelta(seconds=1),
+                "after": end,
+            }
+            periods = []
+            for label, instant in instants.items():
+                Session.objects.create(
+                    title=label, start=instant, end=instant + datetime.timedelta(minutes=30), booked_by=user
+                )
+                periods.append(UnavailablePeriod.objects.create(start=instant, end=instant + datetime.timedelta(minutes=30)))
+                News.objects.create(headline=label, content=label, author=user, display_at=instant)
+            period_titles = dict(zip((period.pk for period in periods), instants))
+
+            with self.subTest(timezone=name, offset=offset):
+                sessions = Session.objects.filter(booked_by=user)
+                self.assertEqual(set(sessions.today(tz=tz).values_list("title", flat=True)), {"first", "last"})
+                self.assertEqual(
+                    set(sessions.start_date_gte(today, tz=tz).values_list("title", flat=True)), {"first", "last", "after"}
+                )
+                on_date = UnavailablePeriod.objects.filter(pk__in=period_titles).on_local_date(today, tz)
+                self.assertEqual({period_titles[pk] for pk in on_date.values_list("pk", flat=True)}, {"first", "last"})
+                news = News.objects.filter(author=user).today(tz=tz)
+                self.assertEqual(set(news.values_list("headline", flat=True)), {"first", "last"})
+
+            Session.objects.filter(booked_by=user).delete()
+            UnavailablePeriod.objects.filter(pk__in=period_titles).delete()
+            News.objects.filter(author=user).delete()
@@ -1,8 +1,11 @@
 from typing import Any
+from django.conf import settings
 from django.http import HttpRequest
 from django.http.response import HttpResponse as HttpResponse
+from django.utils.crypto import constant_time_compare
 from django.views import generic
 from users.decorators import redirect_authenticated
+from helpers.metrics import registry, PROMETHEUS_CONTENT_TYPE
 
 
 class IndexView(generic.TemplateView):
@@ -14,4 +17,32 @@ class IndexView(generic.TemplateView):
         return super().get(request, *args, **kwargs)
 
 
+
+class MetricsView(generic.View):
+    """
+    Exposes the app's request metrics in Prometheus' text exposition format.
+
+    Accessible to staff users, and to scrapers that send the `METRICS_AUTH_TOKEN`
+    setting as a bearer token in the Authorization header.
+    """
+    http_method_names = ["get"]
+
+    def has_access(self, request: HttpRequest) -> bool:
+        if request.user.is_authenticated and request.user.is_staff:
+            return True
+        auth_token = getattr(settings, "METRICS_AUTH_TOKEN", None)
+        if not auth_token:
+            return False
+        authorization: str = request.headers.get("Authorization", "")
+        return constant_time_compare(authorization, f"Bearer {auth_token}")
+
+    def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        if not self.has_access(request):
+            return HttpResponse(status=403)
+        response = HttpResponse(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+        response["Cache-Control"] = "no-store"
+        return response
+
+
 index_view = IndexView.as_view()
+metrics_view = MetricsView.as_view()
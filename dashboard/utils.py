@@ -4,7 +4,9 @@ from django.db import models
 
 from users.models import UserAccount
 from booking.managers import SessionQuerySet
+from booking.summaries import get_session_summary
 from news.models import News
+from helpers.response import make_etag
 
 
 
@@ -20,22 +22,44 @@ def get_future_sessions_for_user(session_qs: SessionQuerySet, user: UserAccount)
     user_qs = session_qs.filter(booked_by=user)
     pending_sessions = user_qs.pending()
     date_now = timezone.now().astimezone(user.utz).date()
-    future_sessions = pending_sessions.start_date_gte(date_now)
-    missed_sessions = future_sessions.missed(tz=user.utz)
+    future_sessions = pending_sessions.start_date_gte(date_now, tz=user.utz)
+    # Skip looking for missed sessions if the user has none
+    if get_session_summary(user).missed:
+        missed_session_ids = set(future_sessions.missed(tz=user.utz).values_list("pk", flat=True))
+    else:
+        missed_session_ids = set()
     for session in future_sessions:
-        if session in missed_sessions:
-            session.missed = True
-        else:
-            session.missed = False
+        session.missed = session.pk in missed_session_ids
     return future_sessions
 
 
 def get_todays_news_for_user(news_qs: models.QuerySet[News], user: UserAccount) -> models.QuerySet[News]:
     """
-    Return news for the user that were created today (in the user's timezone)
+    Return news for the user that are to be displayed today (in the user's timezone), and have not expired
 
     :param news_qs: Queryset of News objects
     :param user: UserAccount instance
     """
-    today_user_tz = user.to_local_timezone(timezone.now())
-    return news_qs.filter(display_at__date=today_user_tz.date())
+    return news_qs.today(tz=user.utz).unexpired()
+
+
+def get_dashboard_version(user: UserAccount) -> str:
+    """
+    Returns a version string for the given user's dashboard.
+
+    The version changes with the user's details, the date (in the user's timezone), 
+    the user's sessions (including their links and whether they have ended) and the news (including whether they have expired).
+    """
+    now = timezone.now()
+    summary = get_session_summary(user)
+    news_stats = News.objects.aggregate(
+        count=models.Count("pk"),
+        expired=models.Count("pk", filter=models.Q(display_until__lte=now)),
+        last_updated=models.Max("updated_at"),
+    )
+    return make_etag(
+        user.pk, user.utz, user.updated_at,
+        now.astimezone(user.utz).date(),
+        summary.sessions, summary.with_link, summary.ended, summary.last_updated,
+        *news_stats.values()
+    )
@@ -1,25 +1,44 @@
-from typing import Any
+from typing import Any, Optional
+from django.http import HttpRequest, HttpResponse
 from django.views import generic
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from django.views.decorators.cache import cache_control
 
 from booking.models import Session
 from news.models import News
-from .utils import get_future_sessions_for_user, get_todays_news_for_user
+from booking.summaries import get_session_summary
+from .utils import get_future_sessions_for_user, get_todays_news_for_user, get_dashboard_version
 
-session_qs = Session.objects.select_related('booked_by').all().order_by("start__date")
+session_qs = Session.objects.select_related('booked_by', 'link').all().order_by("start__date")
 news_qs = News.objects.all()
 
 
+def dashboard_etag(request: HttpRequest, *args: Any, **kwargs: Any) -> Optional[str]:
+    """Returns the ETag for the request user's dashboard"""
+    if not request.user.is_authenticated:
+        return None
+    return get_dashboard_version(request.user)
+
+
 class DashboardView(LoginRequiredMixin, generic.TemplateView):
     """View for the user dashboard."""
     template_name = "dashboard/dashboard.html"
     http_method_names = ["get"]
 
+    # Browsers may keep the page but must revalidate it (using the ETag) before reuse
+    @method_decorator(cache_control(private=True, no_cache=True))
+    @method_decorator(condition(etag_func=dashboard_etag))
+    def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        return super().get(request, *args, **kwargs)
+
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
         user = self.request.user
         context["future_sessions"] = get_future_sessions_for_user(session_qs, user)
         context["todays_news"] = get_todays_news_for_user(news_qs, user)
+        context["session_summary"] = get_session_summary(user)
         return context
 
 
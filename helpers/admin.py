@@ -0,0 +1,120 @@
+import datetime
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections, models
+from django.http import HttpRequest
+from django.utils.functional import cached_property
+from django_utz.datetime import utzdatetime
+
+
+# Attribute set on changelist objects, holding their datetime fields in the request user's timezone
+LOCALIZED_DATETIMES_ATTR = "_localized_datetimes"
+
+
+def estimate_row_count(model: type[models.Model], using: str = "default") -> Optional[int]:
+    """
+    Returns a cheap estimate of the number of rows in the model's table,
+    or None if the database does not provide one.
+
+    PostgreSQL and MySQL estimates come from the table statistics. On SQLite, the largest rowid
+    is used, which overestimates the count by the number of rows deleted from the end of the table.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [table])
+        elif connection.vendor == "mysql":
+            cursor.execute(
+                "SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s",
+                [table]
+            )
+        elif connection.vendor == "sqlite":
+            cursor.execute(f"SELECT MAX(rowid) FROM {connection.ops.quote_name(table)}")
+        else:
+            return None
+        row = cursor.fetchone()
+    if not row or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that uses an estimated row count for unfiltered querysets on large tables,
+    instead of a full `COUNT(*)`.
+
+    Exact counts are used for filtered querysets, and for tables with fewer rows
+    than the `ADMIN_ESTIMATED_COUNT_THRESHOLD` setting.
+
+    Estimates can count rows that do not exist, so when a page past the first is requested,
+    it is checked to have a row. If it does not, the exact count is used instead.
+    """
+    # Whether `count` is an estimate
+    count_is_estimated = False
+
+    @cached_property
+    def count(self) -> int:
+        threshold = getattr(settings, "ADMIN_ESTIMATED_COUNT_THRESHOLD", None)
+        queryset = self.object_list
+        if threshold is not None and isinstance(queryset, models.QuerySet) and not queryset.query.where:
+            estimate = estimate_row_count(queryset.model, using=queryset.db)
+            if estimate is not None and estimate >= threshold:
+                self.count_is_estimated = True
+                return estimate
+        return super().count
+
+    def validate_number(self, number: Any) -> int:
+        number = super().validate_number(number)
+        if self.count_is_estimated and number > 1:
+            bottom = (number - 1) * self.per_page
+            if not self.object_list[bottom:bottom + 1].exists():
+                # Past the last row, so the page count is made exact, and the number validated against it
+                self.count_is_estimated = False
+                self.__dict__.pop("num_pages", None)
+                self.__dict__["count"] = super().count
+                number = super().validate_number(number)
+        return number
+
+
+class ChangeListPerformanceMixin:
+    """
+    Model admin mixin for changelists of large tables.
+
+    - Uses estimated counts for unfiltered changelists of large tables, and skips the full result count.
+    - Converts the datetime fields listed in `user_tz_fields` to the request user's timezone in a
+    single pass over the page, for display methods to read with `to_user_tz`, instead of resolving
+    the user and their timezone for each cell with django-utz's `*_user_tz` attributes.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    # Datetime fields shown in the changelist in the request user's timezone
+    user_tz_fields = ()
+
+    def get_changelist_instance(self, request: HttpRequest) -> Any:
+        changelist = super().get_changelist_instance(request)
+        if self.user_tz_fields and request.user.is_authenticated:
+            tz = request.user.utz
+            for obj in changelist.result_list:
+                localized: Dict[str, Optional[datetime.datetime]] = {}
+                for field_name in self.user_tz_fields:
+                    value = getattr(obj, field_name)
+                    localized[field_name] = utzdatetime.from_datetime(value.astimezone(tz)) if value else None
+                setattr(obj, LOCALIZED_DATETIMES_ATTR, localized)
+        return changelist
+
+    def to_user_tz(self, obj: models.Model, field_name: str) -> Optional[datetime.datetime]:
+        """
+        Returns the value of the datetime field of the object in the request user's timezone.
+
+        Uses the value converted for the changelist if there is one.
+        """
+        localized = getattr(obj, LOCALIZED_DATETIMES_ATTR, None)
+        if localized is not None and field_name in localized:
+            return localized[field_name]
+        if getattr(obj, field_name) is None:
+            return None
+        return getattr(obj, f"{field_name}_user_tz")
+
@@ -0,0 +1,55 @@
+import statistics
+import time
+from typing import Callable, Dict, List, Any
+
+
+def summarize_latencies(latencies: List[float], elapsed: float = None) -> Dict[str, float]:
+    """
+    Summarize a list of latencies (in seconds) into commonly reported statistics.
+
+    :param latencies: Latencies measured, in seconds.
+    :param elapsed: The total wall-clock time taken to record the latencies, in seconds.
+    If given, the throughput (operations per second) is also reported.
+    :return: A dictionary of the statistics, with latencies in milliseconds.
+    """
+    if not latencies:
+        return {"count": 0}
+    ordered = sorted(latencies)
+    summary = {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": ordered[int(len(ordered) * 0.50)] * 1000,
+        "p95_ms": ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+    if elapsed:
+        summary["ops_per_sec"] = len(ordered) / elapsed
+    return summary
+
+
+def time_call(func: Callable[..., Any], *args: Any, repeat: int = 1, **kwargs: Any) -> List[float]:
+    """
+    Call the function `repeat` times and return the latency of each call in seconds.
+
+    :param func: The function to time.
+    :param repeat: Number of times to call the function.
+    """
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def format_summary(label: str, summary: Dict[str, float]) -> str:
+    """Return a single line, human readable representation of a latency summary"""
+    if not summary.get("count"):
+        return f"{label}: no samples"
+    line = (
+        f"{label}: n={summary['count']} mean={summary['mean_ms']:.2f}ms "
+        f"p50={summary['p50_ms']:.2f}ms p95={summary['p95_ms']:.2f}ms max={summary['max_ms']:.2f}ms"
+    )
+    if "ops_per_sec" in summary:
+        line += f" throughput={summary['ops_per_sec']:.1f}/s"
+    return line
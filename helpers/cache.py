@@ -0,0 +1,217 @@
+"""
+Two-tier caching: a bounded, in-process LRU cache (with a TTL) in front of a cache shared by all worker processes.
+
+Reads are served from the local tier when possible, and fall back to the shared tier (the default Django cache,
+see the `CACHES` setting), whose values are then kept locally. Writes go to both tiers.
+
+Each `TieredCache` has a version counter in the shared tier, which versions its keys (with Django's cache key
+versions). `TieredCache.invalidate` increments the counter, which invalidates the cache's values in every process,
+as each process checks the counter at most every `TIERED_CACHE_VERSION_CHECK_INTERVAL` seconds and then drops
+its local values. Values set or deleted (rather than invalidated) in one process can stay stale in the local
+tier of others for up to `TIERED_CACHE_LOCAL_TIMEOUT` seconds, so values that must be fresh everywhere
+should be changed by invalidating the cache.
+
+Lookups are counted per cache, tier and result in the metrics registry (`helpers.metrics`),
+as `cache_requests_total`, and exposed by the `/metrics` endpoint.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches, BaseCache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+from .metrics import registry
+
+
+CACHE_REQUESTS = registry.counter(
+    "cache_requests_total", "Number of tiered cache lookups, per cache, tier and result (hit or miss)",
+    ("cache", "tier", "result")
+)
+
+_MISSING = object()
+
+
+class LocalLRUCache:
+    """
+    A thread-safe, in-process cache that holds at most `max_entries` values, evicting the least recently used,
+    each for at most `timeout` seconds.
+
+    :param max_entries: The most values the cache holds.
+    :param timeout: The default number of seconds a value is held for.
+    """
+    def __init__(self, max_entries: int, timeout: float) -> None:
+        self.max_entries = max_entries
+        self.timeout = timeout
+        # Per key: (value, expiry time)
+        self._values: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Returns the value of the key, or the default if it is not cached or has expired"""
+        with self._lock:
+            entry = self._values.get(key, None)
+            if entry is None:
+                return default
+            if entry[1] <= time.monotonic():
+                del self._values[key]
+                return default
+            self._values.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any, timeout: Optional[float] = None) -> None:
+        """Caches the value of the key, for `timeout` seconds (the cache's timeout by default, or less)"""
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        with self._lock:
+            self._values[key] = (value, time.monotonic() + timeout)
+            self._values.move_to_end(key)
+            while len(self._values) > self.max_entries:
+                self._values.popitem(last=False)
+        return None
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._values.pop(key, None)
+        return None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+        return None
+
+
+class TieredCache:
+    """
+    A named cache with a local tier (`LocalLRUCache`) in front of a shared Django cache.
+
+    :param name: Name of the cache. Namespaces its keys in the shared tier, and labels its metrics.
+    :param timeout: Default number of seconds values are cached for in the shared tier. Defaults to the shared cache's.
+    :param shared_alias: Alias of the shared Django cache. Defaults to the `TIERED_CACHE_SHARED_ALIAS` setting.
+    :param local_max_entries: The most values held in the local tier. Defaults to `TIERED_CACHE_LOCAL_MAX_ENTRIES`.
+    :param local_timeout: The most seconds values are held in the local tier. Defaults to `TIERED_CACHE_LOCAL_TIMEOUT`.
+    :param version_check_interval: Seconds between checks of the version counter in the shared tier.
+    Defaults to `TIERED_CACHE_VERSION_CHECK_INTERVAL`.
+    """
+    def __init__(
+        self,
+        name: str,
+        timeout: Any = DEFAULT_TIMEOUT,
+        shared_alias: Optional[str] = None,
+        local_max_entries: Optional[int] = None,
+        local_timeout: Optional[float] = None,
+        version_check_interval: Optional[float] = None
+    ) -> None:
+        self.name = name
+        self.timeout = timeout
+        self.shared_alias = shared_alias or settings.TIERED_CACHE_SHARED_ALIAS
+        self.local = LocalLRUCache(
+            local_max_entries or settings.TIERED_CACHE_LOCAL_MAX_ENTRIES,
+            settings.TIERED_CACHE_LOCAL_TIMEOUT if local_timeout is None else local_timeout
+        )
+        self.version_check_interval = (
+            settings.TIERED_CACHE_VERSION_CHECK_INTERVAL if version_check_interval is None else version_check_interval
+        )
+        self._version: Optional[int] = None
+        self._version_checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self) -> BaseCache:
+        return caches[self.shared_alias]
+
+    @property
+    def version_key(self) -> str:
+        return f"tiered:{self.name}:version"
+
+    def make_key(self, key: str) -> str:
+        """Returns the key of the value in the shared tier. It is versioned with the cache's version"""
+        return f"tiered:{self.name}:{key}"
+
+    def get_version(self) -> int:
+        """
+        Returns the cache's version, from the shared tier at most every `version_check_interval` seconds.
+        Values in the local tier are dropped when the version has changed.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._version is not None and now - self._version_checked_at < self.version_check_interval:
+                return self._version
+        version = self.shared.get(self.version_key, None)
+        if version is None:
+            # Start from a version that is unlikely to have been used, in case the counter was evicted
+            self.shared.add(self.version_key, int(time.time()), timeout=None)
+            version = self.shared.get(self.version_key, None) or int(time.time())
+        with self._lock:
+            if version != self._version:
+                self.local.clear()
+                self._version = version
+            self._version_checked_at = now
+        return version
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Returns the value of the key from the local tier, else the shared tier, else the default"""
+        version = self.get_version()
+        value = self.local.get((version, key), _MISSING)
+        if value is not _MISSING:
+            CACHE_REQUESTS.inc(self.name, "local", "hit")
+            return value
+        CACHE_REQUESTS.inc(self.name, "local", "miss")
+
+        value = self.shared.get(self.make_key(key), _MISSING, version=version)
+        if value is _MISSING:
+            CACHE_REQUESTS.inc(self.name, "shared", "miss")
+            return default
+        CACHE_REQUESTS.inc(self.name, "shared", "hit")
+        self.local.set((version, key), value)
+        return value
+
+    def set(self, key: str, value: Any, timeout: Any = DEFAULT_TIMEOUT) -> None:
+        """
+        Caches the value of the key in both tiers.
+
+        :param timeout: Seconds to cache the value for in the shared tier. Defaults to the cache's timeout.
+        """
+        timeout = self.timeout if timeout is DEFAULT_TIMEOUT else timeout
+        version = self.get_version()
+        self.shared.set(self.make_key(key), value, timeout=timeout, version=version)
+        self.local.set((version, key), value, timeout=timeout if isinstance(timeout, (int, float)) else None)
+        return None
+
+    def get_or_set(self, key: str, default: Callable[[], Any], timeout: Any = DEFAULT_TIMEOUT) -> Any:
+        """Returns the value of the key, caching the value returned by `default` if it is not cached"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = default()
+            self.set(key, value, timeout=timeout)
+        return value
+
+    def delete(self, key: str) -> None:
+        """Deletes the value of the key from both tiers. Other processes may keep it in their local tier for a while"""
+        version = self.get_version()
+        self.shared.delete(self.make_key(key), version=version)
+        self.local.delete((version, key))
+        return None
+
+    def invalidate(self) -> int:
+        """
+        Invalidates all values of the cache, in every process, by incrementing the version counter in the shared tier.
+
+        :return: The new version.
+        """
+        try:
+            version = self.shared.incr(self.version_key)
+        except ValueError:
+            # The counter was evicted. Start again from a version that is unlikely to have been used
+            version = int(time.time()) + 1
+            self.shared.set(self.version_key, version, timeout=None)
+        with self._lock:
+            self.local.clear()
+            self._version = version
+            self._version_checked_at = time.monotonic()
+        return version
+
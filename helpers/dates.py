@@ -0,0 +1,83 @@
+"""
+Filters on local dates, as exact UTC datetime ranges.
+
+Filtering a datetime field with a `__date` lookup compares the date of the stored (UTC) datetime,
+not the date in the user's timezone, and cannot use an index on the field. Instead, the local date
+is turned into the UTC range it spans, from its first to (excluding) the next date's first instant
+in the timezone, and the field is filtered with `__gte` and `__lt`, which is an index range scan.
+"""
+import datetime
+from typing import Optional, Tuple
+
+from django.db import models
+from django.utils import timezone
+
+
+def get_utc_range_for_local_date(date: datetime.date, tz: Optional[datetime.tzinfo] = None) -> Tuple[datetime.datetime, datetime.datetime]:
+    """
+    Returns the UTC datetimes at which the date starts and ends (exclusive) in the timezone.
+
+    Days are not always 24 hours long, as daylight saving time transitions make them shorter or longer.
+    If a day does not start at midnight, as when clocks go forward at midnight, it starts at the transition.
+
+    :param date: The local date.
+    :param tz: The timezone. Defaults to the current timezone.
+    """
+    tz = tz or timezone.get_current_timezone()
+    start = datetime.datetime.combine(date, datetime.time.min, tzinfo=tz)
+    end = datetime.datetime.combine(date + datetime.timedelta(days=1), datetime.time.min, tzinfo=tz)
+    return start.astimezone(datetime.timezone.utc), end.astimezone(datetime.timezone.utc)
+
+
+def local_date_q(field: str, date: datetime.date, tz: Optional[datetime.tzinfo] = None) -> models.Q:
+    """
+    Returns a filter for objects whose datetime field falls on the date in the timezone.
+
+    :param field: Name of the datetime field.
+    :param date: The local date.
+    :param tz: The timezone. Defaults to the current timezone.
+    """
+    start, end = get_utc_range_for_local_date(date, tz)
+    return models.Q(**{f"{field}__gte": start, f"{field}__lt": end})
+
+
+class LocalDateQuerySet(models.QuerySet):
+    """
+    Queryset with filters on the local date of a datetime field (`local_date_field`),
+    as UTC ranges that can use an index on the field.
+    """
+    # Datetime field filtered on by default
+    local_date_field: str = "start"
+
+    def on_local_date(self, date: datetime.date, tz: Optional[datetime.tzinfo] = None, field: Optional[str] = None):
+        """
+        Returns objects whose datetime field falls on the date in the timezone
+
+        :param date: The local date
+        :param tz: Timezone of the date. Defaults to the current timezone
+        :param field: Datetime field to filter on. Defaults to `local_date_field`
+        """
+        return self.filter(local_date_q(field or self.local_date_field, date, tz))
+
+
+    def from_local_date(self, date: datetime.date, tz: Optional[datetime.tzinfo] = None, field: Optional[str] = None):
+        """
+        Returns objects whose datetime field falls on or after the date in the timezone
+
+        :param date: The local date
+        :param tz: Timezone of the date. Defaults to the current timezone
+        :param field: Datetime field to filter on. Defaults to `local_date_field`
+        """
+        start, _ = get_utc_range_for_local_date(date, tz)
+        return self.filter(**{f"{field or self.local_date_field}__gte": start})
+
+
+    def local_today(self, tz: Optional[datetime.tzinfo] = None, field: Optional[str] = None):
+        """
+        Returns objects whose datetime field falls on today's date in the timezone
+
+        :param tz: The timezone. Defaults to the current timezone
+        :param field: Datetime field to filter on. Defaults to `local_date_field`
+        """
+        tz = tz or timezone.get_current_timezone()
+        return self.on_local_date(timezone.now().astimezone(tz).date(), tz, field=field)
@@ -0,0 +1,220 @@
+"""
+Per-request instrumentation.
+
+`InstrumentationMiddleware` records each request's latency, database query count,
+database time and template render time, per view, in the metrics registry (`helpers.metrics`),
+and logs a structured line for requests slower than the `SLOW_REQUEST_THRESHOLD` setting.
+
+Database queries are timed with an execute wrapper installed on every database connection,
+templates are timed by the `InstrumentedDjangoTemplates` template backend, and stages of form
+validation are timed with `record_validation_stage`.
+"""
+import contextlib
+import contextvars
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpRequest, HttpResponse
+from django.template.backends.django import DjangoTemplates, Template
+
+from .metrics import registry, DEFAULT_COUNT_BUCKETS
+
+
+logger = logging.getLogger(__name__)
+
+REQUEST_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "Request latency in seconds, per view", ("view", "method")
+)
+REQUESTS = registry.counter(
+    "http_requests_total", "Number of requests handled, per view and response status", ("view", "method", "status")
+)
+DB_QUERIES = registry.histogram(
+    "http_request_db_queries", "Number of database queries made per request, per view", ("view",),
+    buckets=DEFAULT_COUNT_BUCKETS
+)
+DB_DURATION = registry.histogram(
+    "http_request_db_duration_seconds", "Total database query time per request in seconds, per view", ("view",)
+)
+TEMPLATE_DURATION = registry.histogram(
+    "http_request_template_render_seconds", "Total template render time per request in seconds, per view", ("view",)
+)
+VALIDATION_STAGE_DURATION = registry.histogram(
+    "form_validation_stage_duration_seconds", "Time spent in each stage of form validation in seconds, per form and stage",
+    ("form", "stage")
+)
+
+
+class RequestStats:
+    """Stats collected for the request being handled"""
+    __slots__ = ("query_count", "query_time", "template_time", "template_depth", "validation_time")
+
+    def __init__(self) -> None:
+        self.query_count = 0
+        self.query_time = 0.0
+        self.template_time = 0.0
+        self.validation_time = 0.0
+        # Depth of nested template renders, so that included templates are not timed twice
+        self.template_depth = 0
+
+
+# A context variable, rather than a thread local, so that stats are also
+# collected for queries made by async views through `sync_to_async`
+_current_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("request_stats", default=None)
+
+
+def get_request_stats() -> Optional[RequestStats]:
+    """Returns the stats of the request being handled, or None if no request is being instrumented"""
+    return _current_stats.get()
+
+
+def record_query(execute: Callable, sql: str, params: Any, many: bool, context: Dict[str, Any]) -> Any:
+    """Database execute wrapper that counts and times queries made while a request is instrumented"""
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.query_time += time.perf_counter() - start
+        stats.query_count += 1
+
+
+def install_query_recorder(connection, **kwargs: Any) -> None:
+    """Installs the query recorder on the given database connection, if not installed already"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+    return None
+
+
+connection_created.connect(install_query_recorder, dispatch_uid="helpers.instrumentation.install_query_recorder")
+
+
+@contextlib.contextmanager
+def record_validation_stage(form: str, stage: str) -> Iterator[None]:
+    """
+    Times a stage of form validation, per form and stage, and adds it to the validation time
+    of the request being handled (if any).
+
+    :param form: Name of the form, e.g. its class name
+    :param stage: Name of the validation stage
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        VALIDATION_STAGE_DURATION.observe(duration, form, stage)
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.validation_time += duration
+
+
+class InstrumentedTemplate(Template):
+    """Django template wrapper that times rendering when a request is instrumented"""
+
+    def render(self, context: Optional[Dict[str, Any]] = None, request: Optional[HttpRequest] = None) -> str:
+        stats = _current_stats.get()
+        if stats is None:
+            return super().render(context, request)
+        stats.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.template_depth -= 1
+            if stats.template_depth == 0:
+                stats.template_time += time.perf_counter() - start
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, with template render times recorded per request"""
+
+    def from_string(self, template_code: str) -> InstrumentedTemplate:
+        return InstrumentedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name: str) -> InstrumentedTemplate:
+        template = super().get_template(template_name)
+        return InstrumentedTemplate(template.template, self)
+
+
+def get_view_name(request: HttpRequest) -> str:
+    """Returns the name of the view that handled the request, as used in metric labels"""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "<unresolved>"
+    return match.view_name or match._func_path
+
+
+class InstrumentationMiddleware:
+    """
+    Records the latency, database query count, database time and template render time
+    of each request, per view, and logs requests slower than `SLOW_REQUEST_THRESHOLD` milliseconds.
+
+    Should be the first middleware, so that the time spent in other middleware is included.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable) -> None:
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.slow_request_threshold = getattr(settings, "SLOW_REQUEST_THRESHOLD", None)
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        self.record(request, response, stats, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        self.record(request, response, stats, time.perf_counter() - start)
+        return response
+
+    def record(self, request: HttpRequest, response: HttpResponse, stats: RequestStats, duration: float) -> None:
+        """Records the request's stats in the metrics registry, and logs the request if it was slow"""
+        view = get_view_name(request)
+        REQUEST_LATENCY.observe(duration, view, request.method)
+        REQUESTS.inc(view, request.method, str(response.status_code))
+        DB_QUERIES.observe(stats.query_count, view)
+        DB_DURATION.observe(stats.query_time, view)
+        TEMPLATE_DURATION.observe(stats.template_time, view)
+
+        if self.slow_request_threshold is not None and duration * 1000 >= self.slow_request_threshold:
+            logger.warning(json.dumps({
+                "event": "slow_request",
+                "method": request.method,
+                "path": request.path,
+                "view": view,
+                "status": response.status_code,
+                "duration_ms": round(duration * 1000, 2),
+                "db_queries": stats.query_count,
+                "db_duration_ms": round(stats.query_time * 1000, 2),
+                "template_duration_ms": round(stats.template_time * 1000, 2),
+                "validation_duration_ms": round(stats.validation_time * 1000, 2),
+            }))
+        return None
@@ -0,0 +1,227 @@
+"""
+Query budgets, to catch N+1 query patterns and query count regressions.
+
+`QueryBudget` records every query made (on the current thread) while it is active, along with
+the line of project code that made it. On exit, it raises `QueryBudgetExceeded` if more queries
+were made than allowed, or if the same query shape (the SQL with its parameters left out) was made
+more times than allowed, as happens when a related object is fetched for each object in a loop.
+
+Example:
+
+    with QueryBudget(max_queries=10, max_repeats=3):
+        client.get("/dashboard/")
+
+    @query_budget(max_repeats=3)
+    def get_context_data(self, **kwargs):
+        ...
+"""
+import collections
+import functools
+import os
+import re
+import sys
+import time
+import types
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.db import connections
+
+
+# Default number of times the same query shape may be made within a budget
+DEFAULT_MAX_REPEATS = 5
+
+IN_CLAUSE_PATTERN = re.compile(r"\((?:\s*%s\s*,)+\s*%s\s*\)")
+NUMBER_PATTERN = re.compile(r"\b\d+\b")
+STRING_PATTERN = re.compile(r"'(?:[^']|'')*'")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when more queries are made within a query budget than it allows"""
+    pass
+
+
+@dataclass
+class RecordedQuery:
+    """A query made within a query budget"""
+    sql: str
+    shape: str
+    origin: str
+    duration: float
+
+
+def get_query_shape(sql: str) -> str:
+    """
+    Returns the shape of the SQL query, with literals and parameter
+    lists replaced, so that queries differing only in values compare equal.
+    """
+    shape = IN_CLAUSE_PATTERN.sub("(...)", sql)
+    shape = STRING_PATTERN.sub("?", shape)
+    return NUMBER_PATTERN.sub("?", shape)
+
+
+# Project files whose frames are never reported as query origins, as they only wrap query execution
+IGNORED_ORIGIN_FILES = {
+    os.path.abspath(__file__),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "instrumentation.py"),
+}
+
+
+def _is_project_file(filename: str) -> bool:
+    return (
+        filename.startswith(str(settings.BASE_DIR))
+        and "site-packages" not in filename
+        and os.path.abspath(filename) not in IGNORED_ORIGIN_FILES
+    )
+
+
+def _get_template_origin(frame: types.FrameType) -> Optional[str]:
+    """Returns the template line being rendered in the frame, if the frame renders a template node"""
+    if frame.f_code.co_name != "render_annotated" or "django" not in frame.f_code.co_filename:
+        return None
+    node = frame.f_locals.get("self", None)
+    context = frame.f_locals.get("context", None)
+    template = getattr(context, "template", None)
+    if node is None or template is None or not getattr(template.origin, "name", None):
+        return None
+    path = os.path.relpath(template.origin.name, settings.BASE_DIR)
+    return f"{path}:{node.token.lineno} (template)"
+
+
+def get_query_origin() -> str:
+    """
+    Returns the innermost line of project code (or of a project template) 
+    in the current stack, as "path:line in function".
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        template_origin = _get_template_origin(frame)
+        if template_origin:
+            return template_origin
+        if _is_project_file(frame.f_code.co_filename):
+            path = os.path.relpath(frame.f_code.co_filename, settings.BASE_DIR)
+            return f"{path}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "<unknown>"
+
+
+def get_cache_tables() -> List[str]:
+    """Returns the tables of the caches stored in the database (see the `CACHES` setting)"""
+    return [
+        config["LOCATION"] for config in getattr(settings, "CACHES", {}).values()
+        if config.get("BACKEND", "").endswith(".DatabaseCache")
+    ]
+
+
+class QueryBudget:
+    """
+    Context manager that records the queries made within it, and checks them against a budget.
+
+    Only queries made on the current thread are recorded. That includes the queries of async views
+    requested with the test client, as thread sensitive `sync_to_async` functions (e.g. those of the async ORM)
+    run on the thread that called `async_to_sync`, which is the client's.
+
+    :param max_queries: Maximum number of queries allowed. Unlimited if None.
+    :param max_repeats: Maximum number of times the same query shape may be made.
+    Defaults to the `QUERY_BUDGET_MAX_REPEATS` setting. Unlimited if 0.
+    :param using: Aliases of the databases whose queries are recorded. Defaults to all databases.
+    :param raise_exception: Whether to raise `QueryBudgetExceeded` on exit if the budget is exceeded.
+    If False, check `violations` after exit instead.
+    """
+    def __init__(
+        self,
+        max_queries: Optional[int] = None,
+        max_repeats: Optional[int] = None,
+        using: Optional[List[str]] = None,
+        raise_exception: bool = True
+    ) -> None:
+        self.max_queries = max_queries
+        if max_repeats is None:
+            max_repeats = getattr(settings, "QUERY_BUDGET_MAX_REPEATS", DEFAULT_MAX_REPEATS)
+        self.max_repeats = max_repeats
+        self.using = using or list(connections)
+        self.raise_exception = raise_exception
+        self.queries: List[RecordedQuery] = []
+        self._wrappers = []
+
+    def __enter__(self) -> "QueryBudget":
+        self.queries = []
+        for alias in self.using:
+            wrapper = connections[alias].execute_wrapper(self._record)
+            wrapper.__enter__()
+            self._wrappers.append(wrapper)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        while self._wrappers:
+            self._wrappers.pop().__exit__(exc_type, exc_value, traceback)
+        if exc_type is None and self.raise_exception and self.violations:
+            raise QueryBudgetExceeded("\n\n".join(self.violations))
+        return None
+
+    def _record(self, execute: Callable, sql: str, params: Any, many: bool, context: Dict[str, Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(RecordedQuery(
+                sql=sql, shape=get_query_shape(sql),
+                origin=get_query_origin(), duration=time.perf_counter() - start
+            ))
+
+    def get_repeated_queries(self) -> Dict[str, List[RecordedQuery]]:
+        """
+        Returns the queries made more times than allowed, by query shape.
+
+        Queries of the caches stored in the database are left out, as they are cache requests rather than N+1 queries,
+        and how many are made depends on what is cached at the time (e.g. when tiered caches check their version).
+        """
+        if not self.max_repeats:
+            return {}
+        cache_tables = [f'"{table}"' for table in get_cache_tables()]
+        by_shape: Dict[str, List[RecordedQuery]] = collections.defaultdict(list)
+        for query in self.queries:
+            if any(table in query.sql for table in cache_tables):
+                continue
+            by_shape[query.shape].append(query)
+        return {shape: queries for shape, queries in by_shape.items() if len(queries) > self.max_repeats}
+
+    @property
+    def violations(self) -> List[str]:
+        """Descriptions of how the budget was exceeded. Empty if it was not."""
+        violations = []
+        if self.max_queries is not None and len(self.queries) > self.max_queries:
+            violations.append(f"{len(self.queries)} queries were made. The budget is {self.max_queries}.")
+
+        for shape, queries in self.get_repeated_queries().items():
+            origins = collections.Counter(query.origin for query in queries)
+            origin_lines = "\n".join(f"    {count}x from {origin}" for origin, count in origins.most_common())
+            violations.append(
+                f"The same query was made {len(queries)} times (max {self.max_repeats}), "
+                f"likely an N+1 query:\n    {shape}\n{origin_lines}"
+            )
+        return violations
+
+    def report(self, file=sys.stdout) -> None:
+        """Writes the number of queries made, by origin, to the given file"""
+        origins = collections.Counter(query.origin for query in self.queries)
+        file.write(f"{len(self.queries)} queries\n")
+        for origin, count in origins.most_common():
+            file.write(f"  {count:>4}x {origin}\n")
+        return None
+
+
+def query_budget(max_queries: Optional[int] = None, max_repeats: Optional[int] = None, using: Optional[List[str]] = None):
+    """
+    Create a decorator that runs the decorated function within a query budget.
+
+    Takes the same arguments as `QueryBudget`. Raises `QueryBudgetExceeded` if the budget is exceeded.
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with QueryBudget(max_queries=max_queries, max_repeats=max_repeats, using=using):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,6 +1,20 @@
-from django.http import HttpRequest, HttpResponse
+from typing import Any
+import hashlib
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import render
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Clients can request the compact wire format of JSON APIs that support it
+# by sending this media type in the `Accept` header or the `format=compact` query parameter.
+COMPACT_JSON_CONTENT_TYPE = "application/vnd.compact+json"
+
 
 def response_message(
         request: HttpRequest, 
@@ -25,3 +39,57 @@ def response_message(
     if not request.user.is_authenticated:
         raise PermissionError("User must be authenticated to view this message.")
     return render(request, "core/message.html", context, status=status)
+
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Returns an (unquoted) ETag value derived from the given parts.
+
+    The parts should together identify the version of the content the ETag is for.
+    """
+    version = ":".join(str(part) for part in parts)
+    return hashlib.md5(version.encode(), usedforsecurity=False).hexdigest()
+
+
+def wants_compact_json(request: HttpRequest) -> bool:
+    """
+    Returns True if the client requested the compact JSON wire format, 
+    either through the `Accept` header or the `format` query parameter.
+    """
+    if request.GET.get("format", None) == "compact":
+        return True
+    return COMPACT_JSON_CONTENT_TYPE in request.headers.get("Accept", "")
+
+
+def fast_json_dumps(data: Any) -> bytes:
+    """
+    Serializes data to compact JSON bytes. 
+    
+    Uses `orjson` if it is installed, else falls back to the standard library's json module.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, default=DjangoJSONEncoder().default)
+    return json.dumps(data, cls=DjangoJSONEncoder, separators=(",", ":")).encode()
+
+
+class CompactJsonResponse(JsonResponse):
+    """
+    A JsonResponse serialized with `fast_json_dumps`, without insignificant whitespace.
+
+    :param data: The data to serialize. Must be a dict unless `safe` is False.
+    :param content_type: The content type of the response.
+    """
+    def __init__(
+            self, 
+            data: Any, 
+            safe: bool = True, 
+            content_type: str = COMPACT_JSON_CONTENT_TYPE, 
+            **kwargs: Any
+        ) -> None:
+        if safe and not isinstance(data, dict):
+            raise TypeError(
+                "In order to allow non-dict objects to be serialized set the "
+                "safe parameter to False."
+            )
+        HttpResponse.__init__(self, content=fast_json_dumps(data), content_type=content_type, **kwargs)
@@ -0,0 +1,116 @@
+from typing import Hashable, List, Set
+
+from django.core.paginator import EmptyPage
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from helpers.admin import EstimatedCountPaginator, estimate_row_count
+from helpers.transactions import add_to_commit_batch
+from links.models import Link
+from users.models import UserAccount
+
+
+batches: List[Set[Hashable]] = []
+
+
+def record_batch(values: Set[Hashable]) -> None:
+    batches.append(values)
+
+
+class CommitBatchTests(TestCase):
+    """Values added with `add_to_commit_batch` are passed to the function once, on commit"""
+
+    def setUp(self) -> None:
+        batches.clear()
+
+    def test_values_are_batched(self) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            for value in range(3):
+                add_to_commit_batch(record_batch, [value])
+            self.assertEqual(batches, [])
+        self.assertEqual(batches, [{0, 1, 2}])
+
+    def test_values_of_rolled_back_savepoint_are_dropped(self) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            add_to_commit_batch(record_batch, [1])
+            try:
+                with transaction.atomic():
+                    add_to_commit_batch(record_batch, [2])
+                    raise ValueError
+            except ValueError:
+                pass
+            add_to_commit_batch(record_batch, [3])
+        self.assertEqual(batches, [{1, 3}])
+
+    def test_values_before_rolled_back_savepoint_are_kept(self) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                add_to_commit_batch(record_batch, [1])
+            try:
+                with transaction.atomic():
+                    add_to_commit_batch(record_batch, [2])
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertEqual(batches, [{1}])
+
+    def test_batch_of_rolled_back_savepoint_does_not_run(self) -> None:
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    add_to_commit_batch(record_batch, [1])
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertEqual(callbacks, [])
+        self.assertEqual(batches, [])
+
+    def test_new_batch_after_commit(self) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            add_to_commit_batch(record_batch, [1])
+        with self.captureOnCommitCallbacks(execute=True):
+            add_to_commit_batch(record_batch, [2])
+        self.assertEqual(batches, [{1}, {2}])
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    """Unfiltered querysets of tables with at least `ADMIN_ESTIMATED_COUNT_THRESHOLD` rows are counted by estimate"""
+
+    def setUp(self) -> None:
+        user = UserAccount.objects.create_user(
+            email="paginator@example.com", password="paginator", name="Paginator User", is_verified=True
+        )
+        links = [Link.objects.create(url=f"https://example.com/{index}", created_by=user) for index in range(5)]
+        # Deleted from the start of the table, so the estimate still counts them
+        Link.objects.filter(pk__in=[link.pk for link in links[:3]]).delete()
+        self.estimate = estimate_row_count(Link)
+        if self.estimate is None:
+            self.skipTest("The database does not estimate row counts")
+
+    def test_exact_count_below_threshold(self) -> None:
+        with override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=self.estimate + 1):
+            paginator = EstimatedCountPaginator(Link.objects.all(), per_page=1)
+            self.assertEqual(paginator.count, 2)
+            self.assertFalse(paginator.count_is_estimated)
+
+    def test_estimated_count_at_threshold(self) -> None:
+        with override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=self.estimate):
+            paginator = EstimatedCountPaginator(Link.objects.all(), per_page=1)
+            self.assertEqual(paginator.count, self.estimate)
+            self.assertGreater(paginator.count, 2)
+            self.assertTrue(paginator.count_is_estimated)
+            # Filtered querysets are counted exactly
+            filtered = EstimatedCountPaginator(Link.objects.filter(expired=False), per_page=1)
+            self.assertEqual(filtered.count, 2)
+
+    def test_pages_past_last_row_use_exact_count(self) -> None:
+        with override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=self.estimate):
+            paginator = EstimatedCountPaginator(Link.objects.all(), per_page=1)
+            self.assertEqual(len(paginator.page(2).object_list), 1)
+            self.assertTrue(paginator.count_is_estimated)
+            with self.assertRaises(EmptyPage):
+                paginator.page(3)
+            self.assertEqual((paginator.count, paginator.num_pages), (2, 2))
+
+            paginator = EstimatedCountPaginator(Link.objects.all(), per_page=1)
+            self.assertEqual(paginator.get_page(3).number, 2)
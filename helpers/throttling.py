@@ -0,0 +1,167 @@
+import functools
+import hashlib
+import json
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpRequest, HttpResponse, JsonResponse
+
+
+PERIODS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """
+    Parses a rate of the form "<requests>/<period>", e.g. "5/m", into the
+    number of requests allowed and the period in seconds.
+
+    :raises ValueError: If the rate is not valid.
+    """
+    num_requests, period = rate.split("/")
+    return int(num_requests), PERIODS[period[0].lower()]
+
+
+def get_request_ip(request: HttpRequest) -> Optional[str]:
+    """
+    Returns the IP address of the client that made the request.
+
+    Behind reverse proxies (`THROTTLE_TRUSTED_PROXY_COUNT` of them), it is read from the `THROTTLE_CLIENT_IP_HEADER`
+    header, as the address added by the outermost trusted proxy. Addresses before it may have been set by the client.
+    Otherwise, or if the header is missing, it is the address the request came from (`REMOTE_ADDR`).
+    """
+    header = getattr(settings, "THROTTLE_CLIENT_IP_HEADER", "")
+    proxy_count = getattr(settings, "THROTTLE_TRUSTED_PROXY_COUNT", 0)
+    if header and proxy_count > 0:
+        meta_key = header if header.startswith("HTTP_") else f"HTTP_{header.upper().replace('-', '_')}"
+        addresses = [address.strip() for address in request.META.get(meta_key, "").split(",") if address.strip()]
+        if addresses:
+            return addresses[-min(proxy_count, len(addresses))]
+    return request.META.get("REMOTE_ADDR", None)
+
+
+def get_request_email(request: HttpRequest) -> Optional[str]:
+    """Returns the (normalized) email in the JSON body of the request, if any"""
+    try:
+        email = json.loads(request.body).get("email", None)
+    except (ValueError, AttributeError):
+        return None
+    return email.strip().lower() if isinstance(email, str) and email else None
+
+
+def get_request_user_id(request: HttpRequest) -> Optional[str]:
+    """Returns the ID of the authenticated request user, if any"""
+    if request.user.is_authenticated:
+        return str(request.user.pk)
+    return None
+
+
+# Functions that return the value a request is throttled by, for each throttle key kind
+KEY_FUNCS: Dict[str, Callable[[HttpRequest], Optional[str]]] = {
+    "ip": get_request_ip,
+    "email": get_request_email,
+    "user": get_request_user_id,
+}
+
+
+class FixedWindowThrottle:
+    """
+    A fixed window rate limiter with its counters stored in Django's cache.
+
+    Time is split into windows of `period` seconds. A request adds one to the counter of each of its keys
+    in the current window, and is rejected if any of the counters goes over `limit`. Counters are updated
+    with `cache.add` and `cache.incr`, not read and written back, so concurrent requests cannot both take
+    the last request allowed (on cache backends where `incr` is atomic, e.g. Redis and Memcached).
+
+    :param scope: The scope of the counters, e.g. the endpoint being throttled.
+    :param rate: The rate of the form "<requests>/<period>".
+    """
+    def __init__(self, scope: str, rate: str) -> None:
+        self.scope = scope
+        self.limit, self.period = parse_rate(rate)
+
+    def get_window(self, now: float) -> int:
+        """Returns the index of the window the given time (in seconds) is in"""
+        return int(now // self.period)
+
+    def get_cache_key(self, kind: str, value: str, window: int) -> str:
+        digest = hashlib.md5(value.encode(), usedforsecurity=False).hexdigest()
+        return f"throttle:{self.scope}:{kind}:{digest}:{window}"
+
+    def hit(self, keys: Iterable[Tuple[str, str]], now: Optional[float] = None) -> float:
+        """
+        Counts a request against the counter of each of the given keys in the current window.
+
+        :param keys: (kind, value) pairs identifying the counters.
+        :param now: The current time in seconds. Defaults to `time.time()`.
+        :return: 0 if the request is within the limit of every counter, else the number of
+        seconds to wait before the next window starts.
+        """
+        now = time.time() if now is None else now
+        window = self.get_window(now)
+        exceeded = False
+        for kind, value in keys:
+            cache_key = self.get_cache_key(kind, value, window)
+            # The key is only used in this window, so it can expire once the window has passed
+            cache.add(cache_key, 0, timeout=self.period)
+            try:
+                count = cache.incr(cache_key)
+            except ValueError:
+                # The key expired between `add` and `incr`
+                cache.add(cache_key, 1, timeout=self.period)
+                count = 1
+            exceeded = exceeded or count > self.limit
+
+        if exceeded:
+            return (window + 1) * self.period - now
+        return 0
+
+
+def get_throttle_rate(scope: str) -> Optional[str]:
+    """Returns the throttle rate for the given scope as defined in the `THROTTLE_RATES` setting"""
+    return getattr(settings, "THROTTLE_RATES", {}).get(scope, None)
+
+
+def throttle(scope: str, by: Iterable[str] = ("ip",)):
+    """
+    Create a decorator that throttles requests to a view method,
+    at the rate defined for the scope in the `THROTTLE_RATES` setting.
+
+    Throttled requests are rejected with a 429 response before the view runs.
+    Requests are not throttled if no rate is defined for the scope.
+
+    :param scope: The throttle scope, e.g. the name of the endpoint.
+    :param by: What to throttle requests by. Any of "ip", "email" (from the JSON body) and "user".
+    Each is throttled separately, at the same rate.
+    """
+    kinds = tuple(by)
+    for kind in kinds:
+        if kind not in KEY_FUNCS:
+            raise ValueError(f"Cannot throttle by '{kind}'. Choose from {', '.join(KEY_FUNCS)}")
+
+    def decorator(view_func: Callable[..., HttpResponse]):
+        @functools.wraps(view_func)
+        def wrapper(view, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+            rate = get_throttle_rate(scope)
+            if rate:
+                keys = []
+                for kind in kinds:
+                    value = KEY_FUNCS[kind](request)
+                    if value:
+                        keys.append((kind, value))
+                wait = FixedWindowThrottle(scope, rate).hit(keys)
+                if wait:
+                    response = JsonResponse(
+                        data={
+                            "status": "error",
+                            "detail": "Too many requests! Please try again later."
+                        },
+                        status=429
+                    )
+                    response["Retry-After"] = str(int(wait) + 1)
+                    return response
+            return view_func(view, request, *args, **kwargs)
+        return wrapper
+
+    return decorator
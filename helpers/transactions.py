@@ -0,0 +1,98 @@
+"""
+Side effects of a transaction's changes, batched and applied once the transaction is committed.
+
+Signal handlers run once per object, so side effects applied per object (e.g. deleting an object's search document,
+or invalidating the cached summaries of its user) cost a query or cache request per object, which adds up when
+objects are deleted or saved together (e.g. by a cascading delete). With `add_to_commit_batch`, each handler adds
+the object's values (e.g. its ID) to a batch of the transaction instead, and the batch is passed to the side effect's
+function once, when the transaction is committed.
+
+Batches follow `transaction.on_commit`: values added in a savepoint that is rolled back are dropped with it,
+and outside of transactions the function is called right away.
+"""
+from typing import Any, Callable, Hashable, Iterable, Optional, Set
+import weakref
+
+from django.db import transaction
+from django.db.backends.base.base import BaseDatabaseWrapper
+
+
+# Pending batches of each connection, by function. A batch is only referenced by its entries,
+# so it is dropped once all of them have been dropped
+_pending_batches: "weakref.WeakKeyDictionary[BaseDatabaseWrapper, weakref.WeakValueDictionary[Callable, CommitBatch]]" = weakref.WeakKeyDictionary()
+
+
+class CommitBatch:
+    """
+    Values collected in a transaction, passed together to `func` when the transaction is committed.
+
+    Values are added in entries, each registered with `transaction.on_commit`. An entry is only referenced
+    by the connection's commit callbacks, which drop it if its savepoint is rolled back, so the batch
+    only holds its entries weakly, and the values of entries that were dropped are left out.
+
+    :param func: Called with the set of values
+    """
+    __slots__ = ("func", "entries", "done", "__weakref__")
+
+    def __init__(self, func: Callable[[Set[Hashable]], Any]) -> None:
+        self.func = func
+        self.entries: "weakref.WeakSet[CommitBatchEntry]" = weakref.WeakSet()
+        self.done = False
+
+    def run(self) -> None:
+        """Passes the values of the entries that were not dropped to the function, once"""
+        if self.done:
+            return None
+        self.done = True
+        values: Set[Hashable] = set()
+        for entry in list(self.entries):
+            values.update(entry.values)
+        self.func(values)
+        return None
+
+
+class CommitBatchEntry:
+    """
+    Values added to a batch, registered with `transaction.on_commit`.
+    The first entry of the batch called on commit runs the batch.
+
+    :param batch: The batch the values were added to
+    :param values: The values added
+    """
+    __slots__ = ("batch", "values", "__weakref__")
+
+    def __init__(self, batch: CommitBatch, values: Set[Hashable]) -> None:
+        self.batch = batch
+        self.values = values
+        batch.entries.add(self)
+
+    def __call__(self) -> None:
+        self.batch.run()
+        return None
+
+
+def add_to_commit_batch(func: Callable[[Set[Hashable]], Any], values: Iterable[Hashable], using: Optional[str] = None) -> None:
+    """
+    Adds the values to the batch passed to `func` when the current transaction is committed.
+
+    All values added for the same function in a transaction are passed to it in a single call, as a set,
+    except those added in savepoints that were rolled back. Outside of transactions, `func` is called
+    with the values right away.
+
+    :param func: Function that applies the side effect to a set of values. Should be a module-level
+    function, as batches are collected per function.
+    :param values: Hashable values, e.g. object IDs
+    :param using: Alias of the database of the transaction
+    """
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        func(set(values))
+        return None
+
+    pending = _pending_batches.setdefault(connection, weakref.WeakValueDictionary())
+    batch = pending.get(func, None)
+    if batch is None or batch.done:
+        batch = CommitBatch(func)
+        pending[func] = batch
+    transaction.on_commit(CommitBatchEntry(batch, set(values)), using=using, robust=False)
+    return None
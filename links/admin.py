@@ -4,15 +4,19 @@ from django.http import HttpRequest
 
 from .models import Link
 from .forms import LinkForm
+from helpers.admin import ChangeListPerformanceMixin
+from core.search import IndexedSearchMixin
 
 
 @admin.register(Link)
-class LinkModelAdmin(admin.ModelAdmin):
+class LinkModelAdmin(IndexedSearchMixin, ChangeListPerformanceMixin, admin.ModelAdmin):
     """Model admin for the Link model"""
     form = LinkForm
     readonly_fields = ["identifier", "created_at", "updated_at"]
-    search_fields = ["created_by__email", "created_by__firstname", "created_by__lastname", "identifier"]
+    search_fields = ["identifier", "url", "created_by__email", "created_by__name"]
     list_display = ["identifier", "created_by", "created", "updated"]
+    list_select_related = ["created_by"]
+    user_tz_fields = ["created_at", "updated_at"]
 
     # Links should only be created by sessions
     def has_add_permission(self, request: HttpRequest) -> bool:
@@ -20,8 +24,8 @@ class LinkModelAdmin(admin.ModelAdmin):
 
     def created(self, obj: Link) -> datetime.datetime:
         """Created time in the request user's timezone"""
-        return obj.created_at_user_tz
+        return self.to_user_tz(obj, "created_at")
     
     def updated(self, obj: Link) -> datetime.datetime:
         """Updated time in the request user's timezone"""
-        return obj.updated_at_user_tz
+        return self.to_user_tz(obj, "updated_at")
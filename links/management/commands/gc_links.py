@@ -0,0 +1,47 @@
+from typing import Any
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from links.models import Link
+
+
+class Command(BaseCommand):
+    help = (
+        "Mark the links of sessions that have ended as expired, and delete the links that are not attached "
+        "to any session (such as those of deleted sessions), in batches. Run periodically, e.g. daily."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=None,
+            help="Number of links marked as expired per query, and deleted per transaction. Defaults to the LINK_GC_BATCH_SIZE setting"
+        )
+        parser.add_argument(
+            "--min-age", type=float, default=24,
+            help="Only delete links created at least this many hours ago, so that links being attached are not deleted"
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Count the links that would be marked or deleted, without changing them")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        batch_size = options["batch_size"] or settings.LINK_GC_BATCH_SIZE
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1")
+        if options["min_age"] < 0:
+            raise CommandError("--min-age cannot be negative")
+        now = timezone.now()
+        created_before = now - datetime.timedelta(hours=options["min_age"])
+
+        if options["dry_run"]:
+            expired = Link.objects.past_expiry(now).count()
+            unbound = Link.objects.unbound().filter(created_at__lt=created_before).count()
+            self.stdout.write(f"Would mark {expired} link(s) as expired, and delete {unbound} unattached link(s)")
+            return None
+
+        expired = Link.objects.mark_expired(batch_size, now=now)
+        self.stdout.write(self.style.SUCCESS(f"Marked {expired} link(s) as expired"))
+        deleted = Link.objects.delete_unbound(created_before, batch_size)
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} unattached link(s)"))
+        return None
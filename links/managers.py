@@ -0,0 +1,101 @@
+from typing import Optional
+from django.apps import apps
+from django.db import models, transaction
+from django.db.models.manager import BaseManager
+from django.utils import timezone
+import datetime
+
+
+class LinkQuerySet(models.QuerySet):
+    """Custom queryset for the Link model"""
+
+    def _session_exists(self) -> models.Exists:
+        # Sessions are in the booking app, which depends on this one
+        Session = apps.get_model("booking", "Session")
+        return models.Exists(Session.objects.filter(link=models.OuterRef("pk")))
+
+
+    def bound(self):
+        """Returns links that are attached to a session"""
+        return self.filter(self._session_exists())
+    
+
+    def unbound(self):
+        """Returns links that are not attached to any session, such as those of deleted sessions"""
+        return self.filter(~self._session_exists())
+    
+
+    def past_expiry(self, now: Optional[datetime.datetime] = None):
+        """Returns links that have expired, but are not yet marked as expired"""
+        return self.filter(expired=False, expires_at__lte=now or timezone.now())
+
+
+    def delete(self):
+        # Links are collected in the deletion's transaction, so that the side effects
+        # of unsetting them on their sessions are applied once the deletion is committed
+        with transaction.atomic(using=self.db, savepoint=False):
+            return super().delete()
+    
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
+
+class LinkManager(BaseManager.from_queryset(LinkQuerySet)):
+    """Custom manager for the Link model"""
+
+    def get_queryset(self) -> LinkQuerySet:
+        return super().get_queryset()
+    
+
+    def bound(self) -> LinkQuerySet:
+        """Returns links that are attached to a session"""
+        return self.get_queryset().bound()
+    
+
+    def unbound(self) -> LinkQuerySet:
+        """Returns links that are not attached to any session, such as those of deleted sessions"""
+        return self.get_queryset().unbound()
+    
+
+    def past_expiry(self, now: Optional[datetime.datetime] = None) -> LinkQuerySet:
+        """Returns links that have expired, but are not yet marked as expired"""
+        return self.get_queryset().past_expiry(now)
+
+
+    def mark_expired(self, batch_size: int, now: Optional[datetime.datetime] = None) -> int:
+        """
+        Marks the links that have expired as expired, `batch_size` links per query.
+
+        :return: The number of links marked as expired.
+        """
+        now = now or timezone.now()
+        marked = 0
+        while True:
+            pks = list(self.past_expiry(now).order_by().values_list("pk", flat=True)[:batch_size])
+            if not pks:
+                break
+            marked += self.filter(pk__in=pks).update(expired=True)
+        return marked
+
+
+    def delete_unbound(self, created_before: datetime.datetime, batch_size: int) -> int:
+        """
+        Deletes the links created before the given time that are not attached to any session,
+        `batch_size` links per transaction.
+
+        :return: The number of links deleted.
+        """
+        deleted = 0
+        while True:
+            pks = list(
+                self.unbound().filter(created_at__lt=created_before).order_by().values_list("pk", flat=True)[:batch_size]
+            )
+            if not pks:
+                break
+            with transaction.atomic(using=self.db):
+                # Checked again, in case a link was attached to a session since. Deleted with their signals,
+                # whose side effects (e.g. removing their search documents) are applied together on commit
+                _, counts = self.unbound().filter(pk__in=pks).delete()
+            deleted += counts.get(self.model._meta.label, 0)
+        return deleted
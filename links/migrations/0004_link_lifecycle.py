@@ -0,0 +1,61 @@
+# Generated by Django 5.0.4 on 2026-10-19 19:20
+
+import datetime
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+# As `booking.session_links.SESSION_LINK_GRACE_PERIOD` when this migration was written
+GRACE_PERIOD = datetime.timedelta(minutes=5)
+
+
+def set_link_lifecycles(apps, schema_editor):
+    """Copies the lifecycle of each link from its session. Links with no session are left to be deleted"""
+    Link = apps.get_model("links", "Link")
+    Session = apps.get_model("booking", "Session")
+    now = timezone.now()
+    sessions = Session.objects.filter(link__isnull=False).order_by().values_list("link_id", "start", "end", "cancelled")
+    links = []
+    for link_id, start, end, cancelled in sessions.iterator(chunk_size=2000):
+        links.append(Link(
+            pk=link_id, active_from=start - GRACE_PERIOD, expires_at=end + GRACE_PERIOD,
+            expired=cancelled or end + GRACE_PERIOD <= now
+        ))
+        if len(links) >= 2000:
+            Link.objects.bulk_update(links, ["active_from", "expires_at", "expired"])
+            links = []
+    if links:
+        Link.objects.bulk_update(links, ["active_from", "expires_at", "expired"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('links', '0003_changelist_indexes'),
+        ('booking', '0006_resources'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='link',
+            name='active_from',
+            field=models.DateTimeField(blank=True, editable=False, help_text='When the link can be used from. Shortly before its session starts', null=True, verbose_name='Active from'),
+        ),
+        migrations.AddField(
+            model_name='link',
+            name='expired',
+            field=models.BooleanField(default=False, editable=False, help_text='Whether the link can no longer be used, as its session has ended, or was cancelled or deleted', verbose_name='Expired'),
+        ),
+        migrations.AddField(
+            model_name='link',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='When the link can no longer be used. Shortly after its session ends', null=True, verbose_name='Expires at'),
+        ),
+        migrations.AddIndex(
+            model_name='link',
+            index=models.Index(fields=['expired', 'expires_at'], name='links_link_expired_idx'),
+        ),
+        migrations.RunPython(set_link_lifecycles, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,12 @@
 from django.conf import settings
-from django.db import models
+from django.db import models, router, transaction
 import uuid
 from django.shortcuts import resolve_url
 from django.utils.translation import gettext_lazy as _
 from django_utz.decorators import model
 
 from .utils import generate_unique_identifier
+from .managers import LinkManager
 
 
 @model
@@ -23,11 +24,32 @@ class Link(models.Model):
         settings.AUTH_USER_MODEL, verbose_name=_("Created by"), 
         on_delete=models.CASCADE, help_text=_("The user who created this link")
     )
+    # Kept up to date with the link's session (see `booking.session_links`),
+    # so that the link can be checked without loading the session
+    active_from = models.DateTimeField(
+        _("Active from"), null=True, blank=True, editable=False,
+        help_text=_("When the link can be used from. Shortly before its session starts")
+    )
+    expires_at = models.DateTimeField(
+        _("Expires at"), null=True, blank=True, editable=False,
+        help_text=_("When the link can no longer be used. Shortly after its session ends")
+    )
+    expired = models.BooleanField(
+        _("Expired"), default=False, editable=False,
+        help_text=_("Whether the link can no longer be used, as its session has ended, or was cancelled or deleted")
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = LinkManager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=["-created_at"], name="links_link_created_at_idx"),
+            # For links past their expiry that are not yet marked as expired
+            models.Index(fields=["expired", "expires_at"], name="links_link_expired_idx"),
+        ]
 
     class UTZMeta:
         datetime_fields = "__all__"
@@ -36,6 +58,11 @@ class Link(models.Model):
     def __str__(self) -> str:
         return self.identifier
 
+    def delete(self, using=None, keep_parents=False):
+        # See `LinkQuerySet.delete`
+        with transaction.atomic(using=using or router.db_for_write(self.__class__, instance=self), savepoint=False):
+            return super().delete(using=using, keep_parents=keep_parents)
+
     @property
     def path(self) -> str:
         """
@@ -0,0 +1,45 @@
+import datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from booking.models import Session
+from core.models import SearchDocument
+from core.search import get_object_id
+from links.models import Link
+from users.models import UserAccount
+
+
+class GarbageCollectLinksTests(TestCase):
+    """`python manage.py gc_links` deletes the links that are not attached to any session"""
+
+    def setUp(self) -> None:
+        self.user = UserAccount.objects.create_user(
+            email="links@example.com", password="links", name="Links User", is_verified=True
+        )
+        self.unbound = Link.objects.create(url="https://example.com/unbound", created_by=self.user)
+        self.bound = Link.objects.create(url="https://example.com/bound", created_by=self.user)
+        start = timezone.now() + datetime.timedelta(days=1)
+        Session.objects.create(
+            title="Linked session", start=start, end=start + datetime.timedelta(minutes=30),
+            booked_by=self.user, link=self.bound
+        )
+        Link.objects.update(created_at=timezone.now() - datetime.timedelta(days=2))
+
+    def get_documents(self, link: Link):
+        return SearchDocument.objects.filter(model="links.link", object_id=get_object_id(link))
+
+    def test_unbound_links_are_removed_from_search_index(self) -> None:
+        self.assertTrue(self.get_documents(self.unbound).exists())
+        stdout = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("gc_links", "--batch-size", "1", stdout=stdout)
+
+        self.assertIn("Deleted 1 unattached link(s)", stdout.getvalue())
+        self.assertFalse(Link.objects.filter(pk=self.unbound.pk).exists())
+        self.assertFalse(self.get_documents(self.unbound).exists())
+        # Links attached to sessions are kept, with their search documents
+        self.assertTrue(Link.objects.filter(pk=self.bound.pk).exists())
+        self.assertTrue(self.get_documents(self.bound).exists())
@@ -3,6 +3,9 @@ ASGI config for meeting_calendar project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The async variants of the booking JSON APIs (``booking:async_*`` URLs) run
+natively on the event loop when served through this application.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
 """
@@ -1,7 +1,9 @@
 from pathlib import Path
 from typing import Union
 from dotenv import load_dotenv, find_dotenv
+from django.core.exceptions import ImproperlyConfigured
 import os
+import tempfile
 
 
 load_dotenv(find_dotenv(".env", raise_error_if_not_found=True))
@@ -38,6 +40,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'helpers.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     "whitenoise.middleware.WhiteNoiseMiddleware",
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -53,7 +56,10 @@ ROOT_URLCONF = 'meeting_calendar.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Django's template backend, with render times recorded by `helpers.instrumentation`
+        'BACKEND': 'helpers.instrumentation.InstrumentedDjangoTemplates',
+        # Named as the default engine would be, as `engines["django"]` is looked up by name
+        'NAME': 'django',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -95,6 +101,43 @@ AUTH_PASSWORD_VALIDATORS = [
 
 AUTH_USER_MODEL = 'users.UserAccount'
 
+
+# PASSWORD HASHING
+
+# The hashers each password hashing profile prefers for new (and upgraded) password hashes
+PASSWORD_HASHING_PROFILES = {
+    "pbkdf2": "users.hashers.TunedPBKDF2PasswordHasher",
+    "argon2": "users.hashers.TunedArgon2PasswordHasher",
+    "bcrypt": "users.hashers.TunedBCryptSHA256PasswordHasher",
+}
+
+PASSWORD_HASHING_PROFILE = os.getenv("PASSWORD_HASHING_PROFILE", "pbkdf2").lower()
+
+if PASSWORD_HASHING_PROFILE not in PASSWORD_HASHING_PROFILES:
+    raise ImproperlyConfigured(
+        f"PASSWORD_HASHING_PROFILE must be one of {', '.join(PASSWORD_HASHING_PROFILES)}"
+    )
+
+# Cost parameters of the tuned hashers. Hashers use Django's default cost for unset parameters
+PASSWORD_HASHING_COSTS = {
+    name: int(value) for name, value in {
+        "pbkdf2_iterations": os.getenv("PBKDF2_ITERATIONS"),
+        "argon2_time_cost": os.getenv("ARGON2_TIME_COST"),
+        "argon2_memory_cost": os.getenv("ARGON2_MEMORY_COST"),
+        "argon2_parallelism": os.getenv("ARGON2_PARALLELISM"),
+        "bcrypt_rounds": os.getenv("BCRYPT_ROUNDS"),
+    }.items() if value
+}
+
+# The profile's hasher is preferred. The others are kept so that existing hashes can
+# still be verified, and are upgraded to the preferred hasher on the user's next login
+PASSWORD_HASHERS = [
+    PASSWORD_HASHING_PROFILES[PASSWORD_HASHING_PROFILE],
+    *(hasher for profile, hasher in PASSWORD_HASHING_PROFILES.items() if profile != PASSWORD_HASHING_PROFILE),
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
 LANGUAGE_CODE = 'en-us'
 
 TIME_ZONE = 'UTC'
@@ -109,6 +152,56 @@ STATIC_URL = 'static/'
 
 STATIC_ROOT = os.path.join(BASE_DIR, "static")
 
+# Built script bundles. See `core.bundling` and the `bundle_scripts` management command
+SCRIPT_BUNDLES_ROOT = BASE_DIR / "bundles"
+
+SCRIPT_BUNDLES_ENABLED = os.getenv("SCRIPT_BUNDLES_ENABLED", str(not DEBUG)).lower() == "true"
+
+if os.path.isdir(SCRIPT_BUNDLES_ROOT):
+    STATICFILES_DIRS = [("bundles", SCRIPT_BUNDLES_ROOT)]
+
+# The scripts bundled for each page, in the order they should be loaded
+SCRIPT_BUNDLES = {
+    "main": [
+        "core/scripts/utils.js",
+    ],
+    "base": [
+        "core/scripts/base.js",
+    ],
+    "session_calendar": [
+        "booking/scripts/tandc.js",
+        "core/scripts/formCard.js",
+        "booking/scripts/sessionCalendar.js",
+        "booking/scripts/bookSession.js",
+        "booking/scripts/editSession.js",
+    ],
+    "signin": [
+        "core/scripts/formCard.js",
+        "users/scripts/signin.js",
+    ],
+    "signup": [
+        "core/scripts/formCard.js",
+        "users/scripts/signup.js",
+    ],
+    "forgot_password": [
+        "core/scripts/formCard.js",
+        "users/scripts/forgotPassword.js",
+    ],
+    "reset_password": [
+        "core/scripts/formCard.js",
+        "users/scripts/resetPassword.js",
+    ],
+    "user_account": [
+        "core/scripts/formCard.js",
+        "users/scripts/userAccount.js",
+        "users/scripts/passwordChange.js",
+    ],
+}
+
+# Content-hashed static files (bundles and files hashed by the manifest storage)
+# are served by WhiteNoise with long-lived, immutable cache headers
+WHITENOISE_IMMUTABLE_FILE_TEST = r"^.+\.[0-9a-f]{12}\..+$"
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
@@ -121,6 +214,9 @@ LOGIN_URL = 'users:signin'
 
 LOGIN_REDIRECT_URL = 'dashboard:dashboard'
 
+# A user's last login time is only updated on login if it is older than this number of seconds
+LAST_LOGIN_UPDATE_INTERVAL = int(os.getenv("LAST_LOGIN_UPDATE_INTERVAL", 60))
+
 
 # EMAIL SETTINGS
 
@@ -141,15 +237,105 @@ EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL")
 
 
+# Throttle rates per endpoint, as "<requests>/<period>" where period is one of s, m, h or d.
+# Requests are throttled by client IP address and by the email or user they are for.
+# An endpoint is not throttled if its rate is empty.
+THROTTLE_RATES = {
+    "login": os.getenv("LOGIN_THROTTLE_RATE", "10/m"),
+    "forgot_password": os.getenv("FORGOT_PASSWORD_THROTTLE_RATE", "5/h"),
+    "resend_verification_email": os.getenv("RESEND_VERIFICATION_EMAIL_THROTTLE_RATE", "5/h"),
+}
+# Behind reverse proxies, requests come from the proxy, so the client IP address is read from the header
+# the proxies set (e.g. "X-Forwarded-For"), as the address added by the outermost of the trusted proxies.
+# Leave the header empty, or the count at 0, when not behind a proxy, as clients can set the header themselves.
+THROTTLE_CLIENT_IP_HEADER = os.getenv("THROTTLE_CLIENT_IP_HEADER", "")
+THROTTLE_TRUSTED_PROXY_COUNT = int(os.getenv("THROTTLE_TRUSTED_PROXY_COUNT", 0))
+
+
+# Requests slower than this (in milliseconds) are logged, with their query count, database time and template render time
+SLOW_REQUEST_THRESHOLD = int(os.getenv("SLOW_REQUEST_THRESHOLD", 500))
+
+# Bearer token that Prometheus (or any other scraper) should send to access the `/metrics` endpoint.
+# If not set, only staff users can access the endpoint
+METRICS_AUTH_TOKEN = os.getenv("METRICS_AUTH_TOKEN", None)
+
+
+# Maximum number of times the same query may be made within a query budget (see `helpers.query_budget`),
+# before it is reported as a likely N+1 query. Used by the `check_query_budgets` command
+QUERY_BUDGET_MAX_REPEATS = int(os.getenv("QUERY_BUDGET_MAX_REPEATS", 5))
+
+
+# Admin changelists of tables with at least this many rows show an estimated row count when unfiltered,
+# instead of counting every row (see `helpers.admin.EstimatedCountPaginator`)
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(os.getenv("ADMIN_ESTIMATED_COUNT_THRESHOLD", 10000))
+
+
+# Number of sessions fetched and written at a time by the streaming CSV and iCalendar session exports
+SESSION_EXPORT_CHUNK_SIZE = int(os.getenv("SESSION_EXPORT_CHUNK_SIZE", 2000))
+
+# Number of rows inserted per transaction by bulk imports of sessions and unavailable periods (see `booking.imports`)
+BOOKING_IMPORT_BATCH_SIZE = int(os.getenv("BOOKING_IMPORT_BATCH_SIZE", 1000))
+
+# Number of links marked as expired per query, and deleted per transaction, by `python manage.py gc_links`
+LINK_GC_BATCH_SIZE = int(os.getenv("LINK_GC_BATCH_SIZE", 500))
+
+# How many years before or after the current month the availability of a month can be requested. Availability
+# is computed and stored for each month requested, so requests for months outside this window are rejected
+AVAILABILITY_MAX_YEARS = int(os.getenv("AVAILABILITY_MAX_YEARS", 2))
+
+
+# Number of news per page of the news feed, and the most a client can request (with the `size` query parameter)
+NEWS_FEED_PAGE_SIZE = int(os.getenv("NEWS_FEED_PAGE_SIZE", 20))
+NEWS_FEED_MAX_PAGE_SIZE = int(os.getenv("NEWS_FEED_MAX_PAGE_SIZE", 100))
+# Seconds for which browsers may reuse older pages of the news feed without revalidating them. 0 to always revalidate
+NEWS_FEED_PAGE_MAX_AGE = int(os.getenv("NEWS_FEED_PAGE_MAX_AGE", 300))
+
+
+# The default cache is shared by all worker processes, and needs no outside service. It is a table in the database
+# by default (CACHE_LOCATION is the table's name), created with `python manage.py createcachetable`. Each write
+# also counts the table's rows, to cull it beyond CACHE_MAX_ENTRIES, and increments are a read then a write,
+# so concurrent increments can be lost. Use Redis or Memcached (CACHE_BACKEND) for heavy cache traffic.
+# The file-based cache (CACHE_LOCATION is a directory) lists and culls its directory on every write.
+_cache_backend = os.getenv("CACHE_BACKEND", "django.core.cache.backends.db.DatabaseCache")
+_cache_location = (
+    "meeting_calendar_cache" if _cache_backend.endswith(".DatabaseCache")
+    else os.path.join(tempfile.gettempdir(), "meeting_calendar_cache")
+)
+CACHES = {
+    "default": {
+        "BACKEND": _cache_backend,
+        "LOCATION": os.getenv("CACHE_LOCATION", _cache_location),
+        "TIMEOUT": int(os.getenv("CACHE_TIMEOUT", 300)),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("CACHE_MAX_ENTRIES", 10000)),
+        },
+    },
+}
+
+# Tiered caches (see `helpers.cache`) keep up to TIERED_CACHE_LOCAL_MAX_ENTRIES values in each process,
+# for up to TIERED_CACHE_LOCAL_TIMEOUT seconds, in front of the shared cache with the TIERED_CACHE_SHARED_ALIAS alias.
+# Invalidating a tiered cache reaches every process within TIERED_CACHE_VERSION_CHECK_INTERVAL seconds
+TIERED_CACHE_SHARED_ALIAS = os.getenv("TIERED_CACHE_SHARED_ALIAS", "default")
+TIERED_CACHE_LOCAL_MAX_ENTRIES = int(os.getenv("TIERED_CACHE_LOCAL_MAX_ENTRIES", 1000))
+TIERED_CACHE_LOCAL_TIMEOUT = float(os.getenv("TIERED_CACHE_LOCAL_TIMEOUT", 30))
+TIERED_CACHE_VERSION_CHECK_INTERVAL = float(os.getenv("TIERED_CACHE_VERSION_CHECK_INTERVAL", 1))
+
+
+# Seconds for which per-user session summaries (see `booking.summaries`) are cached in the default cache.
+# Summaries are updated as sessions change, so the default cache must be shared by all processes
+SESSION_SUMMARY_CACHE_TIMEOUT = int(os.getenv("SESSION_SUMMARY_CACHE_TIMEOUT", 60 * 60))
+
+
 # A list of models that should only be accessible by admin users
 ADMIN_ONLY_MODELS = [
     "booking.models.UnavailablePeriod",
+    "booking.models.Resource",
     "links.models.Link",
 ]
 
 def _parse_validity_period(period: Union[str, int]) -> int:
     """
-    Converts a password reset token validity period in hours to a valid value.
+    Converts a token validity period in hours to a valid value.
 
     If the value set is not valid, a default of 24.
     """
@@ -159,6 +345,8 @@ def _parse_validity_period(period: Union[str, int]) -> int:
         return 24
 
 PASSWORD_RESET_TOKEN_VALIDITY_PERIOD = _parse_validity_period(os.getenv("PASSWORD_RESET_TOKEN_VALIDITY_PERIOD"))
+# Validity period of email verification links, in hours
+EMAIL_VERIFICATION_TOKEN_VALIDITY_PERIOD = _parse_validity_period(os.getenv("EMAIL_VERIFICATION_TOKEN_VALIDITY_PERIOD"))
 
 
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
@@ -10,6 +10,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('accounts/', include('users.urls', namespace="users")),
     path('booking/', include('booking.urls', namespace="booking")),
+    path('news/', include('news.urls', namespace="news")),
 ]
 
 
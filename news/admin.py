@@ -3,15 +3,19 @@ from typing import Any
 
 from .models import News
 from .forms import NewsForm
+from helpers.admin import ChangeListPerformanceMixin
+from core.search import IndexedSearchMixin
 
 
 @admin.register(News)
-class NewsModelAdmin(admin.ModelAdmin):
+class NewsModelAdmin(IndexedSearchMixin, ChangeListPerformanceMixin, admin.ModelAdmin):
     """Model admin for the News model"""
     form = NewsForm
-    list_display = ["headline", "author", "created", "updated"]
+    list_display = ["headline", "author", "display_from", "display_till", "created", "updated"]
+    list_select_related = ["author"]
+    user_tz_fields = ["display_at", "display_until", "created_at", "updated_at"]
     readonly_fields = ["created_at", "updated_at", "author"]
-    search_fields = ["headline", "author__email", "author__firstname", "author__lastname"]
+    search_fields = ["headline", "author__email", "author__name"]
     date_hierarchy = "created_at"
 
     def has_add_permission(self, request) -> bool:
@@ -28,10 +32,18 @@ class NewsModelAdmin(admin.ModelAdmin):
         obj.save()
         return None
     
+    def display_from(self, obj: News) -> Any:
+        """Display time in the request user's timezone"""
+        return self.to_user_tz(obj, "display_at")
+
+    def display_till(self, obj: News) -> Any:
+        """Display end time in the request user's timezone"""
+        return self.to_user_tz(obj, "display_until")
+    
     def created(self, obj: News) -> Any:
         """Created time in the request user's timezone"""
-        return obj.created_at_user_tz
+        return self.to_user_tz(obj, "created_at")
     
     def updated(self, obj: News) -> Any:
         """Updated time in the request user's timezone"""
-        return obj.updated_at_user_tz
+        return self.to_user_tz(obj, "updated_at")
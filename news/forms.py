@@ -7,15 +7,26 @@ class NewsForm(forms.ModelForm):
     """Form to create news"""
     class Meta:
         model = News
-        fields = ["headline", "content", "display_at", "author"]
+        fields = ["headline", "content", "display_at", "display_until", "author"]
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         if self.instance.pk:
             try:
                 self.initial["display_at"] = self.instance.display_at_user_tz
+                if self.instance.display_until:
+                    self.initial["display_until"] = self.instance.display_until_user_tz
                 self.initial["created_at"] = self.instance.created_at_user_tz
                 self.initial["updated_at"] = self.instance.updated_at_user_tz
             except (AttributeError, TypeError):
                 pass
             
+
+
+    def clean(self):
+        cleaned_data = super().clean()
+        display_at = cleaned_data.get("display_at", None)
+        display_until = cleaned_data.get("display_until", None)
+        if display_at and display_until and display_until <= display_at:
+            self.add_error("display_until", "The news must stop displaying after it starts displaying")
+        return cleaned_data
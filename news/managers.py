@@ -0,0 +1,73 @@
+from typing import Optional
+import datetime
+import uuid
+from django.db import models
+from django.db.models.manager import BaseManager
+from django.utils import timezone
+
+from helpers.dates import LocalDateQuerySet
+
+
+class NewsQuerySet(LocalDateQuerySet):
+    """Custom queryset for the News model"""
+    local_date_field = "display_at"
+
+    def today(self, tz: Optional[timezone.tzinfo] = None):
+        """
+        Returns news to be displayed today
+
+        :param tz: Timezone to use for filtering
+        """
+        return self.local_today(tz=tz)
+
+
+    def unexpired(self, at: Optional[datetime.datetime] = None):
+        """
+        Returns news that are not past their display end date
+
+        :param at: Time to check against. Defaults to now
+        """
+        at = at or timezone.now()
+        return self.filter(models.Q(display_until__isnull=True) | models.Q(display_until__gt=at))
+
+
+    def published(self, at: Optional[datetime.datetime] = None):
+        """
+        Returns news that are being displayed, that is, past their display date but not their display end date
+
+        :param at: Time to check against. Defaults to now
+        """
+        at = at or timezone.now()
+        return self.filter(display_at__lte=at).unexpired(at=at)
+
+
+    def feed_order(self):
+        """Returns the news in the news feed's order, newest (by display date) first"""
+        return self.order_by("-display_at", "-id")
+
+
+    def before(self, display_at: datetime.datetime, id: uuid.UUID):
+        """
+        Returns the news that come after the given position in the news feed's order,
+        that is, those with an earlier display date, or the same display date and a lower ID.
+
+        The redundant `display_at__lte` filter bounds the scan of the (display_at, id) index.
+
+        :param display_at: Display date at the position
+        :param id: ID at the position
+        """
+        return self.filter(
+            models.Q(display_at__lt=display_at) | models.Q(display_at=display_at, id__lt=id),
+            display_at__lte=display_at,
+        )
+
+
+
+class NewsManager(BaseManager.from_queryset(NewsQuerySet)):
+    """Custom manager for the News model"""
+
+    def unexpired(self, at: Optional[datetime.datetime] = None):
+        return self.get_queryset().unexpired(at=at)
+
+    def published(self, at: Optional[datetime.datetime] = None):
+        return self.get_queryset().published(at=at)
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.4 on 2026-10-19 14:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0003_changelist_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(fields=['display_at'], name='news_news_display_at_idx'),
+        ),
+    ]
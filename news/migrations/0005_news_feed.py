@@ -0,0 +1,28 @@
+# Generated by Django 5.0.4 on 2026-10-19 14:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_local_date_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='news',
+            name='news_news_display_at_idx',
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='display_until',
+            field=models.DateTimeField(blank=True, help_text='Date to stop displaying the news. Leave empty to display the news indefinitely', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(fields=['display_at', 'id'], name='news_news_display_at_id_idx'),
+        ),
+    ]
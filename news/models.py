@@ -5,6 +5,8 @@ import uuid
 from django.conf import settings
 from django_utz.decorators import model
 
+from .managers import NewsManager
+
 
 
 @model
@@ -19,11 +21,23 @@ class News(models.Model):
         blank=True, null=True
     )
     display_at = models.DateTimeField(default=timezone.now, help_text=_("Date to display the news"))
+    display_until = models.DateTimeField(
+        blank=True, null=True,
+        help_text=_("Date to stop displaying the news. Leave empty to display the news indefinitely")
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = NewsManager()
+
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at"], name="news_news_created_at_idx"),
+            # For display date range filters, such as today's news, and the news feed's
+            # keyset pagination, which orders by (display_at, id) and seeks past a cursor
+            models.Index(fields=["display_at", "id"], name="news_news_display_at_id_idx"),
+        ]
         verbose_name = "News"
         verbose_name_plural = "News"
     
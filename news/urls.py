@@ -0,0 +1,11 @@
+from django.urls import path
+
+from . import views
+
+app_name = "news"
+
+
+urlpatterns = [
+    path("", views.news_feed_view, name="news_feed"),
+    path("feed/", views.news_feed_data_view, name="news_feed_data"),
+]
@@ -0,0 +1,97 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import base64
+import binascii
+import datetime
+import uuid
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+
+from helpers.response import make_etag
+from .managers import NewsQuerySet
+from .models import News
+
+
+class NewsFeedPage(NamedTuple):
+    """A page of the news feed"""
+    news: List[News]
+    # Cursor of the next (older) page, or None if this is the last page
+    next_cursor: Optional[str]
+
+
+def get_news_feed_page_size(requested: Any = None) -> int:
+    """
+    Returns the number of news per page of the news feed.
+
+    :param requested: The page size requested by the client, if any. It is capped at `NEWS_FEED_MAX_PAGE_SIZE`.
+    :raises ValueError: If the requested page size is not a positive integer
+    """
+    if requested in (None, ""):
+        return settings.NEWS_FEED_PAGE_SIZE
+    size = int(requested)
+    if size < 1:
+        raise ValueError("The page size must be a positive integer")
+    return min(size, settings.NEWS_FEED_MAX_PAGE_SIZE)
+
+
+def encode_news_feed_cursor(news: News) -> str:
+    """Returns an opaque cursor pointing just past the news item, in the news feed's order"""
+    position = f"{news.display_at.isoformat()}|{news.id.hex}"
+    return base64.urlsafe_b64encode(position.encode()).decode().rstrip("=")
+
+
+def decode_news_feed_cursor(cursor: str) -> Tuple[datetime.datetime, uuid.UUID]:
+    """
+    Returns the display date and ID of the news feed position the cursor points just past.
+
+    :raises ValueError: If the cursor is invalid
+    """
+    try:
+        position = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        display_at, id = position.split("|")
+        display_at = parse_datetime(display_at)
+        id = uuid.UUID(hex=id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if display_at is None or display_at.tzinfo is None:
+        raise ValueError("Invalid cursor")
+    return display_at, id
+
+
+def get_news_feed_page(news_qs: NewsQuerySet, cursor: Optional[str] = None, size: Optional[int] = None) -> NewsFeedPage:
+    """
+    Returns a page of the published news, newest first.
+
+    Pages are fetched by seeking past the cursor on the (display_at, id) index, rather than with an offset,
+    so fetching any page takes the same time however many news come before it.
+
+    :param news_qs: Queryset of News objects
+    :param cursor: Cursor of the page, as returned for the previous page. Defaults to the first page
+    :param size: Number of news per page. Defaults to `NEWS_FEED_PAGE_SIZE`
+    :raises ValueError: If the cursor is invalid
+    """
+    size = size or settings.NEWS_FEED_PAGE_SIZE
+    news_qs = news_qs.published().feed_order()
+    if cursor:
+        news_qs = news_qs.before(*decode_news_feed_cursor(cursor))
+    # Fetch one more than a page to tell whether there is a next page
+    news = list(news_qs[:size + 1])
+    if len(news) <= size:
+        return NewsFeedPage(news=news, next_cursor=None)
+    news = news[:size]
+    return NewsFeedPage(news=news, next_cursor=encode_news_feed_cursor(news[-1]))
+
+
+def get_news_feed_page_version(page: NewsFeedPage) -> str:
+    """Returns a version string for the page, which changes when news are added to, updated on or removed from it"""
+    return make_etag(page.next_cursor, *(f"{news.id.hex}:{news.updated_at.isoformat()}" for news in page.news))
+
+
+def serialize_news(news: News) -> Dict[str, Any]:
+    """Returns the news as a JSON serializable dict"""
+    return {
+        "id": news.id.hex,
+        "headline": news.headline,
+        "content": news.content,
+        "display_at": news.display_at,
+        "display_until": news.display_until,
+    }
@@ -0,0 +1,114 @@
+from typing import Any, Dict
+from django.conf import settings
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.shortcuts import render
+from django.utils.cache import get_conditional_response
+from django.views import generic
+
+from .models import News
+from .utils import (
+    NewsFeedPage, get_news_feed_page, get_news_feed_page_size,
+    get_news_feed_page_version, serialize_news
+)
+from helpers.response import make_etag
+
+news_qs = News.objects.all()
+
+
+def set_news_feed_cache_headers(response: HttpResponse, request: HttpRequest) -> HttpResponse:
+    """
+    Sets the cache headers of a news feed page.
+
+    The first page changes whenever news are published, and must always be revalidated.
+    Older pages (requested with a cursor) rarely change, and may be reused for `NEWS_FEED_PAGE_MAX_AGE` seconds.
+    """
+    if request.GET.get("cursor", None) and settings.NEWS_FEED_PAGE_MAX_AGE:
+        response["Cache-Control"] = f"private, max-age={settings.NEWS_FEED_PAGE_MAX_AGE}"
+    else:
+        response["Cache-Control"] = "private, no-cache"
+    response["Vary"] = "Cookie"
+    return response
+
+
+class NewsFeedMixin:
+    """Fetches the page of the news feed requested with the `cursor` and `size` query parameters"""
+
+    def get_page(self, request: HttpRequest) -> NewsFeedPage:
+        """
+        Returns the requested page of the news feed
+
+        :raises ValueError: If the cursor or page size is invalid
+        """
+        size = get_news_feed_page_size(request.GET.get("size", None))
+        return get_news_feed_page(news_qs, cursor=request.GET.get("cursor", None), size=size)
+
+
+class NewsFeedView(LoginRequiredMixin, NewsFeedMixin, generic.View):
+    """
+    Page of the news feed, newest first, with a link to the next (older) page.
+
+    Supports conditional requests (`If-None-Match`).
+    """
+    template_name = "news/news_feed.html"
+    http_method_names = ["get"]
+
+    def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        try:
+            page = self.get_page(request)
+        except ValueError as exc:
+            return HttpResponse(str(exc), status=400, content_type="text/plain")
+
+        # Display dates are rendered in the user's timezone
+        etag = f'"{make_etag(get_news_feed_page_version(page), request.user.utz)}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            context: Dict[str, Any] = {"news_list": page.news, "next_cursor": page.next_cursor}
+            response = render(request, self.template_name, context)
+        response["ETag"] = etag
+        return set_news_feed_cache_headers(response, request)
+
+
+
+class NewsFeedDataView(LoginRequiredMixin, NewsFeedMixin, generic.View):
+    """
+    Page of the news feed (JSON), newest first. The next (older) page is requested with
+    the `next_cursor` of the response, as the `cursor` query parameter.
+
+    Supports conditional requests (`If-None-Match`).
+    """
+    http_method_names = ["get"]
+
+    def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        try:
+            page = self.get_page(request)
+        except ValueError as exc:
+            return JsonResponse(
+                data={
+                    "status": "error",
+                    "detail": str(exc),
+                },
+                status=400
+            )
+
+        etag = f'"{get_news_feed_page_version(page)}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = JsonResponse(
+                data={
+                    "status": "success",
+                    "detail": "News retrieved successfully.",
+                    "data": {
+                        "news": [serialize_news(news) for news in page.news],
+                        "next_cursor": page.next_cursor,
+                    }
+                },
+                status=200
+            )
+        response["ETag"] = etag
+        return set_news_feed_cache_headers(response, request)
+
+
+
+news_feed_view = NewsFeedView.as_view()
+news_feed_data_view = NewsFeedDataView.as_view()
@@ -3,14 +3,15 @@ from django.http import HttpRequest
 
 from .models import PasswordResetToken
 from .forms import PasswordResetTokenForm
+from core.search import IndexedSearchMixin
 
 
 @admin.register(PasswordResetToken)
-class PasswordResetTokenModelAdmin(admin.ModelAdmin):
+class PasswordResetTokenModelAdmin(IndexedSearchMixin, admin.ModelAdmin):
     """Model admin for the PasswordResetToken model"""
     form = PasswordResetTokenForm
     list_display = ["name", "expires"]
-    search_fields = ["user__email", "user__firstname", "user__lastname", "expiry_date"]
+    search_fields = ["name", "user__email", "user__name"]
 
     def has_add_permission(self, request: HttpRequest) -> bool:
         return False
@@ -0,0 +1,13 @@
+from typing import Any
+from django.core.management.base import BaseCommand
+
+from tokens.models import PasswordResetToken
+
+
+class Command(BaseCommand):
+    help = "Delete all revoked and expired password reset tokens in bulk"
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        deleted = PasswordResetToken.objects.delete_unusable()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} unusable password reset token(s)"))
+        return None
@@ -0,0 +1,58 @@
+from typing import Optional
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from django.utils.crypto import salted_hmac, constant_time_compare
+from rest_framework_api_key.models import BaseAPIKeyManager
+from rest_framework_api_key.crypto import KeyGenerator
+
+
+class PasswordResetTokenKeyGenerator(KeyGenerator):
+    """
+    Key generator that hashes password reset tokens with HMAC-SHA256, keyed with the project's `SECRET_KEY`.
+
+    Password reset tokens are random, high entropy and short-lived, so unlike user chosen
+    passwords, they gain nothing from a slow password hasher. Tokens hashed with the 
+    default (password) hasher before this generator was used can still be verified.
+    """
+    algorithm = "hmac_sha256"
+    key_salt = "tokens.PasswordResetToken"
+
+    def hash(self, value: str) -> str:
+        digest = salted_hmac(self.key_salt, value, secret=settings.SECRET_KEY, algorithm="sha256").hexdigest()
+        return f"{self.algorithm}${digest}"
+
+    def verify(self, key: str, hashed_key: str) -> bool:
+        if not hashed_key.startswith(f"{self.algorithm}$"):
+            return super().verify(key, hashed_key)
+        return constant_time_compare(self.hash(key), hashed_key)
+
+
+
+class PasswordResetTokenManager(BaseAPIKeyManager):
+    """Custom manager for the `PasswordResetToken` model."""
+    key_generator = PasswordResetTokenKeyGenerator()
+
+    def get_usable_keys(self) -> models.QuerySet:
+        # The token's user is almost always needed after the token is verified
+        return super().get_usable_keys().select_related("user")
+
+
+    def unusable(self) -> models.QuerySet:
+        """Returns tokens that have been revoked or have expired"""
+        return self.filter(models.Q(revoked=True) | models.Q(expiry_date__lt=timezone.now()))
+
+
+    def delete_unusable(self, user: Optional[models.Model] = None) -> int:
+        """
+        Deletes all revoked and expired tokens in bulk.
+
+        :param user: If given, only the user's unusable tokens are deleted.
+        :return: The number of tokens deleted.
+        """
+        queryset = self.unusable()
+        if user is not None:
+            queryset = queryset.filter(user=user)
+        # Tokens have no dependent objects, so this is a single DELETE query
+        deleted, _ = queryset.delete()
+        return deleted
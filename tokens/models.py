@@ -5,6 +5,8 @@ from django.conf import settings
 
 from django_utz.decorators import model
 
+from .managers import PasswordResetTokenManager
+
 
 @model
 class PasswordResetToken(AbstractAPIKey):
@@ -35,6 +37,8 @@ class PasswordResetToken(AbstractAPIKey):
     )
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="password_reset_tokens")
 
+    objects = PasswordResetTokenManager()
+
     class Meta(AbstractAPIKey.Meta):
         verbose_name = _("Password Reset Token")
         verbose_name_plural = _("Password Reset Tokens")
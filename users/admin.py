@@ -3,10 +3,11 @@ from typing import Any
 
 from .models import UserAccount
 from .forms import UserForm
+from core.search import IndexedSearchMixin
 
 
 @admin.register(UserAccount)
-class UserAccountModelAdmin(admin.ModelAdmin):
+class UserAccountModelAdmin(IndexedSearchMixin, admin.ModelAdmin):
     """Custom UserAccount model admin."""
     form = UserForm
     readonly_fields = ["slug", "last_login", "is_verified"]
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self) -> None:
+        from django.contrib.auth.signals import user_logged_in
+        from .signals import update_last_login_and_staged_fields
+
+        # Replace Django's last login receiver, which always does a separate UPDATE on login
+        user_logged_in.disconnect(dispatch_uid="update_last_login")
+        user_logged_in.connect(update_last_login_and_staged_fields, dispatch_uid="users.update_last_login")
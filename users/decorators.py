@@ -1,33 +1,66 @@
-from typing import Any, Callable
+from typing import Any, Awaitable, Callable
 from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import redirect
+from django.contrib.auth.views import redirect_to_login
+from asgiref.sync import iscoroutinefunction
 import functools
 from django.conf import settings
 
 from .models import UserAccount
 
 
+def _as_JsonResponse(response: HttpResponse) -> JsonResponse:
+    """Wraps a non-JSON response in a JsonResponse with the same status code."""
+    if isinstance(response, JsonResponse):
+        return response
+    
+    return JsonResponse(
+        data={
+            "status": "error" if response.status_code >= 400 else "success",
+            "detail": response.content.decode(),
+        }, 
+        status=response.status_code
+    )
+
+
 def to_JsonResponse(func: Callable[..., HttpResponse]) -> Callable[..., JsonResponse]:
-    """Ensures that the decorated view returns a JsonResponse."""
+    """Ensures that the decorated (sync or async) view returns a JsonResponse."""
+    if iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(request: HttpRequest, *args, **kwargs) -> JsonResponse:
+            response = await func(request, *args, **kwargs)
+            return _as_JsonResponse(response)
+        
+        return async_wrapper
+
     @functools.wraps(func)
     def wrapper(request: HttpRequest, *args, **kwargs) -> JsonResponse:
         response = func(request, *args, **kwargs)
-
-        if isinstance(response, JsonResponse):
-            return response
-        
-        return JsonResponse(
-            data={
-                "status": "error" if response.status_code >= 400 else "success",
-                "detail": response.content.decode(),
-            }, 
-            status=response.status_code
-        )
+        return _as_JsonResponse(response)
     
     return wrapper
 
 
 
+def async_login_required(view_func: Callable[..., Awaitable[HttpResponse]]):
+    """
+    Redirects unauthenticated users to the login page before an async view runs.
+
+    `LoginRequiredMixin` cannot be used on async views as it returns a sync response 
+    from `dispatch`, so async views should use this decorator instead.
+
+    :param view_func: The async view function to decorate.
+    """
+    @functools.wraps(view_func)
+    async def wrapper(view, request: HttpRequest, *args: str, **kwargs: Any):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view_func(view, request, *args, **kwargs)
+    return wrapper
+
+
+
 def redirect_authenticated(redirect_view: Callable | str):
     """
     Create a decorator that redirects authenticated users to a view.
@@ -65,6 +98,16 @@ def requires_account_verification(
         """
         Ensures a user verifies account email before accessing decorated view.
         """
+        if iscoroutinefunction(view_func):
+            @functools.wraps(view_func)
+            async def async_wrapper(view, request: HttpRequest, *args: str, **kwargs: Any):
+                user = await request.auser()
+                if user.is_verified:
+                    return await view_func(view, request, *args, **kwargs)
+
+                return HttpResponse(content=error_msg, status=403)
+            return async_wrapper
+
         @functools.wraps(view_func)
         def wrapper(view, request: HttpRequest, *args: str, **kwargs: Any):
             if request.user.is_verified:
@@ -0,0 +1,108 @@
+import datetime
+import functools
+import uuid
+from typing import Optional
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+from django.utils.crypto import salted_hmac, constant_time_compare
+
+from .models import UserAccount
+
+
+EMAIL_VERIFICATION_TOKEN_SALT = "users.email_verification"
+
+
+def get_email_verification_nonce(user: UserAccount) -> str:
+    """
+    Returns a value that changes whenever a new verification email
+    is sent to the user, or the user's email changes.
+    """
+    sent_at = user.verification_sent_at.timestamp() if user.verification_sent_at else ""
+    return salted_hmac(
+        EMAIL_VERIFICATION_TOKEN_SALT,
+        f"{user.pk}{user.email}{sent_at}",
+        algorithm="sha256"
+    ).hexdigest()[:16]
+
+
+def create_email_verification_token(user: UserAccount) -> str:
+    """
+    Create a signed email verification token for the given user.
+
+    Creating a token invalidates all tokens previously created for the user.
+    The user's email is not saved, so tokens can be created for an unsaved email change.
+    """
+    user.verification_sent_at = timezone.now()
+    if user._state.adding is False:
+        UserAccount.objects.filter(pk=user.pk).update(verification_sent_at=user.verification_sent_at)
+    payload = {"u": user.pk.hex, "n": get_email_verification_nonce(user)}
+    return signing.dumps(payload, salt=EMAIL_VERIFICATION_TOKEN_SALT)
+
+
+class EmailVerificationTokenService:
+    """
+    Verifies an email verification token once, and memoizes the token's owner for the lifetime of the service.
+
+    The token is signed and timestamped, so it is verified without a database query, and its owner
+    is fetched by primary key. Tokens expire after `EMAIL_VERIFICATION_TOKEN_VALIDITY_PERIOD` hours.
+
+    :param token: The email verification token.
+    """
+    def __init__(self, token: Optional[str]) -> None:
+        self.token = token
+
+    @functools.cached_property
+    def payload(self) -> Optional[dict]:
+        """The token's payload, or None if the token is invalid or has expired"""
+        if not self.token:
+            return None
+        max_age = datetime.timedelta(hours=settings.EMAIL_VERIFICATION_TOKEN_VALIDITY_PERIOD)
+        try:
+            payload = signing.loads(self.token, salt=EMAIL_VERIFICATION_TOKEN_SALT, max_age=max_age)
+        except signing.BadSignature:
+            return None
+        if not isinstance(payload, dict) or not isinstance(payload.get("u"), str):
+            return None
+        return payload
+
+    @functools.cached_property
+    def owner(self) -> Optional[UserAccount]:
+        """The user the token was created for, or None if the token is invalid"""
+        if self.payload is None:
+            return None
+        try:
+            return UserAccount.objects.get(pk=uuid.UUID(hex=self.payload["u"]))
+        except (ValueError, UserAccount.DoesNotExist):
+            return None
+
+    def is_for(self, user: UserAccount) -> bool:
+        """Returns True if the token was created for the given user, without querying the database."""
+        return self.payload is not None and user.is_authenticated and self.payload["u"] == user.pk.hex
+
+    def get_owner(self) -> Optional[UserAccount]:
+        """Returns the user the token was created for, if the token is valid."""
+        return self.owner
+
+    def is_valid_for(self, user: UserAccount) -> bool:
+        """
+        Returns True if the token was created for the given user, and
+        has not been invalidated by a newer token or an email change.
+        """
+        if not self.is_for(user):
+            return False
+        return constant_time_compare(self.payload.get("n", ""), get_email_verification_nonce(user))
+
+    def verify(self, user: UserAccount) -> bool:
+        """
+        Marks the given user as verified if the token is valid for the user.
+
+        :return: True if the user was verified, False otherwise.
+        """
+        if not self.is_valid_for(user):
+            return False
+        if not user.is_verified:
+            user.is_verified = True
+            user.save(update_fields=["is_verified", "updated_at"])
+        return True
@@ -0,0 +1,65 @@
+"""
+Password hashers with costs that can be tuned through the `PASSWORD_HASHING_COSTS` setting.
+
+The hashers use the same algorithm names as Django's hashers, so existing hashes are
+verified by them, and are transparently re-hashed on login when the configured cost
+(or the preferred hasher of the `PASSWORD_HASHING_PROFILE`) changes.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    PBKDF2PasswordHasher, Argon2PasswordHasher, BCryptSHA256PasswordHasher
+)
+
+
+def get_hashing_cost(name: str, default: int) -> int:
+    """
+    Returns the hashing cost parameter with the given name from the `PASSWORD_HASHING_COSTS` setting.
+
+    :param name: The name of the cost parameter, e.g. "pbkdf2_iterations".
+    :param default: The value to use if the cost parameter is not set.
+    """
+    return getattr(settings, "PASSWORD_HASHING_COSTS", {}).get(name, default)
+
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 hasher with configurable iterations ("pbkdf2_iterations")"""
+
+    @property
+    def iterations(self) -> int:
+        return get_hashing_cost("pbkdf2_iterations", PBKDF2PasswordHasher.iterations)
+
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2id hasher with configurable time cost ("argon2_time_cost"), 
+    memory cost in KiB ("argon2_memory_cost") and parallelism ("argon2_parallelism").
+
+    Requires the `argon2-cffi` package.
+    """
+
+    @property
+    def time_cost(self) -> int:
+        return get_hashing_cost("argon2_time_cost", Argon2PasswordHasher.time_cost)
+    
+    @property
+    def memory_cost(self) -> int:
+        return get_hashing_cost("argon2_memory_cost", Argon2PasswordHasher.memory_cost)
+    
+    @property
+    def parallelism(self) -> int:
+        return get_hashing_cost("argon2_parallelism", Argon2PasswordHasher.parallelism)
+
+
+
+class TunedBCryptSHA256PasswordHasher(BCryptSHA256PasswordHasher):
+    """
+    BCrypt-SHA256 hasher with configurable (log2) rounds ("bcrypt_rounds").
+
+    Requires the `bcrypt` package.
+    """
+
+    @property
+    def rounds(self) -> int:
+        return get_hashing_cost("bcrypt_rounds", BCryptSHA256PasswordHasher.rounds)
@@ -0,0 +1,77 @@
+import time
+import uuid
+from typing import Any, List
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from helpers.benchmark import summarize_latencies, format_summary
+from users.email_verification import create_email_verification_token, EmailVerificationTokenService
+from users.models import UserAccount
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark email verification token lookups against the legacy `id__icontains` lookup, "
+        "with the given number of user rows in the database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100000, help="Number of user rows to benchmark with")
+        parser.add_argument("--iterations", type=int, default=50, help="Number of lookups to time per lookup kind")
+        parser.add_argument("--batch-size", type=int, default=10000, help="Number of benchmark users to insert per query")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        run_id = uuid.uuid4().hex[:8]
+        self.stdout.write(f"Inserting {options['users']} benchmark users...")
+        self.create_users(run_id, options["users"], options["batch_size"])
+        try:
+            user = UserAccount.objects.filter(email__startswith=f"bench-{run_id}-").order_by("email").last()
+            token = create_email_verification_token(user)
+            user.refresh_from_db()
+            self.stdout.write(format_summary(
+                "signed token ", summarize_latencies(self.bench_token_lookup(token, options["iterations"]))
+            ))
+            self.stdout.write(format_summary(
+                "id__icontains", summarize_latencies(self.bench_legacy_lookup(user, options["iterations"]))
+            ))
+        finally:
+            UserAccount.objects.filter(email__startswith=f"bench-{run_id}-").delete()
+        return None
+
+
+    def create_users(self, run_id: str, count: int, batch_size: int) -> None:
+        """Inserts benchmark users in bulk, bypassing `UserAccount.save`"""
+        with transaction.atomic():
+            for offset in range(0, count, batch_size):
+                UserAccount.objects.bulk_create([
+                    UserAccount(
+                        email=f"bench-{run_id}-{index:08d}@example.com",
+                        name="Benchmark User", slug=f"bench-{run_id}-{index:08d}",
+                        password="!"
+                    )
+                    for index in range(offset, min(offset + batch_size, count))
+                ])
+        return None
+
+
+    def bench_token_lookup(self, token: str, iterations: int) -> List[float]:
+        """Times verifying a signed token and fetching its owner by primary key"""
+        latencies = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            service = EmailVerificationTokenService(token)
+            owner = service.get_owner()
+            assert owner is not None and service.is_valid_for(owner)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+
+    def bench_legacy_lookup(self, user: UserAccount, iterations: int) -> List[float]:
+        """Times the legacy lookup of the user whose hex ID is the token"""
+        latencies = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            UserAccount.objects.filter(id__icontains=user.id.hex).first()
+            latencies.append(time.perf_counter() - start)
+        return latencies
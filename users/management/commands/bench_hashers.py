@@ -0,0 +1,51 @@
+import time
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+from helpers.benchmark import summarize_latencies, format_summary
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the verify latency and single core throughput of the hasher of each password hashing profile, "
+        "with the costs configured in the `PASSWORD_HASHING_COSTS` setting"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=10, help="Number of password verifications per profile")
+        parser.add_argument(
+            "--profile", action="append", dest="profiles", 
+            choices=list(settings.PASSWORD_HASHING_PROFILES),
+            help="Profile to benchmark. Can be repeated. Defaults to all profiles"
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        password = "correct horse battery staple"
+        profiles = options["profiles"] or list(settings.PASSWORD_HASHING_PROFILES)
+
+        for profile in profiles:
+            hasher = import_string(settings.PASSWORD_HASHING_PROFILES[profile])()
+            try:
+                if hasher.library:
+                    hasher._load_library()
+            except ValueError as exc:
+                self.stdout.write(self.style.WARNING(f"{profile}: skipped, {exc}"))
+                continue
+
+            encoded = hasher.encode(password, hasher.salt())
+            latencies = []
+            start = time.perf_counter()
+            for _ in range(options["iterations"]):
+                verify_start = time.perf_counter()
+                assert hasher.verify(password, encoded)
+                latencies.append(time.perf_counter() - verify_start)
+            summary = summarize_latencies(latencies, time.perf_counter() - start)
+
+            marker = " (active)" if profile == settings.PASSWORD_HASHING_PROFILE else ""
+            self.stdout.write(f"{profile}{marker}: {hasher.safe_summary(encoded)}")
+            self.stdout.write(format_summary("  verify", summary))
+            self.stdout.write(f"  ~{summary['ops_per_sec']:.1f} logins/sec per core")
+        return None
@@ -0,0 +1,84 @@
+import time
+import uuid
+import zoneinfo
+from typing import Any, Callable, List
+
+from django.contrib.auth.models import update_last_login
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from helpers.benchmark import summarize_latencies, format_summary
+from users.models import UserAccount
+from users.signals import update_last_login_and_staged_fields
+from users.utils import stage_login_update
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the database writes made on login during a login burst, "
+        "with and without login write coalescing"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20, help="Number of users logging in")
+        parser.add_argument("--logins", type=int, default=5, help="Number of logins per user during the burst")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        users = [
+            UserAccount.objects.create_user(
+                email=f"bench-{uuid.uuid4().hex[:8]}@example.com",
+                password="unused", name="Benchmark User", timezone="UTC"
+            ) 
+            for _ in range(options["users"])
+        ]
+        # The first login of the burst comes from a new timezone, the rest from the same one
+        timezone = zoneinfo.ZoneInfo("Africa/Lagos")
+        try:
+            for label, login in (("unconditional", self.legacy_login), ("coalesced    ", self.coalesced_login)):
+                UserAccount.objects.filter(pk__in=[user.pk for user in users]).update(timezone="UTC", last_login=None)
+                self.run_burst(label, users, options["logins"], timezone, login)
+        finally:
+            UserAccount.objects.filter(pk__in=[user.pk for user in users]).delete()
+        return None
+
+
+    def legacy_login(self, user: UserAccount, timezone: zoneinfo.ZoneInfo) -> None:
+        """The writes made on login before coalescing: a full save, then a last login update"""
+        user.timezone = timezone
+        user.save()
+        update_last_login(None, user)
+
+    def coalesced_login(self, user: UserAccount, timezone: zoneinfo.ZoneInfo) -> None:
+        """The writes made on login with coalescing"""
+        stage_login_update(user, timezone=timezone)
+        update_last_login_and_staged_fields(None, None, user)
+
+
+    def run_burst(
+            self, label: str, 
+            users: List[UserAccount], 
+            logins: int, 
+            timezone: zoneinfo.ZoneInfo, 
+            login: Callable[[UserAccount, zoneinfo.ZoneInfo], None]
+        ) -> None:
+        latencies = []
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(logins):
+                for user in users:
+                    # Each login authenticates a fresh user instance
+                    user = UserAccount.objects.get(pk=user.pk)
+                    start = time.perf_counter()
+                    login(user, timezone)
+                    latencies.append(time.perf_counter() - start)
+        
+        total_logins = len(users) * logins
+        writes = sum(1 for query in queries.captured_queries if query["sql"].startswith("UPDATE"))
+        # Exclude the queries made to fetch the user for each login
+        reads = len(queries.captured_queries) - writes - total_logins
+        self.stdout.write(
+            f"{label}: {total_logins} logins, {writes} UPDATEs ({writes / total_logins:.2f}/login), "
+            f"{reads} extra SELECTs"
+        )
+        self.stdout.write(format_summary(f"{label} login writes", summarize_latencies(latencies)))
+        return None
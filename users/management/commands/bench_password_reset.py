@@ -0,0 +1,98 @@
+import time
+import uuid
+from typing import Any, Callable, Dict, List
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework_api_key.crypto import KeyGenerator
+
+from helpers.benchmark import summarize_latencies, format_summary
+from tokens.models import PasswordResetToken
+from users.models import UserAccount
+from users.password_reset import (
+    PasswordResetTokenService, check_password_reset_token_validity, 
+    get_token_owner, reset_password_for_token
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the latency of each password reset step, for tokens hashed with the "
+        "HMAC-SHA256 key generator and tokens hashed with the legacy password hasher"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20, help="Number of reset flows to run per token kind")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        iterations: int = options["iterations"]
+        user = UserAccount.objects.create_user(
+            email=f"bench-{uuid.uuid4().hex[:8]}@example.com",
+            password=uuid.uuid4().hex, name="Benchmark User"
+        )
+        try:
+            for label, create_token in (
+                ("hmac  ", self.create_token), 
+                ("legacy", self.create_legacy_token)
+            ):
+                latencies = self.bench_flow(user, create_token, iterations)
+                for step, step_latencies in latencies.items():
+                    self.stdout.write(format_summary(f"{label} {step}", summarize_latencies(step_latencies)))
+        finally:
+            user.delete()
+        return None
+
+
+    def create_token(self, user: UserAccount) -> str:
+        """Creates a token hashed with the password reset token key generator"""
+        _, token = PasswordResetToken.objects.create_key(
+            user=user, name="Benchmark token",
+            expiry_date=timezone.now() + timezone.timedelta(hours=1)
+        )
+        return token
+    
+
+    def create_legacy_token(self, user: UserAccount) -> str:
+        """Creates a token hashed with the default (password) hasher, as tokens were before"""
+        token, prefix, hashed_key = KeyGenerator().generate()
+        PasswordResetToken.objects.create(
+            id=f"{prefix}.{hashed_key}", prefix=prefix, hashed_key=hashed_key,
+            user=user, name="Benchmark token",
+            expiry_date=timezone.now() + timezone.timedelta(hours=1)
+        )
+        return token
+    
+
+    def bench_flow(self, user: UserAccount, create_token: Callable[[UserAccount], str], iterations: int) -> Dict[str, List[float]]:
+        """
+        Times each step of the password reset flow, as the steps ran before (verifying the token at each step)
+        and as they run now (verifying the token once with `PasswordResetTokenService`)
+        """
+        latencies = {
+            "validity check": [], "owner lookup": [], "reset": [], 
+            "flow (per-step verification)": [], "flow (token service)": []
+        }
+        new_password = uuid.uuid4().hex
+        for _ in range(iterations):
+            token = create_token(user)
+            start = time.perf_counter()
+            check_password_reset_token_validity(token)
+            latencies["validity check"].append(time.perf_counter() - start)
+            start = time.perf_counter()
+            get_token_owner(token)
+            latencies["owner lookup"].append(time.perf_counter() - start)
+            start = time.perf_counter()
+            reset_password_for_token(token, new_password)
+            latencies["reset"].append(time.perf_counter() - start)
+            latencies["flow (per-step verification)"].append(sum(
+                step_latencies[-1] for step_latencies in list(latencies.values())[:3]
+            ))
+
+            token = create_token(user)
+            start = time.perf_counter()
+            service = PasswordResetTokenService(token)
+            service.is_valid()
+            service.get_owner()
+            service.reset_password(new_password)
+            latencies["flow (token service)"].append(time.perf_counter() - start)
+        return latencies
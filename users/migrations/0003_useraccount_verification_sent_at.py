@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-19 14:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_useraccount_is_verified'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='useraccount',
+            name='verification_sent_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='verification sent at'),
+        ),
+    ]
@@ -27,6 +27,8 @@ class UserAccount(PermissionsMixin, AbstractBaseUser):
     is_staff = models.BooleanField(_("staff") ,default=False)
     is_superuser = models.BooleanField(_("superuser") ,default=False)
     is_verified = models.BooleanField(_("verified") ,default=False)
+    # Changed whenever a verification email is sent, to invalidate previously sent verification links
+    verification_sent_at = models.DateTimeField(_("verification sent at"), null=True, blank=True, editable=False)
     registered_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -50,15 +52,21 @@ class UserAccount(PermissionsMixin, AbstractBaseUser):
         return self.email
 
     def save(self, *args: Any, **kwargs: Any) -> None:
-        try:
-            old_instance = UserAccount.objects.get(pk=self.pk)
-        except UserAccount.DoesNotExist:
-            old_instance = None
-        
-        name_changed = old_instance and old_instance.name != self.name
-        if not self.slug or name_changed:
-            slug = slugify(self.name) + "-" + str(uuid.uuid4())[:8]
-            self.slug = slug
+        update_fields = kwargs.get("update_fields", None)
+        # The slug only needs to be checked when the name may have changed.
+        # Skip the extra query when only other fields are being updated
+        if update_fields is None or "name" in update_fields:
+            try:
+                old_instance = UserAccount.objects.get(pk=self.pk)
+            except UserAccount.DoesNotExist:
+                old_instance = None
+            
+            name_changed = old_instance and old_instance.name != self.name
+            if not self.slug or name_changed:
+                slug = slugify(self.name) + "-" + str(uuid.uuid4())[:8]
+                self.slug = slug
+                if update_fields is not None:
+                    kwargs["update_fields"] = {*update_fields, "slug"}
 
         return super().save(*args, **kwargs)
     
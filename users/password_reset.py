@@ -1,6 +1,7 @@
 from django.template.loader import render_to_string
 from django.conf import settings
 import datetime
+import functools
 from typing import Optional, Union
 from django.utils import timezone
 
@@ -13,6 +14,16 @@ def check_if_password_reset_token_exists(user: UserAccount) -> bool:
     return PasswordResetToken.objects.filter(user=user).exists()
 
 
+def delete_unusable_password_reset_tokens(user: Optional[UserAccount] = None) -> int:
+    """
+    Deletes revoked and expired password reset tokens in bulk.
+
+    :param user: If given, only the user's unusable tokens are deleted.
+    :return: The number of tokens deleted.
+    """
+    return PasswordResetToken.objects.delete_unusable(user=user)
+
+
 def create_password_reset_token(user: UserAccount, validity_period_in_hours: Optional[Union[int, float]] = None) -> str:
     """
     Create a password reset token for the given user.
@@ -34,15 +45,63 @@ def create_password_reset_token(user: UserAccount, validity_period_in_hours: Opt
     return token
 
 
+class PasswordResetTokenService:
+    """
+    Verifies a password reset token once, and memoizes the verified token for the
+    lifetime of the service. Create one per request to avoid re-verifying the token at each step.
+
+    :param token: The password reset token.
+    """
+    def __init__(self, token: Optional[str]) -> None:
+        self.token = token
+
+    @functools.cached_property
+    def reset_token(self) -> Optional[PasswordResetToken]:
+        """The verified (but possibly expired) password reset token, or None if the token is invalid"""
+        if not self.token:
+            return None
+        try:
+            return PasswordResetToken.objects.get_from_key(self.token)
+        except PasswordResetToken.DoesNotExist:
+            return None
+        
+    def is_valid(self) -> bool:
+        """Returns True if the token is valid and has not expired, False otherwise."""
+        return self.reset_token is not None and self.reset_token.has_expired is False
+    
+    def get_owner(self) -> Optional[UserAccount]:
+        """Returns the user who owns the token, if the token is valid."""
+        if self.reset_token is None:
+            return None
+        return self.reset_token.user
+    
+    def reset_password(self, new_password: str) -> bool:
+        """
+        Reset the password for the user associated with the token.
+        The token is deleted after the password has been reset.
+
+        :param new_password: The new password.
+        :return: True if the password was reset, False otherwise.
+        """
+        if not self.is_valid():
+            return False
+        user = self.reset_token.user
+        user.set_password(new_password)
+        user.save()
+        self.delete()
+        return True
+    
+    def delete(self) -> None:
+        """Deletes the token if it exists"""
+        if self.reset_token is not None:
+            self.reset_token.delete()
+            self.reset_token = None
+        return None
+
+
 def delete_password_reset_token(token: str) -> None:
     """Deletes the given password reset token if it exists"""
-    try:
-        reset_token: PasswordResetToken = PasswordResetToken.objects.get_from_key(token)
-    except PasswordResetToken.DoesNotExist:
-        pass
-    else:
-        reset_token.delete()
-    return None
+    return PasswordResetTokenService(token).delete()
 
 
 def check_password_reset_token_validity(token: str) -> bool:
@@ -51,13 +110,7 @@ def check_password_reset_token_validity(token: str) -> bool:
 
     :return: True if the token is valid, False otherwise.
     """
-    try:
-        reset_token: PasswordResetToken = PasswordResetToken.objects.get_from_key(token)
-    except PasswordResetToken.DoesNotExist:
-        return False
-    if reset_token and reset_token.has_expired is False:
-        return True
-    return False
+    return PasswordResetTokenService(token).is_valid()
 
 
 def reset_password_for_token(token: str, new_password: str) -> bool:
@@ -67,18 +120,7 @@ def reset_password_for_token(token: str, new_password: str) -> bool:
     :param token: The password reset token.
     :param new_password: The new password.
     """
-    try:
-        reset_token: PasswordResetToken = PasswordResetToken.objects.get_from_key(token)
-    except PasswordResetToken.DoesNotExist:
-        return False
-    if reset_token and reset_token.has_expired is False:
-        user = reset_token.user
-        user.set_password(new_password)
-        user.save()
-        # Delete the token after the password has been reset
-        reset_token.delete()
-        return True
-    return False
+    return PasswordResetTokenService(token).reset_password(new_password)
 
 
 def construct_password_reset_mail(
@@ -115,8 +157,4 @@ def get_token_owner(token: str) -> Optional[UserAccount]:
     :param token: The password reset token.
     :return: The user who owns the token.
     """
-    try:
-        reset_token: PasswordResetToken = PasswordResetToken.objects.get_from_key(token)
-    except PasswordResetToken.DoesNotExist:
-        return None
-    return reset_token.user
+    return PasswordResetTokenService(token).get_owner()
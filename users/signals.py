@@ -0,0 +1,31 @@
+from typing import Any
+from django.conf import settings
+from django.http import HttpRequest
+from django.utils import timezone
+
+from .models import UserAccount
+
+# Name of the attribute, on a user instance, holding the fields staged to be saved on login
+LOGIN_UPDATE_FIELDS_ATTR = "_login_update_fields"
+
+
+def update_last_login_and_staged_fields(sender: Any, request: HttpRequest, user: UserAccount, **kwargs: Any) -> None:
+    """
+    Replaces Django's `update_last_login` receiver for the `user_logged_in` signal.
+
+    Saves the user's last login time, together with any changes staged on the user 
+    with `users.utils.stage_login_update`, in a single UPDATE. The last login time is only 
+    written if the last recorded login is older than `LAST_LOGIN_UPDATE_INTERVAL` seconds,
+    so no write is made at all when nothing (significant) has changed.
+    """
+    update_fields = set(getattr(user, LOGIN_UPDATE_FIELDS_ATTR, ()))
+    now = timezone.now()
+    interval = getattr(settings, "LAST_LOGIN_UPDATE_INTERVAL", 0)
+    if user.last_login is None or (now - user.last_login).total_seconds() >= interval:
+        user.last_login = now
+        update_fields.add("last_login")
+
+    if update_fields:
+        user.save(update_fields=update_fields)
+    setattr(user, LOGIN_UPDATE_FIELDS_ATTR, set())
+    return None
@@ -0,0 +1,58 @@
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+
+# Within a one-minute window, 30 seconds before it ends
+NOW = 60 * 100000 + 30.0
+
+
+@override_settings(
+    THROTTLE_RATES={"login": "2/m"},
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tests"}},
+)
+class LoginThrottleTests(TestCase):
+    """Login requests are throttled by IP address and by email"""
+
+    def setUp(self) -> None:
+        cache.clear()
+        time_patch = mock.patch("helpers.throttling.time.time", return_value=NOW)
+        self.time = time_patch.start()
+        self.addCleanup(time_patch.stop)
+
+    def login(self, email: str, ip: str):
+        return self.client.post(
+            reverse("users:signin"),
+            data=json.dumps({"email": email, "password": "wrong"}),
+            content_type="application/json",
+            REMOTE_ADDR=ip,
+        )
+
+    def assertThrottled(self, response) -> None:
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.json()["status"], "error")
+        self.assertEqual(response["Retry-After"], "31")
+
+    def test_throttled_by_ip(self) -> None:
+        for index in range(2):
+            self.assertEqual(self.login(f"user{index}@example.com", "203.0.113.1").status_code, 400)
+        self.assertThrottled(self.login("user2@example.com", "203.0.113.1"))
+        # Other addresses are not throttled
+        self.assertEqual(self.login("user3@example.com", "203.0.113.2").status_code, 400)
+
+    def test_throttled_by_email(self) -> None:
+        for index in range(2):
+            self.assertEqual(self.login("user@example.com", f"203.0.113.{index}").status_code, 400)
+        self.assertThrottled(self.login("USER@example.com ", "203.0.113.2"))
+        # Other emails are not throttled
+        self.assertEqual(self.login("other@example.com", "203.0.113.3").status_code, 400)
+
+    def test_allowed_in_next_window(self) -> None:
+        for _ in range(2):
+            self.login("user@example.com", "203.0.113.1")
+        self.assertThrottled(self.login("user@example.com", "203.0.113.1"))
+        self.time.return_value = NOW + 30
+        self.assertEqual(self.login("user@example.com", "203.0.113.1").status_code, 400)
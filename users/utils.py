@@ -7,6 +7,8 @@ from django.utils import timezone
 from django.template.loader import render_to_string
 
 from .models import UserAccount
+from .email_verification import create_email_verification_token
+from .signals import LOGIN_UPDATE_FIELDS_ATTR
 
 
 def parse_query_params_from_request(request: HttpRequest) -> Dict[str, str]:
@@ -39,10 +41,16 @@ def get_password_change_mail_body() -> str:
 
 
 def construct_verification_email(user: UserAccount) -> str:
-    """Construct the verification email body."""
-    verification_link = f"{settings.SITE_URL}/{reverse('users:email_verification', kwargs={'token': user.id.hex})}"
+    """
+    Construct the verification email body.
+
+    A new verification token is created for the user, invalidating previously sent verification links.
+    """
+    token = create_email_verification_token(user)
+    verification_link = f"{settings.SITE_URL}{reverse('users:email_verification', kwargs={'token': token})}"
     context = {
         "username": user.name,
+        "validity_period": settings.EMAIL_VERIFICATION_TOKEN_VALIDITY_PERIOD,
         "verification_link": verification_link,
         "current_year": timezone.now().year,
         "site_name": settings.SITE_NAME,
@@ -57,3 +65,26 @@ def send_verification_email(user: UserAccount) -> None:
     subject = "Verify your email address"
     body = construct_verification_email(user)
     return user.send_mail(subject, body, html=True)
+
+
+def stage_login_update(user: UserAccount, **values: Any) -> bool:
+    """
+    Sets the given field values on the user and stages the fields whose values changed, 
+    to be saved together with the last login time, in a single UPDATE, when the user is logged in.
+
+    :param user: The user about to be logged in.
+    :param values: The field values to set on the user.
+    :return: True if any of the values changed, False otherwise.
+    """
+    staged_fields = getattr(user, LOGIN_UPDATE_FIELDS_ATTR, set())
+    for field_name, value in values.items():
+        if getattr(user, field_name) != value:
+            setattr(user, field_name, value)
+            staged_fields.add(field_name)
+    
+    if not staged_fields:
+        return False
+    # Record the change in the user's updated time as it would be with a full save
+    staged_fields.add("updated_at")
+    setattr(user, LOGIN_UPDATE_FIELDS_ATTR, staged_fields)
+    return True
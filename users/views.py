@@ -10,6 +10,7 @@ from django.conf import settings
 import functools
 from urllib.parse import urlencode as urllib_urlencode
 import pytz
+import zoneinfo
 
 
 from .forms import UserCreationForm, UserUpdateForm
@@ -18,13 +19,19 @@ from .decorators import (
     redirect_authenticated, email_request_user_on_response,
     requires_account_verification, to_JsonResponse
 )
-from .utils import parse_query_params_from_request, get_password_change_mail_body, send_verification_email
+from .utils import (
+    parse_query_params_from_request, get_password_change_mail_body, 
+    send_verification_email, stage_login_update
+)
 from .password_reset import (
     check_if_password_reset_token_exists, create_password_reset_token,
     delete_password_reset_token, construct_password_reset_mail,
-    check_password_reset_token_validity, reset_password_for_token
+    delete_unusable_password_reset_tokens, PasswordResetTokenService
 )
+from .email_verification import EmailVerificationTokenService
+from booking.exports import create_calendar_feed_token
 from helpers.logging import log_exception
+from helpers.throttling import throttle
 
 
 
@@ -86,6 +93,7 @@ class UserLoginView(generic.TemplateView):
         return super().get(request, *args, **kwargs)
 
 
+    @throttle("login", by=("ip", "email"))
     def post(self, request: HttpRequest, *args: str, **kwargs: Any) -> JsonResponse:
         """Handles user authentication AJAX/Fetch POST request"""
         data: Dict = json.loads(request.body)
@@ -96,8 +104,11 @@ class UserLoginView(generic.TemplateView):
         user = authenticate(request, username=email, password=password)
         if user:
             if current_timezone:
-                user.timezone = current_timezone
-                user.save()
+                try:
+                    # The timezone is saved together with the last login time, and only if it changed
+                    stage_login_update(user, timezone=zoneinfo.ZoneInfo(current_timezone))
+                except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+                    pass
             login(request, user)
             
             query_params = parse_query_params_from_request(request)
@@ -140,15 +151,12 @@ class UserEmailVerificationView(LoginRequiredMixin, generic.TemplateView):
 
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
-        token = self.kwargs.get("token", None)
         user = self.request.user
 
-        if token != user.id.hex:
+        if not self.verification_token.verify(user):
             context["verification_status"] = "error"
-            context["verification_detail"] = "Invalid verification link!"
+            context["verification_detail"] = "Invalid or expired verification link!"
         else:
-            user.is_verified = True
-            user.save()
             context["verification_status"] = "success"
             context["verification_detail"] = "Your account has been verified successfully!"
         return context
@@ -156,19 +164,19 @@ class UserEmailVerificationView(LoginRequiredMixin, generic.TemplateView):
 
     def get(self, request: HttpRequest, *args: str, **kwargs: Any) -> HttpResponse:
         token = self.kwargs.get("token", "")
-        token_user = UserAccount.objects.filter(id__icontains=token).first()
-        if token_user:
-            if token_user == request.user:
-                # If the token user (the request user) is already verified, redirect to dashboard
-                if request.user.is_verified:
-                    return redirect("dashboard:dashboard")
-            else:
-                # If the token user is not the request user, log out the request user
-                logout(request)
-                login_route = reverse("users:signin")
-                this_route = reverse("users:email_verification", kwargs={"token": token})
-                # Redirect to login page with next parameter set to this route
-                return redirect(f"{login_route}?next={this_route}")
+        # The token is verified once and reused for the rest of the request
+        self.verification_token = EmailVerificationTokenService(token)
+        if self.verification_token.is_for(request.user):
+            # If the token user (the request user) is already verified, redirect to dashboard
+            if request.user.is_verified:
+                return redirect("dashboard:dashboard")
+        elif self.verification_token.get_owner():
+            # If the token user is not the request user, log out the request user
+            logout(request)
+            login_route = reverse("users:signin")
+            this_route = reverse("users:email_verification", kwargs={"token": token})
+            # Redirect to login page with next parameter set to this route
+            return redirect(f"{login_route}?next={this_route}")
         return super().get(request, *args, **kwargs)
 
 
@@ -177,6 +185,7 @@ class ResendVerificationEmailView(LoginRequiredMixin, generic.View):
     """View for resending a user's account verification email."""
     http_method_names = ["post"]
 
+    @throttle("resend_verification_email", by=("ip", "user"))
     def post(self, request: HttpRequest, *args: str, **kwargs: Any) -> JsonResponse:
         user = request.user
         try:
@@ -206,6 +215,7 @@ class ForgotPasswordView(generic.TemplateView):
     template_name = "users/forgot_password.html"
     http_method_names = ["get", "post"]
 
+    @throttle("forgot_password", by=("ip", "email"))
     def post(self, request: HttpRequest, *args: str, **kwargs: Any) -> JsonResponse:
         data: Dict = json.loads(request.body)
         email: str = data.get("email", None)
@@ -222,6 +232,8 @@ class ForgotPasswordView(generic.TemplateView):
                 status=404
             )
         
+        # Expired tokens should not stop the user from requesting a new one
+        delete_unusable_password_reset_tokens(user)
         if check_if_password_reset_token_exists(user) is True:
             # If a token already exists, then the user has already requested a password reset
             # and should wait for the email to be sent to them or check their email for the link.
@@ -280,12 +292,13 @@ class UserAccountPasswordResetView(generic.TemplateView):
         new_password = data.get("new-password1")
         query_params = parse_query_params_from_request(request)
         token = query_params.get("token", None)
-        token_is_valid = check_password_reset_token_validity(token)
+        # The token is verified once and reused for every step below
+        token_service = PasswordResetTokenService(token)
         reset_successful = False
         
-        if token_is_valid is False:
+        if token_service.is_valid() is False:
             # Delete the token so the user can request a password rest again
-            delete_password_reset_token(token)
+            token_service.delete()
             return JsonResponse(
                 data={
                     "status": "error",
@@ -295,7 +308,7 @@ class UserAccountPasswordResetView(generic.TemplateView):
             )
         
         try:
-            reset_successful = reset_password_for_token(token, new_password)
+            reset_successful = token_service.reset_password(new_password)
         except Exception as exc:
             log_exception(exc)
             return JsonResponse(
@@ -337,6 +350,9 @@ class UserAccountDetailView(LoginRequiredMixin, generic.DetailView):
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
         context["timezones"] = pytz.all_timezones
+        context["calendar_feed_url"] = self.request.build_absolute_uri(
+            reverse("booking:calendar_feed", kwargs={"token": create_calendar_feed_token(self.object)})
+        )
         return context
     
 